@@ -0,0 +1,161 @@
+"""
+Flux temps réel du tableau de bord administrateur
+Transforme les écritures du DatabaseManager en deltas versionnés
+poussés dans la room Socket.IO 'admin'
+"""
+
+import threading
+from datetime import datetime
+
+# Champs exposés pour un compte dans les listes du tableau de bord
+ACCOUNT_FIELDS = ('id', 'nom', 'prenom', 'pseudo', 'username',
+                  'compte_actif', 'compte_approuve', 'date_inscription')
+
+
+def _serialize(row, fields=None):
+    """Copie une ligne en convertissant les dates en ISO 8601"""
+    result = {}
+    for key, value in row.items():
+        if fields and key not in fields:
+            continue
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        result[key] = value
+    return result
+
+
+class AdminFeed:
+    """
+    Pousse dans la room 'admin' un événement 'admin_update' par écriture:
+
+        {
+            'version': 42,
+            'stats': {...},          # compteurs absolus après l'écriture
+            'changes': [
+                {'list': 'pending_accounts', 'op': 'add', 'item': {...}},
+                {'list': 'pending_messages', 'op': 'remove', 'id': 17},
+                {'list': 'pending_messages', 'op': 'claim', 'ids': [18, 19],
+                 'admin_id': 2, 'until': '...'}
+            ]
+        }
+
+    Les versions sont consécutives: un client qui constate un trou
+    (version != dernière + 1) doit recharger l'état complet.
+    """
+
+    def __init__(self, socketio, db_manager, room='admin'):
+        self.socketio = socketio
+        self.room = room
+        self.version = 0
+        self.lock = threading.Lock()
+
+        # Compteurs initiaux, ensuite maintenus en mémoire
+        self.stats = db_manager.get_stats() or {}
+        for key in ('total_users', 'active_users', 'approved_users',
+                    'total_messages', 'validated_messages', 'pending_messages'):
+            self.stats.setdefault(key, 0)
+
+        db_manager.add_listener(self.handle_event)
+
+    def current_version(self):
+        """Version du dernier delta émis"""
+        with self.lock:
+            return self.version
+
+    def handle_event(self, event, data):
+        """Listener du DatabaseManager"""
+        handler = getattr(self, f'_on_{event}', None)
+        if handler is None:
+            return
+
+        with self.lock:
+            changes = handler(data)
+            if changes is None:
+                return
+            self.version += 1
+            payload = {
+                'version': self.version,
+                'stats': dict(self.stats),
+                'changes': changes
+            }
+
+        self.socketio.emit('admin_update', payload, room=self.room)
+
+    # ========================================
+    # TRADUCTION DES ÉCRITURES EN DELTAS
+    # ========================================
+
+    def _on_user_added(self, data):
+        self.stats['total_users'] += 1
+        return [{
+            'list': 'pending_accounts',
+            'op': 'add',
+            'item': _serialize(data['user'], ACCOUNT_FIELDS)
+        }]
+
+    def _on_user_activated(self, data):
+        user = data.get('user')
+        if not user:
+            return None
+        self.stats['active_users'] += 1
+        changes = [{'list': 'pending_accounts', 'op': 'remove', 'id': user['id']}]
+        if not user.get('compte_approuve'):
+            changes.append({
+                'list': 'unapproved_accounts',
+                'op': 'add',
+                'item': _serialize(user, ACCOUNT_FIELDS)
+            })
+        return changes
+
+    def _on_user_approved(self, data):
+        self.stats['approved_users'] += 1
+        return [{
+            'list': 'unapproved_accounts',
+            'op': 'remove',
+            'username': data['username']
+        }]
+
+    def _on_message_added(self, data):
+        message = data['message']
+        self.stats['total_messages'] += 1
+        if message['valide']:
+            self.stats['validated_messages'] += 1
+            return []
+        self.stats['pending_messages'] += 1
+        return [{
+            'list': 'pending_messages',
+            'op': 'add',
+            'item': _serialize(message)
+        }]
+
+    def _on_message_validated(self, data):
+        self.stats['validated_messages'] += 1
+        self.stats['pending_messages'] -= 1
+        return [{'list': 'pending_messages', 'op': 'remove', 'id': data['message_id']}]
+
+    def _on_message_rejected(self, data):
+        self.stats['total_messages'] -= 1
+        if data.get('was_valid'):
+            self.stats['validated_messages'] -= 1
+            return []
+        self.stats['pending_messages'] -= 1
+        return [{'list': 'pending_messages', 'op': 'remove', 'id': data['message_id']}]
+
+    def _on_messages_claimed(self, data):
+        until = data['lease_until']
+        return [{
+            'list': 'pending_messages',
+            'op': 'claim',
+            'ids': data['message_ids'],
+            'admin_id': data['admin_id'],
+            'until': until.isoformat() if isinstance(until, datetime) else until
+        }]
+
+    def _on_messages_released(self, data):
+        return [{
+            'list': 'pending_messages',
+            'op': 'claim',
+            'ids': data['message_ids'],
+            'admin_id': None,
+            'until': None
+        }]
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks des méthodes du DatabaseManager
+Chaque méthode est appelée avec des arguments tirés du jeu de données
+(generate_dataset.py) et chronométrée: p50/p95/max et lignes renvoyées.
+Les résultats peuvent être comparés à une mesure de référence.
+
+Usage: python benchmarks/bench_db.py [--repeat 200] [--json resultats.json]
+       python benchmarks/bench_db.py --baseline reference.json --tolerance 0.25
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, BACKEND_DIR)
+
+from db_manager import DatabaseManager  # noqa: E402
+
+SEARCH_WORDS = "examen projet réunion soutenance bibliothèque planning".split()
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[max(0, math.ceil(p / 100 * len(values)) - 1)]
+
+
+def row_count(result):
+    if isinstance(result, (list, tuple)):
+        return len(result)
+    return 0 if result is None else 1
+
+
+def sample_dataset(db, rng, size=1000):
+    """Identifiants existants utilisés comme arguments des méthodes"""
+    cursor = db.connection.cursor()
+    try:
+        cursor.execute("SELECT MAX(id) FROM etudiant")
+        max_user = cursor.fetchone()[0] or 1
+        cursor.execute("SELECT MAX(id) FROM message")
+        max_message = cursor.fetchone()[0] or 1
+        ids = ','.join(str(rng.randint(1, max_user)) for _ in range(size))
+        cursor.execute(f"SELECT id, username, pseudo FROM etudiant WHERE id IN ({ids})")
+        users = cursor.fetchall()
+        cursor.execute("SELECT DISTINCT ip_address FROM historique_login "
+                       "WHERE ip_address IS NOT NULL LIMIT %s", (size,))
+        ips = [row[0] for row in cursor.fetchall()] or ['127.0.0.1']
+    finally:
+        cursor.close()
+    if not users:
+        sys.exit("Base vide: lancer d'abord benchmarks/generate_dataset.py")
+    return {
+        'users': users,
+        'message_ids': [rng.randint(1, max_message) for _ in range(size)],
+        'ips': ips
+    }
+
+
+def read_cases(db, data, rng):
+    """(nom, fonction sans argument) pour chaque lecture mesurée"""
+    user = lambda: rng.choice(data['users'])  # noqa: E731
+    cases = [
+        ('get_user_by_username', lambda: db.get_user_by_username(user()[1])),
+        ('get_user_by_id', lambda: db.get_user_by_id(user()[0])),
+        ('get_messages', lambda: db.get_messages(100)),
+        ('get_message_by_id', lambda: db.get_message_by_id(rng.choice(data['message_ids']))),
+        ('get_messages_by_ids', lambda: db.get_messages_by_ids(rng.sample(data['message_ids'], 50))),
+        ('get_pending_messages', lambda: db.get_pending_messages(limit=50)),
+        ('get_pending_messages[prefix]', lambda: db.get_pending_messages(limit=50, prefix=user()[2][:4])),
+        ('get_pending_messages[private]', lambda: db.get_pending_messages(limit=50, private=True)),
+        ('get_inactive_accounts', lambda: db.get_inactive_accounts(limit=50)),
+        ('get_active_not_approved_accounts', lambda: db.get_active_not_approved_accounts(limit=50)),
+        ('get_all_active_users', lambda: db.get_all_active_users(limit=50)),
+        ('get_all_active_users[prefix]', lambda: db.get_all_active_users(limit=50, prefix=user()[2][:5])),
+        ('get_login_history', lambda: db.get_login_history(limit=50)),
+        ('search_login_history[username]', lambda: db.search_login_history(limit=50, username=user()[1])),
+        ('search_login_history[ip]', lambda: db.search_login_history(limit=50, ip_address=rng.choice(data['ips']))),
+        ('search_login_history[action]', lambda: db.search_login_history(limit=50, action='LOGIN')),
+        ('get_active_sessions', lambda: db.get_active_sessions(100)),
+        ('get_stats', db.get_stats),
+        ('get_dashboard', lambda: db.get_dashboard(limit=50)),
+        ('has_fulltext_index', db.has_fulltext_index),
+    ]
+    if db.has_fulltext_index():
+        # Sans index FULLTEXT (SQLite), le serveur cherche dans un index en mémoire
+        cases.append(('search_messages',
+                      lambda: db.search_messages(rng.choice(SEARCH_WORDS), viewer_id=user()[0])))
+    return cases
+
+
+def write_cases(db, data, rng):
+    """Écritures (ajoutent des lignes: base de test uniquement)"""
+    user = lambda: rng.choice(data['users'])  # noqa: E731
+
+    def add_message():
+        sender = user()
+        return db.add_message(sender[0], sender[2], None, None,
+                              ' '.join(rng.choices(SEARCH_WORDS, k=8)), auto_validate=True)
+
+    def claim_release():
+        claimed = db.claim_messages(admin_id=1, batch_size=10)
+        db.release_messages(1, [m['id'] for m in claimed or []])
+        return claimed
+
+    def log_login():
+        u = user()
+        return db.log_login(u[0], u[1], u[2], 'LOGIN', rng.choice(data['ips']), 'bench_db')
+
+    return [
+        ('add_message', add_message),
+        ('claim_messages+release_messages', claim_release),
+        ('log_login', log_login),
+    ]
+
+
+def measure(function, repeat, warmup):
+    for _ in range(warmup):
+        function()
+    timings = []
+    rows = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - started)
+        rows += row_count(result)
+    return {
+        'p50_ms': round(percentile(timings, 50) * 1000, 3),
+        'p95_ms': round(percentile(timings, 95) * 1000, 3),
+        'max_ms': round(max(timings) * 1000, 3),
+        'rows_avg': round(rows / repeat, 1)
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Méthodes dont le p50 dépasse la référence de plus de 'tolerance' (0.25 = 25 %)"""
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if not reference or not reference['p50_ms']:
+            continue
+        ratio = result['p50_ms'] / reference['p50_ms']
+        if ratio > 1 + tolerance:
+            regressions.append((name, reference['p50_ms'], result['p50_ms'], ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--config', default=os.path.join(BACKEND_DIR, 'config.ini'))
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--only', nargs='+', help="Ne mesurer que ces méthodes")
+    parser.add_argument('--writes', action='store_true', help="Mesurer aussi les écritures")
+    parser.add_argument('--json', help="Enregistrer les résultats (référence pour --baseline)")
+    parser.add_argument('--baseline', help="Résultats de référence à comparer")
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    db = DatabaseManager(args.config)
+    data = sample_dataset(db, rng)
+    cases = read_cases(db, data, rng)
+    if args.writes:
+        cases += write_cases(db, data, rng)
+    if args.only:
+        cases = [(name, function) for name, function in cases
+                 if name in args.only or name.split('[')[0] in args.only]
+
+    print(f"{args.repeat} appels par méthode ({args.warmup} d'échauffement)\n")
+    print(f"  {'méthode':<36}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}{'lignes':>9}")
+    results = {}
+    for name, function in cases:
+        result = results[name] = measure(function, args.repeat, args.warmup)
+        print(f"  {name:<36}{result['p50_ms']:>10.3f}{result['p95_ms']:>10.3f}"
+              f"{result['max_ms']:>10.3f}{result['rows_avg']:>9.1f}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as output:
+            json.dump(results, output, indent=2, ensure_ascii=False)
+        print(f"\nRésultats enregistrés dans {args.json}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as reference:
+            regressions = compare(results, json.load(reference), args.tolerance)
+        if regressions:
+            print(f"\nRégressions (p50 > référence + {args.tolerance:.0%}):")
+            for name, before, after, ratio in regressions:
+                print(f"  {name:<36}{before:>10.3f} -> {after:.3f} ms (x{ratio:.2f})")
+            sys.exit(1)
+        print(f"\nAucune régression au-delà de {args.tolerance:.0%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la pré-modération automatique
+Mesure le coût par message de RuleEngine.evaluate() selon la taille
+des listes de mots-clés et la longueur des messages
+
+Usage: python benchmarks/bench_moderation.py [--messages 20000] [--keywords 10 1000 10000]
+"""
+
+import argparse
+import os
+import random
+import re
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from moderation_rules import RuleEngine, KeywordAutomaton, normalize, tokenize  # noqa: E402
+
+WORDS = ("bonjour salut merci cours examen projet groupe demain soir réunion "
+         "professeur note devoir bibliothèque question réponse module td tp "
+         "semaine horaire salle amphi stage rapport soutenance").split()
+
+
+def random_word(rng, length=7):
+    return ''.join(rng.choice(string.ascii_lowercase) for _ in range(length))
+
+
+def make_messages(rng, count, length):
+    """Messages de 'length' mots, dont ~5 % avec un mot suspect et ~1 % avec un lien"""
+    messages = []
+    for i in range(count):
+        words = [rng.choice(WORDS) for _ in range(length)]
+        if i % 20 == 0:
+            words[rng.randrange(length)] = 'crypto'
+        if i % 100 == 0:
+            words.append('https://exemple.com')
+        messages.append(' '.join(words))
+    return messages
+
+
+def make_engine(rng, keywords):
+    reject = [random_word(rng) for _ in range(keywords)]
+    review = [random_word(rng) for _ in range(keywords)] + ['crypto']
+    return RuleEngine(
+        reject_words=reject,
+        review_words=review,
+        reject_patterns=[r'(.)\1{19,}'],
+        review_patterns=[r'0[5-7](?:[ .-]?\d{2}){4}', r'@[\w-]+\.\w'],
+        max_length=2000,
+        max_links=3
+    ), reject
+
+
+def naive_finder(keywords):
+    """Référence: une expression régulière par mot-clé (coût proportionnel à la liste)"""
+    patterns = [re.compile(r'\b' + re.escape(w) + r'\b') for w in keywords]
+
+    def find(text):
+        text = normalize(text)
+        return {p.pattern for p in patterns if p.search(text)}
+    return find
+
+
+def timed(function, messages):
+    started = time.perf_counter()
+    for message in messages:
+        function(message)
+    return time.perf_counter() - started
+
+
+def report(label, elapsed, count):
+    print(f"  {label:<34} {elapsed / count * 1e6:9.2f} µs/message "
+          f"{count / elapsed:12,.0f} messages/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--messages', type=int, default=20000)
+    parser.add_argument('--keywords', type=int, nargs='+', default=[10, 1000, 10000])
+    parser.add_argument('--lengths', type=int, nargs='+', default=[8, 40, 200])
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"Pré-modération: {args.messages} messages par mesure\n")
+
+    for keywords in args.keywords:
+        started = time.perf_counter()
+        engine, reject = make_engine(rng, keywords)
+        build = time.perf_counter() - started
+        print(f"{keywords} mots interdits + {keywords} mots suspects "
+              f"(construction de l'automate: {build * 1000:.1f} ms)")
+
+        for length in args.lengths:
+            messages = make_messages(rng, args.messages, length)
+            report(f"evaluate, {length} mots", timed(engine.evaluate, messages), len(messages))
+
+        # Comparaison avec une expression régulière par mot-clé (petit échantillon:
+        # la référence devient très lente avec de grandes listes)
+        sample = make_messages(rng, min(args.messages, 200), 40)
+        automaton = KeywordAutomaton(reject)
+        report("automate seul, 40 mots", timed(lambda m: automaton.find(tokenize(m)), sample),
+               len(sample))
+        report("regex par mot-clé, 40 mots", timed(naive_finder(reject), sample), len(sample))
+        print()
+
+    metrics = engine.metrics()
+    print(f"Verdicts (dernière configuration): {metrics['accepted']} acceptés, "
+          f"{metrics['reviewed']} en file, {metrics['rejected']} rejetés")
+
+
+if __name__ == '__main__':
+    main()
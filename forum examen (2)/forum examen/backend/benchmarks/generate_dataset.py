@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Génération d'un jeu de données volumineux pour les benchmarks
+Étudiants, messages et historique de connexions insérés par lots
+(INSERT multi-lignes ou LOAD DATA LOCAL INFILE), avec une activité
+concentrée sur quelques étudiants (loi de Zipf)
+
+Usage: python benchmarks/generate_dataset.py --students 100000 --messages 10000000 --logins 5000000
+       python benchmarks/generate_dataset.py --method load-data --skew 1.2
+
+À lancer sur une base initialisée par init_db.py (jamais en production):
+les étudiants générés ont le préfixe --prefix et le mot de passe 'password123'.
+"""
+
+import argparse
+import configparser
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import bcrypt
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, BACKEND_DIR)
+
+from storage import SQLiteBackend, SQLiteConnection  # noqa: E402
+
+WORDS = ("bonjour salut merci cours examen projet groupe demain soir réunion "
+         "professeur note devoir bibliothèque question réponse module td tp "
+         "semaine horaire salle amphi stage rapport soutenance partiel "
+         "exercice correction chapitre planning inscription emploi temps").split()
+FIRST_NAMES = "Ahmed Fatima Hassan Salma Youssef Imane Omar Khadija Mehdi Sara".split()
+LAST_NAMES = "Alami Bennani Chakir Idrissi Tazi Berrada Fassi Amrani Naciri Ziani".split()
+USER_AGENTS = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/120.0",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_2) Safari/605.1.15",
+    "Mozilla/5.0 (Linux; Android 14) Mobile Chrome/120.0",
+)
+
+STUDENT_COLUMNS = ('nom', 'prenom', 'pseudo', 'username', 'password',
+                   'compte_actif', 'compte_approuve', 'date_inscription')
+MESSAGE_COLUMNS = ('id_expediteur', 'pseudo_expediteur', 'id_destinataire', 'pseudo_destinataire',
+                   'contenu', 'date_envoi', 'valide', 'date_validation', 'est_prive',
+                   'rejete', 'date_rejet')
+LOGIN_COLUMNS = ('id_etudiant', 'username', 'pseudo', 'action', 'date_action',
+                 'ip_address', 'user_agent', 'session_id')
+
+
+class ZipfSampler:
+    """Tirage d'un rang 0..n-1 avec P(k) proportionnel à 1 / (k + 1)^skew"""
+
+    def __init__(self, n, skew, rng):
+        self.rng = rng
+        self.population = range(n)
+        total = 0.0
+        self.cum_weights = []
+        for k in range(1, n + 1):
+            total += 1.0 / k ** skew if skew else 1.0
+            self.cum_weights.append(total)
+
+    def sample(self, count):
+        return self.rng.choices(self.population, cum_weights=self.cum_weights, k=count)
+
+
+# ========================================
+# ÉCRITURE PAR LOTS
+# ========================================
+
+class InsertWriter:
+    """INSERT multi-lignes (executemany), une transaction par lot"""
+
+    def __init__(self, connection, table, columns, batch_size):
+        self.connection = connection
+        self.table = table
+        self.columns = columns
+        self.batch_size = batch_size
+        self.rows = []
+        self.query = (f"INSERT INTO {table} ({', '.join(columns)}) "
+                      f"VALUES ({', '.join(['%s'] * len(columns))})")
+
+    def add(self, row):
+        self.rows.append(row)
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.rows:
+            return
+        cursor = self.connection.cursor()
+        try:
+            cursor.executemany(self.query, self.rows)
+            self.connection.commit()
+        finally:
+            cursor.close()
+        self.rows = []
+
+    def close(self):
+        self.flush()
+
+
+def tsv_field(value):
+    """Valeur au format par défaut de LOAD DATA (NULL: \\N, échappement par \\)"""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n')
+
+
+class LoadDataWriter:
+    """Fichier TSV temporaire chargé par LOAD DATA LOCAL INFILE tous les batch_size * 20 lignes"""
+
+    def __init__(self, connection, table, columns, batch_size):
+        self.connection = connection
+        self.table = table
+        self.columns = columns
+        self.chunk = batch_size * 20
+        self._open()
+
+    def _open(self):
+        self.file = tempfile.NamedTemporaryFile('w', suffix='.tsv', delete=False,
+                                                encoding='utf-8', newline='')
+        self.count = 0
+
+    def add(self, row):
+        self.file.write('\t'.join(tsv_field(value) for value in row) + '\n')
+        self.count += 1
+        if self.count >= self.chunk:
+            self.flush()
+            self._open()
+
+    def flush(self):
+        self.file.close()
+        try:
+            if self.count:
+                cursor = self.connection.cursor()
+                try:
+                    cursor.execute(
+                        f"LOAD DATA LOCAL INFILE %s INTO TABLE {self.table} "
+                        f"CHARACTER SET utf8mb4 ({', '.join(self.columns)})",
+                        (self.file.name,)
+                    )
+                    self.connection.commit()
+                finally:
+                    cursor.close()
+        finally:
+            os.unlink(self.file.name)
+
+    def close(self):
+        self.flush()
+
+
+# ========================================
+# GÉNÉRATION
+# ========================================
+
+def random_date(rng, now, days):
+    return now - timedelta(seconds=rng.random() * days * 86400)
+
+
+def generate_students(connection, writer_class, args, rng, now):
+    hashed = bcrypt.hashpw(b'password123', bcrypt.gensalt(args.bcrypt_rounds)).decode('utf-8')
+    writer = writer_class(connection, 'etudiant', STUDENT_COLUMNS, args.batch_size)
+    for i in range(args.students):
+        active = rng.random() < args.active_ratio
+        writer.add((
+            rng.choice(LAST_NAMES), rng.choice(FIRST_NAMES),
+            f"{args.prefix}_p{i}", f"{args.prefix}{i}", hashed,
+            active, active and rng.random() < args.approved_ratio,
+            random_date(rng, now, args.days)
+        ))
+        progress('étudiants', i + 1, args.students)
+    writer.close()
+
+    cursor = connection.cursor()
+    cursor.execute("SELECT id, username, pseudo FROM etudiant WHERE username REGEXP %s ORDER BY id",
+                   (f"^{args.prefix}[0-9]+$",))
+    students = cursor.fetchall()
+    cursor.close()
+    # Le rang Zipf 0 (le plus actif) est un étudiant tiré au hasard
+    rng.shuffle(students)
+    return students
+
+
+def generate_messages(connection, writer_class, args, rng, now, students):
+    senders = ZipfSampler(len(students), args.skew, rng)
+    writer = writer_class(connection, 'message', MESSAGE_COLUMNS, args.batch_size)
+    done = 0
+    while done < args.messages:
+        count = min(args.batch_size, args.messages - done)
+        for sender, recipient in zip(senders.sample(count), senders.sample(count)):
+            id_expediteur, _, pseudo_expediteur = students[sender]
+            private = rng.random() < args.private_ratio and sender != recipient
+            id_destinataire, pseudo_destinataire = (
+                (students[recipient][0], students[recipient][2]) if private else (None, None)
+            )
+            sent = random_date(rng, now, args.days)
+            state = rng.random()
+            valid = state >= args.pending_ratio + args.rejected_ratio
+            rejected = args.pending_ratio <= state < args.pending_ratio + args.rejected_ratio
+            length = max(1, int(rng.expovariate(1 / args.message_words)))
+            writer.add((
+                id_expediteur, pseudo_expediteur, id_destinataire, pseudo_destinataire,
+                ' '.join(rng.choice(WORDS) for _ in range(length)),
+                sent, valid, sent + timedelta(minutes=rng.random() * 30) if valid else None,
+                private, rejected, sent + timedelta(minutes=rng.random() * 60) if rejected else None
+            ))
+        done += count
+        progress('messages', done, args.messages)
+    writer.close()
+
+
+def generate_logins(connection, writer_class, args, rng, now, students):
+    users = ZipfSampler(len(students), args.skew, rng)
+    writer = writer_class(connection, 'historique_login', LOGIN_COLUMNS, args.batch_size)
+    done = 0
+    while done < args.logins:
+        count = min(args.batch_size, args.logins - done)
+        for rank in users.sample(count):
+            student_id, username, pseudo = students[rank]
+            writer.add((
+                student_id, username, pseudo, rng.choice(('LOGIN', 'LOGOUT')),
+                random_date(rng, now, args.days),
+                f"10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(1, 255)}",
+                rng.choice(USER_AGENTS), '%032x' % rng.getrandbits(128)
+            ))
+        done += count
+        progress('connexions', done, args.logins)
+    writer.close()
+
+
+_last_progress = [0.0]
+
+
+def progress(label, done, total):
+    now = time.monotonic()
+    if done == total or now - _last_progress[0] >= 2:
+        _last_progress[0] = now
+        print(f"  {label}: {done:,}/{total:,}", end='\n' if done == total else '\r', flush=True)
+
+
+def connect(args):
+    """Connexion MySQL, ou base SQLite si [DATABASE] backend = sqlite"""
+    config = configparser.ConfigParser()
+    config.read(args.config)
+    if config.get('DATABASE', 'backend', fallback='mysql') == 'sqlite':
+        if args.method == 'load-data':
+            sys.exit("--method load-data: MySQL uniquement")
+        return SQLiteBackend.from_config(config).connect()
+    import mysql.connector
+    return mysql.connector.connect(
+        host=config['DATABASE']['host'],
+        user=config['DATABASE']['user'],
+        password=config['DATABASE']['password'],
+        database=config['DATABASE']['database'],
+        allow_local_infile=args.method == 'load-data'
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--config', default=os.path.join(BACKEND_DIR, 'config.ini'))
+    parser.add_argument('--students', type=int, default=100000)
+    parser.add_argument('--messages', type=int, default=10000000)
+    parser.add_argument('--logins', type=int, default=5000000)
+    parser.add_argument('--skew', type=float, default=1.1,
+                        help="Exposant de Zipf de l'activité (0: uniforme)")
+    parser.add_argument('--days', type=int, default=365, help="Période couverte par les dates")
+    parser.add_argument('--active-ratio', type=float, default=0.9)
+    parser.add_argument('--approved-ratio', type=float, default=0.7)
+    parser.add_argument('--private-ratio', type=float, default=0.2)
+    parser.add_argument('--pending-ratio', type=float, default=0.02)
+    parser.add_argument('--rejected-ratio', type=float, default=0.01)
+    parser.add_argument('--message-words', type=int, default=12, help="Longueur moyenne (mots)")
+    parser.add_argument('--method', choices=('insert', 'load-data'), default='insert')
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--prefix', default='gen')
+    parser.add_argument('--bcrypt-rounds', type=int, default=4,
+                        help="Coût du hash commun à tous les comptes générés")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    if not args.students:
+        sys.exit("--students doit être positif")
+
+    rng = random.Random(args.seed)
+    now = datetime.now().replace(microsecond=0)
+    writer_class = LoadDataWriter if args.method == 'load-data' else InsertWriter
+    connection = connect(args)
+    cursor = connection.cursor()
+    cursor.execute("SELECT COUNT(*) FROM etudiant WHERE username REGEXP %s",
+                   (f"^{args.prefix}[0-9]+$",))
+    if cursor.fetchone()[0]:
+        sys.exit(f"Des étudiants '{args.prefix}N' existent déjà: choisir un autre --prefix")
+    is_mysql = not isinstance(connection, SQLiteConnection)
+    if is_mysql:
+        # Contrôles différés: les données générées sont cohérentes par construction
+        cursor.execute("SET SESSION unique_checks = 0, foreign_key_checks = 0")
+    cursor.close()
+
+    started = time.perf_counter()
+    try:
+        students = generate_students(connection, writer_class, args, rng, now)
+        if args.messages:
+            generate_messages(connection, writer_class, args, rng, now, students)
+        if args.logins:
+            generate_logins(connection, writer_class, args, rng, now, students)
+    finally:
+        if is_mysql:
+            cursor = connection.cursor()
+            cursor.execute("SET SESSION unique_checks = 1, foreign_key_checks = 1")
+            cursor.close()
+        connection.close()
+
+    elapsed = time.perf_counter() - started
+    rows = args.students + args.messages + args.logins
+    print(f"{rows:,} lignes en {elapsed:.0f} s ({rows / elapsed:,.0f} lignes/s)")
+    print("Penser à ANALYZE TABLE etudiant, message, historique_login; (SQLite: ANALYZE;) avant les mesures")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+Test de charge du serveur (chat Socket.IO et API REST)
+Simule des étudiants (connexion, user_connected, send_message, reconnexions,
+historique) et des admins (tableau de bord, file de modération) contre un
+serveur lancé en local, puis affiche débit et latences p50/p95/p99
+
+Usage: python benchmarks/load_test.py --setup --students 200 --admins 2 --duration 60
+       python benchmarks/load_test.py --url http://127.0.0.1:5000 --server-pid 1234
+
+Dépendances: pip install -r benchmarks/requirements-bench.txt
+Les limites de [FLOOD] et [RATE_LIMIT] s'appliquent aux comptes simulés:
+augmenter --message-interval ou ces limites pour les tests de débit.
+"""
+
+import argparse
+import math
+import os
+import random
+import sys
+import threading
+import time
+
+try:
+    import requests
+    import socketio
+except ImportError as e:
+    sys.exit(f"Dépendance manquante ({e.name}): pip install -r benchmarks/requirements-bench.txt")
+
+WORDS = ("bonjour salut merci cours examen projet groupe demain soir réunion "
+         "professeur note devoir bibliothèque question réponse module td tp "
+         "semaine horaire salle amphi stage rapport soutenance").split()
+
+TAG_PREFIX = 'lt'
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    # Rang le plus proche
+    return values[max(0, math.ceil(p / 100 * len(values)) - 1)]
+
+
+class Stats:
+    """Latences (s) et compteurs partagés par tous les clients simulés"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = {}
+        self.counters = {}
+        self.sent = {}
+
+    def observe(self, name, value):
+        with self.lock:
+            self.samples.setdefault(name, []).append(value)
+
+    def count(self, name, amount=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def message_sent(self, tag):
+        with self.lock:
+            self.sent[tag] = time.perf_counter()
+
+    def message_received(self, tag, own):
+        """Latence d'envoi -> réception, pour l'expéditeur et pour les autres"""
+        now = time.perf_counter()
+        with self.lock:
+            started = self.sent.get(tag)
+        if started is None:
+            return
+        self.observe('echo' if own else 'delivery', now - started)
+
+
+class ResourceSampler(threading.Thread):
+    """CPU et mémoire du processus serveur (/proc, Linux uniquement)"""
+
+    def __init__(self, pid, interval=1.0):
+        super().__init__(name='resource-sampler', daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.ticks = os.sysconf('SC_CLK_TCK')
+        self.rss_peak = 0
+        self.cpu_start = self.wall_start = None
+        self.cpu_end = self.wall_end = None
+
+    def cpu_seconds(self):
+        with open(f'/proc/{self.pid}/stat') as stat:
+            fields = stat.read().rsplit(')', 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / self.ticks
+
+    def rss_bytes(self):
+        with open(f'/proc/{self.pid}/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+        return 0
+
+    def run(self):
+        self.cpu_start, self.wall_start = self.cpu_seconds(), time.perf_counter()
+        while not self.stop_event.wait(self.interval):
+            self.rss_peak = max(self.rss_peak, self.rss_bytes())
+        self.cpu_end, self.wall_end = self.cpu_seconds(), time.perf_counter()
+
+    def stop(self):
+        self.stop_event.set()
+        self.join()
+
+    def report(self):
+        elapsed = (self.wall_end - self.wall_start) or 1
+        cpu = self.cpu_end - self.cpu_start
+        print(f"Serveur (pid {self.pid}): CPU {cpu:.1f} s ({cpu / elapsed * 100:.0f} % d'un cœur), "
+              f"RSS max {self.rss_peak / 2**20:.0f} Mo")
+
+
+# ========================================
+# CLIENTS SIMULÉS
+# ========================================
+
+class Student(threading.Thread):
+    """
+    Étudiant: /login, socket authentifié, user_connected, puis messages
+    publics ou privés à intervalle aléatoire, lecture de l'historique et
+    reconnexions occasionnelles
+    """
+
+    def __init__(self, args, stats, index, stop_event):
+        super().__init__(name=f'student-{index}', daemon=True)
+        self.args = args
+        self.stats = stats
+        self.index = index
+        self.username = f"{args.prefix}{index}"
+        self.stop_event = stop_event
+        self.rng = random.Random(args.seed + index)
+        self.http = requests.Session()
+        self.user_id = None
+        self.token = None
+        self.sio = None
+        self.sequence = 0
+
+    def login(self):
+        started = time.perf_counter()
+        response = self.http.post(f"{self.args.url}/login", json={
+            'username': self.username, 'password': self.args.password
+        })
+        self.stats.observe('login', time.perf_counter() - started)
+        if response.status_code != 200:
+            self.stats.count(f'login_{response.status_code}')
+            return False
+        body = response.json()
+        self.user_id = body['user']['id']
+        self.token = body['socket_token']
+        return True
+
+    def connect(self):
+        self.sio = socketio.Client(reconnection=False)
+        self.sio.on('new_message', self.on_message)
+        self.sio.on('message_pending_validation', lambda data: self.stats.count('pending'))
+        self.sio.on('message_rejected', lambda data: self.stats.count('rejected'))
+        self.sio.on('error', lambda data: self.stats.count('socket_errors'))
+        started = time.perf_counter()
+        self.sio.connect(self.args.url, auth={'token': self.token},
+                         transports=[self.args.transport], wait_timeout=10)
+        self.stats.observe('connect', time.perf_counter() - started)
+        self.sio.emit('user_connected', {})
+
+    def on_message(self, data):
+        content = data.get('content') or ''
+        tag = content.rsplit(' ', 1)[-1]
+        if tag.startswith(TAG_PREFIX):
+            self.stats.message_received(tag, own=data.get('from_id') == self.user_id)
+        self.stats.count('received')
+
+    def send(self):
+        self.sequence += 1
+        tag = f"{TAG_PREFIX}{self.index}x{self.sequence}"
+        words = ' '.join(self.rng.choice(WORDS) for _ in range(self.args.message_words))
+        payload = {'content': f"{words} {tag}"}
+        if self.args.students > 1 and self.rng.random() < self.args.private_ratio:
+            other = self.rng.randrange(self.args.students - 1)
+            payload['to_username'] = f"{self.args.prefix}{other + (other >= self.index)}"
+        self.stats.message_sent(tag)
+        self.sio.emit('send_message', payload)
+        self.stats.count('sent')
+
+    def run(self):
+        try:
+            if not self.login():
+                return
+            self.connect()
+        except Exception as e:
+            self.stats.count('connect_failures')
+            print(f" {self.username}: {e}")
+            return
+
+        next_history = time.monotonic() + self.rng.uniform(0, self.args.history_interval)
+        while not self.stop_event.wait(self.rng.expovariate(1 / self.args.message_interval)):
+            try:
+                self.send()
+                if time.monotonic() >= next_history:
+                    started = time.perf_counter()
+                    self.http.get(f"{self.args.url}/messages", params={'limit': 50})
+                    self.stats.observe('history', time.perf_counter() - started)
+                    next_history = time.monotonic() + self.args.history_interval
+                if self.rng.random() < self.args.reconnect_ratio:
+                    self.sio.disconnect()
+                    self.stats.count('reconnects')
+                    self.connect()
+            except Exception as e:
+                self.stats.count('errors')
+                print(f" {self.username}: {e}")
+        if self.sio is not None and self.sio.connected:
+            self.sio.disconnect()
+
+
+class Admin(threading.Thread):
+    """Admin: tableau de bord périodique, réservation et validation de la file"""
+
+    def __init__(self, args, stats, index, stop_event):
+        super().__init__(name=f'admin-{index}', daemon=True)
+        self.args = args
+        self.stats = stats
+        self.stop_event = stop_event
+        self.http = requests.Session()
+
+    def timed(self, name, method, path, **kwargs):
+        started = time.perf_counter()
+        response = self.http.request(method, f"{self.args.url}{path}", **kwargs)
+        self.stats.observe(name, time.perf_counter() - started)
+        if response.status_code >= 400:
+            self.stats.count(f'{name}_{response.status_code}')
+        return response
+
+    def run(self):
+        response = self.timed('admin_login', 'POST', '/admin/login', json={
+            'username': self.args.admin_username, 'password': self.args.admin_password
+        })
+        if response.status_code != 200:
+            return
+        while not self.stop_event.wait(self.args.admin_interval):
+            try:
+                self.timed('dashboard', 'GET', '/admin/dashboard')
+                claimed = self.timed('claim', 'POST', '/admin/moderation/claim', json={})
+                if claimed.status_code != 200:
+                    continue
+                for message in claimed.json().get('items', []):
+                    self.timed('validate', 'POST', '/admin/validate_message',
+                               json={'message_id': message['id']})
+                    self.stats.count('validated')
+            except Exception as e:
+                self.stats.count('errors')
+                print(f" admin: {e}")
+
+
+# ========================================
+# PRÉPARATION DES COMPTES
+# ========================================
+
+def setup_accounts(args):
+    """Inscrit, active et (en partie) approuve les comptes simulés"""
+    admin = requests.Session()
+    response = admin.post(f"{args.url}/admin/login", json={
+        'username': args.admin_username, 'password': args.admin_password
+    })
+    response.raise_for_status()
+    approved = int(args.students * args.approved_ratio)
+    for index in range(args.students):
+        username = f"{args.prefix}{index}"
+        response = admin.post(f"{args.url}/register", json={
+            'nom': 'Charge', 'prenom': f'Test{index}', 'pseudo': f"{args.prefix}_p{index}",
+            'username': username, 'password': args.password
+        })
+        if response.status_code not in (201, 409):
+            print(f" Inscription de {username}: {response.status_code} {response.text}")
+        admin.post(f"{args.url}/admin/activate", json={'username': username})
+        if index < approved:
+            admin.post(f"{args.url}/admin/approve", json={'username': username})
+    print(f"{args.students} comptes prêts ({approved} approuvés)")
+
+
+# ========================================
+# RAPPORT
+# ========================================
+
+def report(stats, elapsed):
+    with stats.lock:
+        samples = {name: list(values) for name, values in stats.samples.items()}
+        counters = dict(stats.counters)
+
+    print(f"\nDurée: {elapsed:.1f} s")
+    sent = counters.get('sent', 0)
+    received = counters.get('received', 0)
+    print(f"Messages: {sent} envoyés ({sent / elapsed:.1f}/s), {received} reçus "
+          f"({received / elapsed:.1f}/s), {counters.get('pending', 0)} en attente, "
+          f"{counters.get('rejected', 0)} rejetés, {counters.get('validated', 0)} validés")
+
+    print(f"\n  {'latence (ms)':<16}{'n':>8}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}")
+    for name in ('delivery', 'echo', 'login', 'connect', 'history',
+                 'admin_login', 'dashboard', 'claim', 'validate'):
+        values = samples.get(name)
+        if not values:
+            continue
+        print(f"  {name:<16}{len(values):>8}"
+              + ''.join(f"{percentile(values, p) * 1000:>10.1f}" for p in (50, 95, 99))
+              + f"{max(values) * 1000:>10.1f}")
+
+    others = {k: v for k, v in counters.items()
+              if k not in ('sent', 'received', 'pending', 'rejected', 'validated')}
+    if others:
+        print("\n" + ', '.join(f"{k}: {v}" for k, v in sorted(others.items())))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--url', default='http://127.0.0.1:5000')
+    parser.add_argument('--students', type=int, default=50)
+    parser.add_argument('--admins', type=int, default=1)
+    parser.add_argument('--duration', type=float, default=30.0, help="Durée de la mesure (s)")
+    parser.add_argument('--ramp-up', type=float, default=5.0, help="Étalement des connexions (s)")
+    parser.add_argument('--message-interval', type=float, default=5.0,
+                        help="Intervalle moyen (s) entre deux messages d'un étudiant")
+    parser.add_argument('--message-words', type=int, default=8)
+    parser.add_argument('--private-ratio', type=float, default=0.2)
+    parser.add_argument('--reconnect-ratio', type=float, default=0.02,
+                        help="Probabilité de reconnexion après chaque message")
+    parser.add_argument('--history-interval', type=float, default=30.0)
+    parser.add_argument('--admin-interval', type=float, default=2.0)
+    parser.add_argument('--transport', choices=('websocket', 'polling'), default='websocket')
+    parser.add_argument('--prefix', default='loadtest')
+    parser.add_argument('--password', default='password123')
+    parser.add_argument('--admin-username', default='admin')
+    parser.add_argument('--admin-password', default='admin123')
+    parser.add_argument('--setup', action='store_true',
+                        help="Inscrire, activer et approuver les comptes avant la mesure")
+    parser.add_argument('--approved-ratio', type=float, default=0.8)
+    parser.add_argument('--server-pid', type=int, help="Mesurer CPU et mémoire du serveur")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    if args.setup:
+        setup_accounts(args)
+
+    stats = Stats()
+    stop_event = threading.Event()
+    sampler = ResourceSampler(args.server_pid) if args.server_pid else None
+    if sampler:
+        sampler.start()
+
+    clients = [Student(args, stats, i, stop_event) for i in range(args.students)]
+    clients += [Admin(args, stats, i, stop_event) for i in range(args.admins)]
+    print(f"{args.students} étudiants, {args.admins} admins -> {args.url}")
+    delay = args.ramp_up / max(len(clients), 1)
+    for client in clients:
+        client.start()
+        time.sleep(delay)
+
+    started = time.perf_counter()
+    try:
+        time.sleep(args.duration)
+    except KeyboardInterrupt:
+        pass
+    stop_event.set()
+    elapsed = time.perf_counter() - started
+    for client in clients:
+        client.join(timeout=10)
+
+    report(stats, elapsed)
+    if sampler:
+        sampler.stop()
+        sampler.report()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,12 +1,175 @@
 """
 Database Manager pour Forum Chat
-Gestion de toutes les opérations sur la base de données MySQL
+Gestion de toutes les opérations sur la base de données
+(MySQL ou SQLite embarqué, voir storage.py)
 """
 
-import mysql.connector
-from mysql.connector import Error
 from datetime import datetime
 import configparser
+import logging
+import threading
+import time
+
+from pagination import like_prefix
+from query_profiler import QueryProfiler
+from storage import Error, backend_from_config, is_disconnect
+
+logger = logging.getLogger(__name__)
+
+# Sections disponibles pour get_dashboard()
+DASHBOARD_SECTIONS = ('stats', 'pending_accounts', 'unapproved_accounts',
+                      'pending_messages', 'users')
+
+# Colonnes comparées au préfixe de recherche des listes admin
+ACCOUNT_SEARCH_COLUMNS = ('pseudo', 'username', 'nom', 'prenom')
+MESSAGE_SEARCH_COLUMNS = ('e.pseudo', 'e.nom', 'e.prenom')
+
+# Message en attente modifiable par l'admin (paramètre): non réservé,
+# réservé par lui, ou réservation expirée
+LEASE_AVAILABLE = ("(id_moderateur IS NULL OR id_moderateur = %s "
+                   "OR date_fin_reservation <= NOW())")
+
+
+class LeaseConflict(Exception):
+    """Message réservé par un autre modérateur dont le bail court encore"""
+
+
+class MessageNotPending(Exception):
+    """Message inexistant ou déjà traité (validé, rejeté): rien n'a été modifié"""
+
+
+class ConnectionStatus:
+    """
+    Derniers succès et dernière perte de la connexion partagée du serveur,
+    relevés par les requêtes elles-mêmes (lu par le moniteur de santé, qui
+    ne peut pas utiliser cette connexion depuis son thread)
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.last_success = None
+        self.last_error = None
+        self.last_error_at = None
+        self.failures = 0
+
+    @property
+    def lost(self):
+        """La dernière erreur de connexion n'a été suivie d'aucun succès"""
+        last_success, last_error_at = self.last_success, self.last_error_at
+        return last_error_at is not None and (last_success is None or last_success < last_error_at)
+
+    def success(self):
+        self.last_success = time.monotonic()
+
+    def failure(self, error):
+        with self.lock:
+            self.failures += 1
+            self.last_error, self.last_error_at = str(error), time.monotonic()
+
+    def snapshot(self):
+        """
+        Returns:
+            dict: connected, âge (s) du dernier succès et de la dernière erreur, erreurs
+        """
+        now = time.monotonic()
+        with self.lock:
+            last_success, last_error, last_error_at = self.last_success, self.last_error, self.last_error_at
+            failures = self.failures
+        return {
+            'connected': not self.lost,
+            'last_success_s_ago': None if last_success is None else round(now - last_success, 1),
+            'last_error': last_error,
+            'last_error_s_ago': None if last_error_at is None else round(now - last_error_at, 1),
+            'failures': failures
+        }
+
+
+class MonitoredConnection:
+    """
+    Connexion dont chaque requête met à jour un ConnectionStatus; une
+    connexion perdue est rétablie (une tentative) au curseur suivant
+    """
+
+    def __init__(self, connection, status):
+        self._connection = connection
+        self._status = status
+
+    def cursor(self, *args, **kwargs):
+        if self._status.lost:
+            try:
+                self._connection.ping(reconnect=True, attempts=1, delay=0)
+                self._status.success()
+                logger.info("Connexion à la base rétablie")
+            except Error as e:
+                self._status.failure(e)
+        return MonitoredCursor(self._connection.cursor(*args, **kwargs), self._status)
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+class MonitoredCursor:
+    """Curseur qui signale au ConnectionStatus chaque succès et chaque perte de connexion"""
+
+    def __init__(self, cursor, status):
+        self._cursor = cursor
+        self._status = status
+
+    def _run(self, method, *args, **kwargs):
+        try:
+            result = method(*args, **kwargs)
+        except Error as e:
+            if is_disconnect(e):
+                self._status.failure(e)
+            raise
+        self._status.success()
+        return result
+
+    def execute(self, *args, **kwargs):
+        return self._run(self._cursor.execute, *args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        return self._run(self._cursor.executemany, *args, **kwargs)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+def _add_filters(conditions, params, date_column, search_columns,
+                 prefix=None, date_from=None, date_to=None):
+    """Ajoute les filtres communs (préfixe de nom, intervalle de dates)"""
+    if prefix:
+        pattern = like_prefix(prefix)
+        conditions.append(
+            '(' + ' OR '.join(f"{col} LIKE %s" for col in search_columns) + ')'
+        )
+        params.extend([pattern] * len(search_columns))
+    if date_from:
+        conditions.append(f"{date_column} >= %s")
+        params.append(date_from)
+    if date_to:
+        conditions.append(f"{date_column} < %s")
+        params.append(date_to)
+
+
+def _add_keyset_desc(conditions, params, date_column, id_column, after):
+    """Reprend après la clé (date, id) pour un tri décroissant"""
+    if after:
+        conditions.append(
+            f"({date_column} < %s OR ({date_column} = %s AND {id_column} < %s))"
+        )
+        params.extend([after[0], after[0], after[1]])
+
+
+def _limit_clause(limit, params):
+    """Clause LIMIT optionnelle"""
+    if limit is None:
+        return ""
+    params.append(int(limit))
+    return " LIMIT %s"
 
 class DatabaseManager:
     def __init__(self, config_file='config.ini'):
@@ -14,24 +177,72 @@ class DatabaseManager:
         config = configparser.ConfigParser()
         config.read(config_file)
         
+        # Callbacks notifiés après chaque écriture réussie
+        self.listeners = []
+        
+        # Moteur de stockage ([DATABASE] backend = mysql | sqlite)
+        self.backend = backend_from_config(config)
+        
+        # État de la connexion, relevé à chaque requête (/readyz)
+        self.connection_status = ConnectionStatus()
+        
         try:
-            self.connection = mysql.connector.connect(
-                host=config['DATABASE']['host'],
-                user=config['DATABASE']['user'],
-                password=config['DATABASE']['password'],
-                database=config['DATABASE']['database']
-            )
+            self.connection = MonitoredConnection(self.backend.connect(), self.connection_status)
             if self.connection.is_connected():
-                print("Connexion à MySQL réussie")
+                self.connection_status.success()
+                logger.info("Connexion à la base réussie (%s)", self.backend.dialect)
+            # Profilage des requêtes ([PROFILING] enabled = true)
+            self.profiler = QueryProfiler.shared(config, self.backend.connect)
+            if self.profiler is not None:
+                self.connection = self.profiler.wrap(self.connection)
         except Error as e:
-            print(f" Erreur de connexion à MySQL: {e}")
+            logger.error("Erreur de connexion à la base: %s", e)
             raise
     
     def __del__(self):
         """Ferme la connexion à la base de données"""
         if hasattr(self, 'connection') and self.connection.is_connected():
             self.connection.close()
-            print("Connexion MySQL fermée")
+            logger.debug("Connexion MySQL fermée")
+    
+    def ping(self):
+        """
+        Vérifie la connexion (une tentative de reconnexion si elle est perdue)
+        
+        Returns:
+            bool: True si MySQL répond
+        """
+        try:
+            self.connection.ping(reconnect=True, attempts=1, delay=0)
+            self.connection_status.success()
+            return True
+        except Error as e:
+            logger.warning("Ping MySQL échoué: %s", e)
+            self.connection_status.failure(e)
+            return False
+    
+    # ========================================
+    # NOTIFICATIONS D'ÉCRITURE
+    # ========================================
+    
+    def add_listener(self, callback):
+        """
+        Enregistre un callback appelé après chaque écriture réussie
+        
+        Args:
+            callback (callable): Fonction callback(event, data) où event est
+                le nom de l'opération ('user_added', 'message_validated'...)
+                et data un dict décrivant la ligne modifiée
+        """
+        self.listeners.append(callback)
+    
+    def _notify(self, event, **data):
+        """Transmet une écriture aux listeners (une erreur n'annule pas l'écriture)"""
+        for callback in self.listeners:
+            try:
+                callback(event, data)
+            except Exception as e:
+                logger.error("Erreur dans le listener %s: %s", event, e)
     
     # ========================================
     # GESTION DES ÉTUDIANTS
@@ -61,10 +272,18 @@ class DatabaseManager:
             cursor.execute(query, (nom, prenom, pseudo, username, password))
             self.connection.commit()
             user_id = cursor.lastrowid
-            print(f"Utilisateur {username} créé (ID: {user_id})")
+            logger.info("Utilisateur %s créé (ID: %s)", username, user_id)
+            self._notify('user_added', user={
+                'id': user_id,
+                'nom': nom,
+                'prenom': prenom,
+                'pseudo': pseudo,
+                'username': username,
+                'date_inscription': datetime.now()
+            })
             return user_id
         except Error as e:
-            print(f" Erreur lors de l'ajout de l'utilisateur: {e}")
+            logger.error("Erreur lors de l'ajout de l'utilisateur: %s", e)
             return None
         finally:
             cursor.close()
@@ -86,7 +305,7 @@ class DatabaseManager:
             user = cursor.fetchone()
             return user
         except Error as e:
-            print(f" Erreur lors de la récupération de l'utilisateur: {e}")
+            logger.error("Erreur lors de la récupération de l'utilisateur: %s", e)
             return None
         finally:
             cursor.close()
@@ -99,11 +318,34 @@ class DatabaseManager:
             cursor.execute(query, (user_id,))
             return cursor.fetchone()
         except Error as e:
-            print(f" Erreur: {e}")
+            logger.error("Erreur: %s", e)
             return None
         finally:
             cursor.close()
     
+    def update_password(self, user_id, password):
+        """
+        Remplace le hash du mot de passe d'un étudiant (re-hash au nouveau coût)
+        
+        Args:
+            user_id (int): ID de l'étudiant
+            password (str): Nouveau mot de passe hashé (bcrypt)
+            
+        Returns:
+            bool: True si succès
+        """
+        try:
+            cursor = self.connection.cursor()
+            query = "UPDATE etudiant SET password = %s WHERE id = %s"
+            cursor.execute(query, (password, user_id))
+            self.connection.commit()
+            return True
+        except Error as e:
+            logger.error("Erreur lors de la mise à jour du mot de passe: %s", e)
+            return False
+        finally:
+            cursor.close()
+    
     def activate_user(self, username):
         """
         Active un compte étudiant (compte_actif = TRUE)
@@ -118,13 +360,19 @@ class DatabaseManager:
         """
         try:
             cursor = self.connection.cursor()
-            query = "UPDATE etudiant SET compte_actif = TRUE WHERE username = %s"
+            query = """
+                UPDATE etudiant SET compte_actif = TRUE 
+                WHERE username = %s AND compte_actif = FALSE
+            """
             cursor.execute(query, (username,))
+            changed = cursor.rowcount > 0
             self.connection.commit()
-            print(f"Compte {username} activé")
+            logger.info("Compte %s activé", username)
+            if changed and self.listeners:
+                self._notify('user_activated', user=self.get_user_by_username(username))
             return True
         except Error as e:
-            print(f" Erreur lors de l'activation: {e}")
+            logger.error("Erreur lors de l'activation: %s", e)
             return False
         finally:
             cursor.close()
@@ -143,68 +391,87 @@ class DatabaseManager:
         """
         try:
             cursor = self.connection.cursor()
-            query = "UPDATE etudiant SET compte_approuve = TRUE WHERE username = %s"
+            query = """
+                UPDATE etudiant SET compte_approuve = TRUE 
+                WHERE username = %s AND compte_approuve = FALSE
+            """
             cursor.execute(query, (username,))
+            changed = cursor.rowcount > 0
             self.connection.commit()
-            print(f"Compte {username} approuvé définitivement")
+            logger.info("Compte %s approuvé définitivement", username)
+            if changed:
+                self._notify('user_approved', username=username)
             return True
         except Error as e:
-            print(f" Erreur lors de l'approbation: {e}")
+            logger.error("Erreur lors de l'approbation: %s", e)
             return False
         finally:
             cursor.close()
     
-    def get_inactive_accounts(self):
-        """Récupère tous les comptes inactifs en attente d'activation"""
+    def get_inactive_accounts(self, limit=None, after=None, prefix=None,
+                              date_from=None, date_to=None):
+        """
+        Récupère les comptes inactifs en attente d'activation
+        (plus récents d'abord, pagination par clé)
+        
+        Args:
+            limit (int): Nombre maximum de lignes (None = toutes)
+            after (tuple): Clé (date_inscription, id) de la dernière ligne lue
+            prefix (str): Préfixe de nom, prénom, pseudo ou username
+            date_from (datetime): Inscription à partir de cette date
+            date_to (datetime): Inscription avant cette date
+        """
         try:
             cursor = self.connection.cursor(dictionary=True)
-            query = """
-                SELECT id, nom, prenom, pseudo, username, date_inscription 
-                FROM etudiant 
-                WHERE compte_actif = FALSE 
-                ORDER BY date_inscription DESC
-            """
-            cursor.execute(query)
-            return cursor.fetchall()
+            return self._fetch_inactive_accounts(
+                cursor, limit, after, prefix=prefix,
+                date_from=date_from, date_to=date_to
+            )
         except Error as e:
-            print(f" Erreur: {e}")
+            logger.error("Erreur: %s", e)
             return []
         finally:
             cursor.close()
     
-    def get_active_not_approved_accounts(self):
-        """Récupère les comptes actifs mais non approuvés"""
+    def get_active_not_approved_accounts(self, limit=None, after=None, prefix=None,
+                                         date_from=None, date_to=None):
+        """
+        Récupère les comptes actifs mais non approuvés
+        (mêmes paramètres que get_inactive_accounts)
+        """
         try:
             cursor = self.connection.cursor(dictionary=True)
-            query = """
-                SELECT id, nom, prenom, pseudo, username, date_inscription 
-                FROM etudiant 
-                WHERE compte_actif = TRUE AND compte_approuve = FALSE 
-                ORDER BY date_inscription DESC
-            """
-            cursor.execute(query)
-            return cursor.fetchall()
+            return self._fetch_active_not_approved_accounts(
+                cursor, limit, after, prefix=prefix,
+                date_from=date_from, date_to=date_to
+            )
         except Error as e:
-            print(f" Erreur: {e}")
+            logger.error("Erreur: %s", e)
             return []
         finally:
             cursor.close()
     
-    def get_all_active_users(self):
-        """Récupère tous les utilisateurs actifs avec leur statut"""
+    def get_all_active_users(self, limit=None, after=None, prefix=None,
+                             approved=None, date_from=None, date_to=None):
+        """
+        Récupère les utilisateurs actifs avec leur statut (triés par pseudo)
+        
+        Args:
+            limit (int): Nombre maximum de lignes (None = toutes)
+            after (tuple): Clé (pseudo,) de la dernière ligne lue
+            prefix (str): Préfixe de nom, prénom, pseudo ou username
+            approved (bool): Filtrer sur compte_approuve (None = tous)
+            date_from (datetime): Inscription à partir de cette date
+            date_to (datetime): Inscription avant cette date
+        """
         try:
             cursor = self.connection.cursor(dictionary=True)
-            query = """
-                SELECT id, nom, prenom, pseudo, username, 
-                       compte_actif, compte_approuve, date_inscription 
-                FROM etudiant 
-                WHERE compte_actif = TRUE 
-                ORDER BY pseudo ASC
-            """
-            cursor.execute(query)
-            return cursor.fetchall()
+            return self._fetch_all_active_users(
+                cursor, limit, after, prefix=prefix, approved=approved,
+                date_from=date_from, date_to=date_to
+            )
         except Error as e:
-            print(f" Erreur: {e}")
+            logger.error("Erreur: %s", e)
             return []
         finally:
             cursor.close()
@@ -246,9 +513,21 @@ class DatabaseManager:
             ))
             self.connection.commit()
             message_id = cursor.lastrowid
+            self._notify('message_added', message={
+                'id': message_id,
+                'id_expediteur': id_expediteur,
+                'pseudo_expediteur': pseudo_expediteur,
+                'expediteur_pseudo': pseudo_expediteur,
+                'id_destinataire': id_destinataire,
+                'pseudo_destinataire': pseudo_destinataire,
+                'contenu': contenu,
+                'est_prive': bool(est_prive),
+                'valide': bool(auto_validate),
+                'date_envoi': datetime.now()
+            })
             return message_id
         except Error as e:
-            print(f" Erreur lors de l'ajout du message: {e}")
+            logger.error("Erreur lors de l'ajout du message: %s", e)
             return None
         finally:
             cursor.close()
@@ -263,40 +542,216 @@ class DatabaseManager:
             
         Returns:
             bool: True si succès
+            
+        Raises:
+            LeaseConflict: Message réservé par un autre admin
+            MessageNotPending: Message introuvable ou déjà traité
         """
         try:
             cursor = self.connection.cursor()
-            query = """
+            query = f"""
                 UPDATE message 
                 SET valide = TRUE, 
                     date_validation = NOW(), 
-                    id_validateur = %s 
-                WHERE id = %s
+                    id_validateur = %s,
+                    id_moderateur = NULL,
+                    date_fin_reservation = NULL 
+                WHERE id = %s AND valide = FALSE AND rejete = FALSE AND {LEASE_AVAILABLE}
             """
-            cursor.execute(query, (admin_id, message_id))
+            cursor.execute(query, (admin_id, message_id, admin_id))
+            changed = cursor.rowcount > 0
             self.connection.commit()
-            print(f"Message {message_id} validé")
+            if not changed:
+                self._check_lease(cursor, message_id, admin_id)
+                raise MessageNotPending(f"Message {message_id} introuvable ou déjà traité")
+            logger.info("Message %s validé", message_id)
+            self._notify('message_validated', message_id=message_id, admin_id=admin_id)
             return True
         except Error as e:
-            print(f" Erreur lors de la validation: {e}")
+            logger.error("Erreur lors de la validation: %s", e)
             return False
         finally:
             cursor.close()
     
-    def reject_message(self, message_id):
-        """Supprime un message (rejet par admin)"""
+    def reject_message(self, message_id, admin_id=None):
+        """
+        Rejette un message: il est marqué comme rejeté (rejete = TRUE) et
+        disparaît de toutes les lectures; la ligne est supprimée plus tard
+        par purge_rejected_messages() (trace gardée pour l'audit)
+        
+        Raises:
+            LeaseConflict: Message en attente réservé par un autre admin
+            MessageNotPending: Message introuvable ou déjà rejeté
+        """
         try:
             cursor = self.connection.cursor()
-            query = "DELETE FROM message WHERE id = %s"
-            cursor.execute(query, (message_id,))
+            # Lire le statut avant le rejet pour ajuster les compteurs
+            cursor.execute("SELECT valide FROM message WHERE id = %s", (message_id,))
+            row = cursor.fetchone()
+            query = f"""
+                UPDATE message 
+                SET rejete = TRUE, 
+                    date_rejet = NOW(), 
+                    id_rejeteur = %s,
+                    id_moderateur = NULL,
+                    date_fin_reservation = NULL 
+                WHERE id = %s AND rejete = FALSE AND (valide = TRUE OR {LEASE_AVAILABLE})
+            """
+            cursor.execute(query, (admin_id, message_id, admin_id))
+            changed = cursor.rowcount > 0
             self.connection.commit()
+            if not changed:
+                self._check_lease(cursor, message_id, admin_id)
+                raise MessageNotPending(f"Message {message_id} introuvable ou déjà rejeté")
+            self._notify('message_rejected', message_id=message_id,
+                         was_valid=bool(row and row[0]))
             return True
         except Error as e:
-            print(f" Erreur: {e}")
+            logger.error("Erreur: %s", e)
             return False
         finally:
             cursor.close()
     
+    def purge_rejected_messages(self, retention_seconds, batch_size=5000):
+        """
+        Supprime définitivement un lot de messages rejetés depuis plus de
+        retention_seconds (index idx_rejete_date, une transaction par lot)
+        
+        Returns:
+            int: Nombre de lignes supprimées (0 quand il n'y a plus rien à purger)
+        """
+        try:
+            cursor = self.connection.cursor()
+            query = """
+                DELETE FROM message 
+                WHERE rejete = TRUE AND date_rejet < NOW() - INTERVAL %s SECOND 
+                ORDER BY date_rejet 
+                LIMIT %s
+            """
+            cursor.execute(query, (int(retention_seconds), int(batch_size)))
+            deleted = cursor.rowcount
+            self.connection.commit()
+            return deleted
+        except Error as e:
+            logger.error("Erreur lors de la purge des messages rejetés: %s", e)
+            self.connection.rollback()
+            return 0
+        finally:
+            cursor.close()
+    
+    def _check_lease(self, cursor, message_id, admin_id):
+        """Lève LeaseConflict si un autre admin détient un bail actif sur le message"""
+        cursor.execute("""
+            SELECT id_moderateur FROM message 
+            WHERE id = %s AND valide = FALSE AND rejete = FALSE 
+              AND NOT (id_moderateur <=> %s) AND date_fin_reservation > NOW()
+        """, (message_id, admin_id))
+        row = cursor.fetchone()
+        if row:
+            raise LeaseConflict(f"Message {message_id} réservé par l'admin {row[0]}")
+    
+    def claim_messages(self, admin_id, batch_size=10, lease_seconds=120):
+        """
+        Réserve pour un admin un lot de messages en attente (les plus anciens)
+        
+        Les lignes verrouillées par la réservation concurrente d'un autre
+        admin sont sautées (SKIP LOCKED): chaque modérateur obtient un lot
+        distinct sans attendre les autres. Les messages déjà réservés par
+        cet admin sont inclus et leur bail est prolongé.
+        
+        Args:
+            admin_id (int): Admin qui réserve
+            batch_size (int): Nombre maximum de messages
+            lease_seconds (int): Durée du bail
+            
+        Returns:
+            list: Messages réservés (mêmes champs que get_pending_messages)
+        """
+        cursor = None
+        try:
+            if self.connection.in_transaction:
+                self.connection.commit()
+            self.connection.start_transaction(isolation_level='READ COMMITTED')
+            cursor = self.connection.cursor(dictionary=True)
+            cursor.execute(f"""
+                SELECT id FROM message 
+                WHERE valide = FALSE AND rejete = FALSE AND {LEASE_AVAILABLE} 
+                ORDER BY date_envoi ASC, id ASC 
+                LIMIT %s 
+                FOR UPDATE SKIP LOCKED
+            """, (admin_id, int(batch_size)))
+            ids = [row['id'] for row in cursor.fetchall()]
+            if not ids:
+                self.connection.commit()
+                return []
+            placeholders = ', '.join(['%s'] * len(ids))
+            cursor.execute(f"""
+                UPDATE message 
+                SET id_moderateur = %s, 
+                    date_fin_reservation = NOW() + INTERVAL %s SECOND 
+                WHERE id IN ({placeholders})
+            """, [admin_id, int(lease_seconds)] + ids)
+            cursor.execute(f"""
+                SELECT m.*, e.pseudo as expediteur_pseudo, e.nom, e.prenom 
+                FROM message m 
+                JOIN etudiant e ON m.id_expediteur = e.id 
+                WHERE m.id IN ({placeholders}) 
+                ORDER BY m.date_envoi ASC, m.id ASC
+            """, ids)
+            messages = cursor.fetchall()
+            self.connection.commit()
+            if messages:
+                self._notify('messages_claimed', admin_id=admin_id, message_ids=ids,
+                             lease_until=messages[0]['date_fin_reservation'])
+            return messages
+        except Error as e:
+            logger.error("Erreur lors de la réservation des messages: %s", e)
+            self.connection.rollback()
+            return None
+        finally:
+            if cursor is not None:
+                cursor.close()
+    
+    def release_messages(self, admin_id, message_ids=None):
+        """
+        Libère les messages réservés par un admin
+        
+        Args:
+            admin_id (int): Admin qui libère
+            message_ids (list): Messages à libérer (None = toutes ses réservations)
+            
+        Returns:
+            list: IDs libérés, ou None si erreur
+        """
+        try:
+            cursor = self.connection.cursor()
+            conditions = ["id_moderateur = %s", "valide = FALSE", "rejete = FALSE"]
+            params = [admin_id]
+            if message_ids is not None:
+                if not message_ids:
+                    return []
+                conditions.append(f"id IN ({', '.join(['%s'] * len(message_ids))})")
+                params.extend(message_ids)
+            where = ' AND '.join(conditions)
+            cursor.execute(f"SELECT id FROM message WHERE {where} FOR UPDATE", params)
+            ids = [row[0] for row in cursor.fetchall()]
+            if ids:
+                cursor.execute(f"""
+                    UPDATE message 
+                    SET id_moderateur = NULL, date_fin_reservation = NULL 
+                    WHERE {where}
+                """, params)
+            self.connection.commit()
+            if ids:
+                self._notify('messages_released', admin_id=admin_id, message_ids=ids)
+            return ids
+        except Error as e:
+            logger.error("Erreur lors de la libération des messages: %s", e)
+            self.connection.rollback()
+            return None
+        finally:
+            cursor.close()
+    
     def get_messages(self, limit=100):
         """Récupère tous les messages validés (publics et privés)"""
         try:
@@ -305,33 +760,40 @@ class DatabaseManager:
                 SELECT m.*, e.pseudo as expediteur_pseudo 
                 FROM message m 
                 JOIN etudiant e ON m.id_expediteur = e.id 
-                WHERE m.valide = TRUE 
+                WHERE m.valide = TRUE AND m.rejete = FALSE 
                 ORDER BY m.date_envoi DESC 
                 LIMIT %s
             """
             cursor.execute(query, (limit,))
             return cursor.fetchall()
         except Error as e:
-            print(f" Erreur: {e}")
+            logger.error("Erreur: %s", e)
             return []
         finally:
             cursor.close()
     
-    def get_pending_messages(self):
-        """Récupère tous les messages en attente de validation"""
+    def get_pending_messages(self, limit=None, after=None, prefix=None,
+                             private=None, date_from=None, date_to=None):
+        """
+        Récupère les messages en attente de validation
+        (plus récents d'abord, pagination par clé)
+        
+        Args:
+            limit (int): Nombre maximum de lignes (None = toutes)
+            after (tuple): Clé (date_envoi, id) de la dernière ligne lue
+            prefix (str): Préfixe du pseudo, nom ou prénom de l'expéditeur
+            private (bool): Filtrer sur est_prive (None = tous)
+            date_from (datetime): Envoyés à partir de cette date
+            date_to (datetime): Envoyés avant cette date
+        """
         try:
             cursor = self.connection.cursor(dictionary=True)
-            query = """
-                SELECT m.*, e.pseudo as expediteur_pseudo, e.nom, e.prenom 
-                FROM message m 
-                JOIN etudiant e ON m.id_expediteur = e.id 
-                WHERE m.valide = FALSE 
-                ORDER BY m.date_envoi DESC
-            """
-            cursor.execute(query)
-            return cursor.fetchall()
+            return self._fetch_pending_messages(
+                cursor, limit, after, prefix=prefix, private=private,
+                date_from=date_from, date_to=date_to
+            )
         except Error as e:
-            print(f" Erreur: {e}")
+            logger.error("Erreur: %s", e)
             return []
         finally:
             cursor.close()
@@ -344,16 +806,164 @@ class DatabaseManager:
                 SELECT m.*, e.pseudo as expediteur_pseudo 
                 FROM message m 
                 JOIN etudiant e ON m.id_expediteur = e.id 
-                WHERE m.id = %s
+                WHERE m.id = %s AND m.rejete = FALSE
             """
             cursor.execute(query, (message_id,))
             return cursor.fetchone()
         except Error as e:
-            print(f" Erreur: {e}")
+            logger.error("Erreur: %s", e)
             return None
         finally:
             cursor.close()
     
+    # ========================================
+    # RECHERCHE DANS LES MESSAGES
+    # ========================================
+    
+    def has_fulltext_index(self):
+        """Vérifie la présence d'un index FULLTEXT sur message.contenu"""
+        if not self.backend.supports_fulltext:
+            return False
+        try:
+            cursor = self.connection.cursor()
+            query = """
+                SELECT COUNT(*) FROM information_schema.statistics 
+                WHERE table_schema = DATABASE() AND table_name = 'message' 
+                  AND column_name = 'contenu' AND index_type = 'FULLTEXT'
+            """
+            cursor.execute(query)
+            return cursor.fetchone()[0] > 0
+        except Error as e:
+            logger.error("Erreur: %s", e)
+            return False
+        finally:
+            cursor.close()
+    
+    def search_messages(self, text, viewer_id=None, limit=20, after=None):
+        """
+        Recherche plein texte (index FULLTEXT) dans les messages validés
+        
+        Args:
+            text (str): Texte recherché (mode langage naturel)
+            viewer_id (int): Étudiant connecté (voit ses messages privés)
+            limit (int): Nombre maximum de résultats
+            after (tuple): Clé (score, id) du dernier résultat lu
+            
+        Returns:
+            list: Messages avec leur score de pertinence, du plus pertinent
+        """
+        params = [text, text]
+        visibility = "m.est_prive = FALSE"
+        if viewer_id is not None:
+            visibility = "(m.est_prive = FALSE OR m.id_expediteur = %s OR m.id_destinataire = %s)"
+            params.extend([viewer_id, viewer_id])
+        having = ""
+        if after:
+            having = "HAVING (score < %s OR (score = %s AND m.id < %s))"
+            params.extend([after[0], after[0], after[1]])
+        query = f"""
+            SELECT m.*, e.pseudo as expediteur_pseudo, 
+                   MATCH(m.contenu) AGAINST (%s IN NATURAL LANGUAGE MODE) AS score 
+            FROM message m 
+            JOIN etudiant e ON m.id_expediteur = e.id 
+            WHERE MATCH(m.contenu) AGAINST (%s IN NATURAL LANGUAGE MODE) 
+              AND m.valide = TRUE AND m.rejete = FALSE AND {visibility} 
+            {having} 
+            ORDER BY score DESC, m.id DESC
+        """
+        try:
+            cursor = self.connection.cursor(dictionary=True)
+            cursor.execute(query + _limit_clause(limit, params), params)
+            return cursor.fetchall()
+        except Error as e:
+            logger.error("Erreur lors de la recherche: %s", e)
+            return []
+        finally:
+            cursor.close()
+    
+    def iter_indexable_messages(self, batch_size=5000):
+        """
+        Parcourt par lots tous les messages (validés et en attente)
+        pour construire l'index de recherche en mémoire
+        
+        Yields:
+            list: Lots de messages (id, contenu, valide, est_prive, expéditeur, destinataire)
+        """
+        last_id = 0
+        while True:
+            try:
+                cursor = self.connection.cursor(dictionary=True)
+                query = """
+                    SELECT id, contenu, valide, est_prive, id_expediteur, id_destinataire 
+                    FROM message 
+                    WHERE id > %s AND rejete = FALSE 
+                    ORDER BY id 
+                    LIMIT %s
+                """
+                cursor.execute(query, (last_id, batch_size))
+                rows = cursor.fetchall()
+            except Error as e:
+                logger.error("Erreur: %s", e)
+                return
+            finally:
+                cursor.close()
+            if not rows:
+                return
+            yield rows
+            last_id = rows[-1]['id']
+
+    def iter_user_identifiers(self, batch_size=5000):
+        """
+        Parcourt par lots les identifiants de tous les étudiants
+        pour construire les index en mémoire
+
+        Yields:
+            list: Lots d'étudiants (id, username, pseudo, compte_actif)
+        """
+        last_id = 0
+        while True:
+            try:
+                cursor = self.connection.cursor(dictionary=True)
+                query = """
+                    SELECT id, username, pseudo, compte_actif
+                    FROM etudiant
+                    WHERE id > %s
+                    ORDER BY id
+                    LIMIT %s
+                """
+                cursor.execute(query, (last_id, batch_size))
+                rows = cursor.fetchall()
+            except Error as e:
+                logger.error("Erreur: %s", e)
+                return
+            finally:
+                cursor.close()
+            if not rows:
+                return
+            yield rows
+            last_id = rows[-1]['id']
+
+    def get_messages_by_ids(self, message_ids):
+        """Récupère plusieurs messages par leurs IDs (ordre non garanti)"""
+        if not message_ids:
+            return []
+        try:
+            cursor = self.connection.cursor(dictionary=True)
+            placeholders = ', '.join(['%s'] * len(message_ids))
+            query = f"""
+                SELECT m.*, e.pseudo as expediteur_pseudo 
+                FROM message m 
+                JOIN etudiant e ON m.id_expediteur = e.id 
+                WHERE m.id IN ({placeholders}) AND m.rejete = FALSE
+            """
+            cursor.execute(query, tuple(message_ids))
+            return cursor.fetchall()
+        except Error as e:
+            logger.error("Erreur: %s", e)
+            return []
+        finally:
+            cursor.close()
+    
     # ========================================
     # HISTORIQUE DES CONNEXIONS
     # ========================================
@@ -385,34 +995,188 @@ class DatabaseManager:
                 ip_address, user_agent, session_id
             ))
             self.connection.commit()
-            print(f"{action} enregistré pour {username}")
+            logger.debug("%s enregistré pour %s", action, username)
         except Error as e:
-            print(f" Erreur lors de l'enregistrement du log: {e}")
+            logger.error("Erreur lors de l'enregistrement du log: %s", e)
         finally:
             cursor.close()
     
     def get_login_history(self, username=None, limit=50):
         """Récupère l'historique des connexions"""
+        return self.search_login_history(limit=limit, username=username)
+    
+    def search_login_history(self, limit=50, after=None, username=None,
+                             action=None, ip_address=None, session_id=None,
+                             date_from=None, date_to=None):
+        """
+        Recherche dans l'historique des connexions (plus récents d'abord)
+        
+        Chaque critère d'égalité est couvert par un index composite
+        (critère, date_action): le tri et la pagination restent dans l'index.
+        
+        Args:
+            limit (int): Nombre maximum de lignes
+            after (tuple): Clé (date_action, id) de la dernière ligne lue
+            username (str): Username exact
+            action (str): 'LOGIN' ou 'LOGOUT'
+            ip_address (str): Adresse IP exacte
+            session_id (str): ID de session exact
+            date_from (datetime): Actions à partir de cette date
+            date_to (datetime): Actions avant cette date
+            
+        Returns:
+            list: Lignes de historique_login
+        """
+        conditions = []
+        params = []
+        for column, value in (('username', username), ('action', action),
+                              ('ip_address', ip_address), ('session_id', session_id)):
+            if value:
+                conditions.append(f"{column} = %s")
+                params.append(value)
+        if date_from:
+            conditions.append("date_action >= %s")
+            params.append(date_from)
+        if date_to:
+            conditions.append("date_action < %s")
+            params.append(date_to)
+        _add_keyset_desc(conditions, params, 'date_action', 'id', after)
+        
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        query = f"""
+            SELECT * FROM historique_login 
+            {where} 
+            ORDER BY date_action DESC, id DESC
+        """
         try:
             cursor = self.connection.cursor(dictionary=True)
-            if username:
-                query = """
-                    SELECT * FROM historique_login 
-                    WHERE username = %s 
-                    ORDER BY date_action DESC 
-                    LIMIT %s
-                """
-                cursor.execute(query, (username, limit))
-            else:
-                query = """
-                    SELECT * FROM historique_login 
-                    ORDER BY date_action DESC 
-                    LIMIT %s
-                """
-                cursor.execute(query, (limit,))
+            cursor.execute(query + _limit_clause(limit, params), params)
             return cursor.fetchall()
         except Error as e:
-            print(f" Erreur: {e}")
+            logger.error("Erreur: %s", e)
+            return []
+        finally:
+            cursor.close()
+    
+    # ========================================
+    # SESSIONS
+    # ========================================
+    
+    def create_session(self, record):
+        """
+        Enregistre une session (voir SessionStore.create)
+        
+        Returns:
+            bool: True si succès
+        """
+        try:
+            cursor = self.connection.cursor()
+            query = """
+                INSERT INTO session 
+                (session_id, id_etudiant, username, pseudo, ip_address, user_agent, 
+                 date_creation, date_derniere_activite, date_expiration) 
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+            """
+            cursor.execute(query, (
+                record['session_id'], record['id_etudiant'], record['username'],
+                record['pseudo'], record['ip_address'], record['user_agent'],
+                record['date_creation'], record['date_derniere_activite'],
+                record['date_expiration']
+            ))
+            self.connection.commit()
+            return True
+        except Error as e:
+            logger.error("Erreur lors de la création de la session: %s", e)
+            return False
+        finally:
+            cursor.close()
+    
+    def get_session(self, session_id):
+        """Récupère une session par son ID"""
+        try:
+            cursor = self.connection.cursor(dictionary=True)
+            query = "SELECT * FROM session WHERE session_id = %s"
+            cursor.execute(query, (session_id,))
+            return cursor.fetchone()
+        except Error as e:
+            logger.error("Erreur: %s", e)
+            return None
+        finally:
+            cursor.close()
+    
+    def delete_session(self, session_id):
+        """Supprime une session (logout, révocation)"""
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute("DELETE FROM session WHERE session_id = %s", (session_id,))
+            self.connection.commit()
+            return cursor.rowcount > 0
+        except Error as e:
+            logger.error("Erreur: %s", e)
+            return False
+        finally:
+            cursor.close()
+    
+    def touch_sessions(self, updates):
+        """
+        Met à jour la dernière activité de plusieurs sessions en un lot
+        
+        Args:
+            updates (list): [(date_derniere_activite, date_expiration, session_id), ...]
+        """
+        try:
+            cursor = self.connection.cursor()
+            query = """
+                UPDATE session 
+                SET date_derniere_activite = %s, date_expiration = %s 
+                WHERE session_id = %s
+            """
+            cursor.executemany(query, updates)
+            self.connection.commit()
+        except Error as e:
+            logger.error("Erreur lors de la mise à jour des sessions: %s", e)
+        finally:
+            cursor.close()
+    
+    def delete_expired_sessions(self, batch_size=1000):
+        """
+        Supprime les sessions expirées par lots (verrous courts)
+        
+        Returns:
+            int: Nombre de sessions supprimées
+        """
+        removed = 0
+        try:
+            cursor = self.connection.cursor()
+            query = "DELETE FROM session WHERE date_expiration < NOW() LIMIT %s"
+            while True:
+                cursor.execute(query, (batch_size,))
+                self.connection.commit()
+                removed += cursor.rowcount
+                if cursor.rowcount < batch_size:
+                    return removed
+        except Error as e:
+            logger.error("Erreur lors de la purge des sessions: %s", e)
+            return removed
+        finally:
+            cursor.close()
+    
+    def get_active_sessions(self, limit=100):
+        """Récupère les sessions non expirées (plus récemment actives d'abord)"""
+        try:
+            cursor = self.connection.cursor(dictionary=True)
+            query = """
+                SELECT session_id, id_etudiant, username, pseudo, ip_address, 
+                       user_agent, date_creation, date_derniere_activite, date_expiration 
+                FROM session 
+                WHERE date_expiration > NOW() 
+                ORDER BY date_derniere_activite DESC 
+                LIMIT %s
+            """
+            cursor.execute(query, (limit,))
+            return cursor.fetchall()
+        except Error as e:
+            logger.error("Erreur: %s", e)
             return []
         finally:
             cursor.close()
@@ -429,11 +1193,25 @@ class DatabaseManager:
             cursor.execute(query, (username,))
             return cursor.fetchone()
         except Error as e:
-            print(f" Erreur: {e}")
+            logger.error("Erreur: %s", e)
             return None
         finally:
             cursor.close()
     
+    def update_admin_password(self, admin_id, password):
+        """Remplace le hash du mot de passe d'un administrateur"""
+        try:
+            cursor = self.connection.cursor()
+            query = "UPDATE administrateur SET password = %s WHERE id = %s"
+            cursor.execute(query, (password, admin_id))
+            self.connection.commit()
+            return True
+        except Error as e:
+            logger.error("Erreur: %s", e)
+            return False
+        finally:
+            cursor.close()
+    
     # ========================================
     # STATISTIQUES
     # ========================================
@@ -442,37 +1220,165 @@ class DatabaseManager:
         """Récupère des statistiques globales"""
         try:
             cursor = self.connection.cursor(dictionary=True)
-            
-            stats = {}
-            
-            # Nombre total d'étudiants
-            cursor.execute("SELECT COUNT(*) as total FROM etudiant")
-            stats['total_users'] = cursor.fetchone()['total']
-            
-            # Comptes actifs
-            cursor.execute("SELECT COUNT(*) as total FROM etudiant WHERE compte_actif = TRUE")
-            stats['active_users'] = cursor.fetchone()['total']
-            
-            # Comptes approuvés
-            cursor.execute("SELECT COUNT(*) as total FROM etudiant WHERE compte_approuve = TRUE")
-            stats['approved_users'] = cursor.fetchone()['total']
-            
-            # Messages totaux
-            cursor.execute("SELECT COUNT(*) as total FROM message")
-            stats['total_messages'] = cursor.fetchone()['total']
-            
-            # Messages validés
-            cursor.execute("SELECT COUNT(*) as total FROM message WHERE valide = TRUE")
-            stats['validated_messages'] = cursor.fetchone()['total']
-            
-            # Messages en attente
-            cursor.execute("SELECT COUNT(*) as total FROM message WHERE valide = FALSE")
-            stats['pending_messages'] = cursor.fetchone()['total']
-            
-            return stats
+            return self._fetch_stats(cursor)
         except Error as e:
-            print(f" Erreur: {e}")
+            logger.error("Erreur: %s", e)
             return {}
         finally:
             cursor.close()
-
+    
+    # ========================================
+    # TABLEAU DE BORD ADMIN
+    # ========================================
+    
+    def get_dashboard(self, sections=None, limit=None):
+        """
+        Récupère en une seule transaction de lecture toutes les données
+        du tableau de bord admin (instantané cohérent)
+        
+        Args:
+            sections (iterable): Sections à inclure parmi DASHBOARD_SECTIONS
+                (toutes si None)
+            limit (int): Nombre maximum de lignes par liste (None = toutes)
+            
+        Returns:
+            dict: {section: données}, ou None si erreur
+        """
+        if sections is None:
+            sections = DASHBOARD_SECTIONS
+        fetchers = {
+            'stats': self._fetch_stats,
+            'pending_accounts': self._fetch_inactive_accounts,
+            'unapproved_accounts': self._fetch_active_not_approved_accounts,
+            'pending_messages': self._fetch_pending_messages,
+            'users': self._fetch_all_active_users
+        }
+        cursor = None
+        try:
+            # Terminer la transaction implicite ouverte par les lectures précédentes
+            if self.connection.in_transaction:
+                self.connection.commit()
+            self.connection.start_transaction(
+                consistent_snapshot=True,
+                isolation_level='REPEATABLE READ',
+                readonly=True
+            )
+            cursor = self.connection.cursor(dictionary=True)
+            dashboard = {}
+            for section in sections:
+                if section == 'stats':
+                    dashboard[section] = fetchers[section](cursor)
+                else:
+                    dashboard[section] = fetchers[section](cursor, limit)
+            self.connection.commit()
+            return dashboard
+        except Error as e:
+            logger.error("Erreur lors de la lecture du tableau de bord: %s", e)
+            if self.connection.in_transaction:
+                self.connection.rollback()
+            return None
+        finally:
+            if cursor:
+                cursor.close()
+    
+    # ========================================
+    # REQUÊTES DE LECTURE (curseur fourni)
+    # ========================================
+    
+    def _fetch_inactive_accounts(self, cursor, limit=None, after=None, **filters):
+        conditions = ["compte_actif = FALSE"]
+        params = []
+        _add_filters(conditions, params, 'date_inscription', ACCOUNT_SEARCH_COLUMNS, **filters)
+        _add_keyset_desc(conditions, params, 'date_inscription', 'id', after)
+        query = f"""
+            SELECT id, nom, prenom, pseudo, username, date_inscription 
+            FROM etudiant 
+            WHERE {' AND '.join(conditions)} 
+            ORDER BY date_inscription DESC, id DESC
+        """
+        cursor.execute(query + _limit_clause(limit, params), params)
+        return cursor.fetchall()
+    
+    def _fetch_active_not_approved_accounts(self, cursor, limit=None, after=None, **filters):
+        conditions = ["compte_actif = TRUE", "compte_approuve = FALSE"]
+        params = []
+        _add_filters(conditions, params, 'date_inscription', ACCOUNT_SEARCH_COLUMNS, **filters)
+        _add_keyset_desc(conditions, params, 'date_inscription', 'id', after)
+        query = f"""
+            SELECT id, nom, prenom, pseudo, username, date_inscription 
+            FROM etudiant 
+            WHERE {' AND '.join(conditions)} 
+            ORDER BY date_inscription DESC, id DESC
+        """
+        cursor.execute(query + _limit_clause(limit, params), params)
+        return cursor.fetchall()
+    
+    def _fetch_all_active_users(self, cursor, limit=None, after=None,
+                                approved=None, **filters):
+        conditions = ["compte_actif = TRUE"]
+        params = []
+        if approved is not None:
+            conditions.append("compte_approuve = %s")
+            params.append(bool(approved))
+        _add_filters(conditions, params, 'date_inscription', ACCOUNT_SEARCH_COLUMNS, **filters)
+        if after:
+            # pseudo est unique: il suffit comme clé de pagination
+            conditions.append("pseudo > %s")
+            params.append(after[0])
+        query = f"""
+            SELECT id, nom, prenom, pseudo, username, 
+                   compte_actif, compte_approuve, date_inscription 
+            FROM etudiant 
+            WHERE {' AND '.join(conditions)} 
+            ORDER BY pseudo ASC
+        """
+        cursor.execute(query + _limit_clause(limit, params), params)
+        return cursor.fetchall()
+    
+    def _fetch_pending_messages(self, cursor, limit=None, after=None,
+                                private=None, **filters):
+        conditions = ["m.valide = FALSE", "m.rejete = FALSE"]
+        params = []
+        if private is not None:
+            conditions.append("m.est_prive = %s")
+            params.append(bool(private))
+        _add_filters(conditions, params, 'm.date_envoi', MESSAGE_SEARCH_COLUMNS, **filters)
+        _add_keyset_desc(conditions, params, 'm.date_envoi', 'm.id', after)
+        query = f"""
+            SELECT m.*, e.pseudo as expediteur_pseudo, e.nom, e.prenom 
+            FROM message m 
+            JOIN etudiant e ON m.id_expediteur = e.id 
+            WHERE {' AND '.join(conditions)} 
+            ORDER BY m.date_envoi DESC, m.id DESC
+        """
+        cursor.execute(query + _limit_clause(limit, params), params)
+        return cursor.fetchall()
+    
+    def _fetch_stats(self, cursor):
+        stats = {}
+        
+        # Nombre total d'étudiants
+        cursor.execute("SELECT COUNT(*) as total FROM etudiant")
+        stats['total_users'] = cursor.fetchone()['total']
+        
+        # Comptes actifs
+        cursor.execute("SELECT COUNT(*) as total FROM etudiant WHERE compte_actif = TRUE")
+        stats['active_users'] = cursor.fetchone()['total']
+        
+        # Comptes approuvés
+        cursor.execute("SELECT COUNT(*) as total FROM etudiant WHERE compte_approuve = TRUE")
+        stats['approved_users'] = cursor.fetchone()['total']
+        
+        # Messages totaux
+        cursor.execute("SELECT COUNT(*) as total FROM message WHERE rejete = FALSE")
+        stats['total_messages'] = cursor.fetchone()['total']
+        
+        # Messages validés
+        cursor.execute("SELECT COUNT(*) as total FROM message WHERE valide = TRUE AND rejete = FALSE")
+        stats['validated_messages'] = cursor.fetchone()['total']
+        
+        # Messages en attente
+        cursor.execute("SELECT COUNT(*) as total FROM message WHERE valide = FALSE AND rejete = FALSE")
+        stats['pending_messages'] = cursor.fetchone()['total']
+        
+        return stats
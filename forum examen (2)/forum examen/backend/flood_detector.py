@@ -0,0 +1,245 @@
+"""
+Détection des doublons et du flood sur les messages entrants
+Empreintes SimHash des messages récents (fenêtre glissante bornée),
+comparées par étudiant et sur l'ensemble du forum
+"""
+
+import threading
+import time
+from collections import deque, namedtuple
+
+from moderation_rules import tokenize
+
+FINGERPRINT_BITS = 64
+
+DUPLICATE = 'duplicate'   # Même texte (ou presque) répété par un étudiant
+FLOOD = 'flood'           # Trop de messages d'un étudiant dans la fenêtre
+SPAM_WAVE = 'spam_wave'   # Même texte envoyé par plusieurs étudiants
+
+# kind: DUPLICATE | FLOOD | SPAM_WAVE, count: occurrences dans la fenêtre
+Detection = namedtuple('Detection', ('kind', 'count'))
+
+
+# Un octet par bit d'empreinte: ajouter les empreintes écrites en '0'/'1'
+# compte les bits de chaque colonne en une seule addition d'entiers
+_ZERO_ROW = int.from_bytes(b'0' * FINGERPRINT_BITS, 'big')
+_MASK = (1 << FINGERPRINT_BITS) - 1
+# Un octet par colonne: au plus 255 mots et paires de mots
+MAX_TOKENS = 128
+_MAJORITY = {}
+
+
+def simhash(tokens):
+    """
+    Empreinte SimHash 64 bits d'une suite de mots (mots et paires de mots)
+
+    Deux textes proches ont des empreintes qui diffèrent de peu de bits.
+    Le hash de chaque mot est celui de Python (aléatoire par processus):
+    les empreintes ne sont valables que dans le processus qui les calcule.
+    """
+    tokens = tokens[:MAX_TOKENS]
+    features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    if not features:
+        return 0
+    count = len(features)
+    columns = sum(int.from_bytes(format(hash(f) & _MASK, '064b').encode(), 'big')
+                  for f in features) - count * _ZERO_ROW
+    # Colonne à '1' si plus de la moitié des hashs y ont un bit à 1
+    majority = _MAJORITY.get(count)
+    if majority is None:
+        majority = _MAJORITY[count] = bytes(49 if 2 * c > count else 48 for c in range(256))
+    return int(columns.to_bytes(FINGERPRINT_BITS, 'big').translate(majority), 2)
+
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+
+class _Entry:
+    __slots__ = ('time', 'user_id', 'fingerprint', 'exact', 'short')
+
+    def __init__(self, time, user_id, fingerprint, exact, short):
+        self.time = time
+        self.user_id = user_id
+        self.fingerprint = fingerprint
+        self.exact = exact
+        self.short = short
+
+
+class FloodDetector:
+    """
+    Messages acceptés pendant les 'window' dernières secondes
+
+    Chaque étudiant a sa liste de messages récents (doublons et débit);
+    les empreintes de tous les messages sont aussi rangées dans une table
+    LSH: l'empreinte est découpée en max_distance + 1 bandes, et deux
+    empreintes à distance <= max_distance ont forcément une bande en
+    commun. Seuls les messages qui partagent une bande sont comparés.
+
+    Les messages courts (moins de min_tokens mots, ou sans aucun mot)
+    ne sont comparés qu'à l'identique et ne comptent pas pour la détection
+    globale: « merci » envoyé par vingt étudiants n'est pas du spam.
+
+    Args:
+        window (float): Durée (s) de la fenêtre glissante
+        user_max_messages (int): Messages acceptés par étudiant et par fenêtre
+        user_max_repeats (int): Copies d'un même texte acceptées par étudiant
+        global_max_users (int): Étudiants distincts pouvant envoyer un même texte
+        max_distance (int): Bits de différence tolérés entre deux copies
+        min_tokens (int): Taille minimale (mots) pour la comparaison approchée
+        max_entries (int): Nombre maximum de messages gardés en mémoire
+    """
+
+    def __init__(self, window=60.0, user_max_messages=20, user_max_repeats=2,
+                 global_max_users=5, max_distance=7, min_tokens=5, max_entries=20000):
+        self.window = window
+        self.user_max_messages = user_max_messages
+        self.user_max_repeats = user_max_repeats
+        self.global_max_users = global_max_users
+        self.max_distance = max_distance
+        self.min_tokens = min_tokens
+        self.max_entries = max_entries
+
+        self.bands = max_distance + 1
+        self.band_bits = FINGERPRINT_BITS // self.bands
+        self.band_mask = (1 << self.band_bits) - 1
+
+        self.entries = deque()
+        self.by_user = {}
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+        # Métriques
+        self.accepted = 0
+        self.detections = {DUPLICATE: 0, FLOOD: 0, SPAM_WAVE: 0}
+
+    @classmethod
+    def from_config(cls, config):
+        """Construit le détecteur depuis la section [FLOOD] de config.ini"""
+        return cls(
+            window=config.getfloat('FLOOD', 'window', fallback=60.0),
+            user_max_messages=config.getint('FLOOD', 'user_max_messages', fallback=20),
+            user_max_repeats=config.getint('FLOOD', 'user_max_repeats', fallback=2),
+            global_max_users=config.getint('FLOOD', 'global_max_users', fallback=5),
+            max_distance=config.getint('FLOOD', 'max_distance', fallback=7),
+            min_tokens=config.getint('FLOOD', 'min_tokens', fallback=5),
+            max_entries=config.getint('FLOOD', 'max_entries', fallback=20000)
+        )
+
+    def __len__(self):
+        return len(self.entries)
+
+    # ========================================
+    # API
+    # ========================================
+
+    def check(self, user_id, content, now=None):
+        """
+        Vérifie un message et, s'il est accepté, l'ajoute à la fenêtre
+
+        Returns:
+            Detection: Motif du refus, ou None si le message est accepté
+        """
+        tokens = tokenize(content)
+        if tokens:
+            short = len(tokens) < self.min_tokens
+            exact = hash(' '.join(tokens))
+        else:
+            # Aucun mot (emojis, ponctuation): toutes les empreintes seraient
+            # égales, seul le texte brut identique est un doublon
+            short = True
+            exact = hash(' '.join(content.split()))
+        fingerprint = exact if short else simhash(tokens)
+        now = time.time() if now is None else now
+
+        with self.lock:
+            self._expire(now)
+
+            recent = self.by_user.get(user_id, ())
+            if len(recent) >= self.user_max_messages:
+                return self._detected(FLOOD, len(recent))
+
+            copies = sum(1 for entry in recent if self._similar(entry, fingerprint, exact, short))
+            if copies >= self.user_max_repeats:
+                return self._detected(DUPLICATE, copies + 1)
+
+            if not short:
+                senders = self._senders(fingerprint, user_id)
+                if len(senders) >= self.global_max_users:
+                    return self._detected(SPAM_WAVE, len(senders) + 1)
+
+            self._add(_Entry(now, user_id, fingerprint, exact, short))
+            self.accepted += 1
+            return None
+
+    def metrics(self):
+        with self.lock:
+            return {
+                'window_messages': len(self.entries),
+                'window_users': len(self.by_user),
+                'accepted': self.accepted,
+                'duplicates': self.detections[DUPLICATE],
+                'floods': self.detections[FLOOD],
+                'spam_waves': self.detections[SPAM_WAVE]
+            }
+
+    # ========================================
+    # FENÊTRE ET TABLE LSH (appelé sous self.lock)
+    # ========================================
+
+    def _detected(self, kind, count):
+        self.detections[kind] += 1
+        return Detection(kind, count)
+
+    def _similar(self, entry, fingerprint, exact, short):
+        if entry.exact == exact:
+            return True
+        if short or entry.short:
+            return False
+        return hamming(entry.fingerprint, fingerprint) <= self.max_distance
+
+    def _band_keys(self, fingerprint):
+        return [(band, (fingerprint >> (band * self.band_bits)) & self.band_mask)
+                for band in range(self.bands)]
+
+    def _senders(self, fingerprint, user_id):
+        """Autres étudiants ayant envoyé un texte proche dans la fenêtre"""
+        senders = set()
+        seen = set()
+        for key in self._band_keys(fingerprint):
+            for entry in self.buckets.get(key, ()):
+                if entry.user_id == user_id or entry.user_id in senders or id(entry) in seen:
+                    continue
+                seen.add(id(entry))
+                if hamming(entry.fingerprint, fingerprint) <= self.max_distance:
+                    senders.add(entry.user_id)
+        return senders
+
+    def _add(self, entry):
+        self.entries.append(entry)
+        self.by_user.setdefault(entry.user_id, deque()).append(entry)
+        if not entry.short:
+            for key in self._band_keys(entry.fingerprint):
+                self.buckets.setdefault(key, set()).add(entry)
+        while len(self.entries) > self.max_entries:
+            self._remove_oldest()
+
+    def _expire(self, now):
+        limit = now - self.window
+        while self.entries and self.entries[0].time <= limit:
+            self._remove_oldest()
+
+    def _remove_oldest(self):
+        entry = self.entries.popleft()
+        # Les listes par étudiant sont dans le même ordre que self.entries
+        recent = self.by_user[entry.user_id]
+        recent.popleft()
+        if not recent:
+            del self.by_user[entry.user_id]
+        if not entry.short:
+            for key in self._band_keys(entry.fingerprint):
+                bucket = self.buckets.get(key)
+                if bucket is not None:
+                    bucket.discard(entry)
+                    if not bucket:
+                        del self.buckets[key]
@@ -21,7 +21,11 @@ CREATE TABLE IF NOT EXISTS etudiant (
     compte_approuve BOOLEAN DEFAULT FALSE,   -- Approbation finale pour distribution auto
     date_inscription DATETIME DEFAULT CURRENT_TIMESTAMP,
     INDEX idx_username (username),
-    INDEX idx_pseudo (pseudo)
+    INDEX idx_pseudo (pseudo),
+    INDEX idx_actif_date (compte_actif, date_inscription),
+    INDEX idx_actif_approuve_date (compte_actif, compte_approuve, date_inscription),
+    INDEX idx_actif_pseudo (compte_actif, pseudo),
+    INDEX idx_actif_approuve_pseudo (compte_actif, compte_approuve, pseudo)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 -- =============================================
@@ -53,13 +57,23 @@ CREATE TABLE IF NOT EXISTS message (
     date_validation DATETIME,
     id_validateur INT,                       -- Admin qui a validé
     est_prive BOOLEAN DEFAULT FALSE,         -- Message privé ou public
+    id_moderateur INT,                       -- Admin qui a réservé le message
+    date_fin_reservation DATETIME,           -- Fin de la réservation (bail)
+    rejete BOOLEAN NOT NULL DEFAULT FALSE,   -- Rejeté (purgé plus tard)
+    date_rejet DATETIME,
+    id_rejeteur INT,                         -- Admin qui a rejeté
     FOREIGN KEY (id_expediteur) REFERENCES etudiant(id) ON DELETE CASCADE,
     FOREIGN KEY (id_destinataire) REFERENCES etudiant(id) ON DELETE CASCADE,
     FOREIGN KEY (id_validateur) REFERENCES administrateur(id) ON DELETE SET NULL,
     INDEX idx_expediteur (id_expediteur),
     INDEX idx_destinataire (id_destinataire),
     INDEX idx_date (date_envoi),
-    INDEX idx_valide (valide)
+    INDEX idx_valide (valide),
+    INDEX idx_valide_date (valide, date_envoi),
+    INDEX idx_moderateur (id_moderateur),
+    INDEX idx_valide_rejete_date (valide, rejete, date_envoi),
+    INDEX idx_rejete_date (rejete, date_rejet),
+    FULLTEXT INDEX ft_contenu (contenu)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 -- =============================================
@@ -79,7 +93,31 @@ CREATE TABLE IF NOT EXISTS historique_login (
     FOREIGN KEY (id_etudiant) REFERENCES etudiant(id) ON DELETE CASCADE,
     INDEX idx_etudiant (id_etudiant),
     INDEX idx_date (date_action),
-    INDEX idx_action (action)
+    INDEX idx_action (action),
+    INDEX idx_username_date (username, date_action),
+    INDEX idx_ip_date (ip_address, date_action),
+    INDEX idx_action_date (action, date_action),
+    INDEX idx_session (session_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- =============================================
+-- Table: session
+-- Description: Sessions actives côté serveur (clé: session_id de /login)
+-- =============================================
+CREATE TABLE IF NOT EXISTS session (
+    session_id VARCHAR(100) PRIMARY KEY,
+    id_etudiant INT NOT NULL,
+    username VARCHAR(50) NOT NULL,
+    pseudo VARCHAR(50) NOT NULL,
+    ip_address VARCHAR(45),
+    user_agent TEXT,
+    date_creation DATETIME DEFAULT CURRENT_TIMESTAMP,
+    date_derniere_activite DATETIME DEFAULT CURRENT_TIMESTAMP,
+    date_expiration DATETIME NOT NULL,       -- Glissante: dernière activité + ttl
+    FOREIGN KEY (id_etudiant) REFERENCES etudiant(id) ON DELETE CASCADE,
+    INDEX idx_etudiant (id_etudiant),
+    INDEX idx_expiration (date_expiration),
+    INDEX idx_activite (date_derniere_activite)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 -- =============================================
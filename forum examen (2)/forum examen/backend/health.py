@@ -0,0 +1,231 @@
+"""
+État de santé du serveur (/healthz) et aptitude à recevoir du trafic (/readyz)
+Les vérifications sont faites par un thread de fond: les deux routes ne
+lisent que le dernier résultat et peuvent être interrogées chaque seconde
+"""
+
+import logging
+import threading
+import time
+
+from storage import Error
+
+logger = logging.getLogger(__name__)
+
+
+class HealthMonitor:
+    """
+    Vérifications périodiques de la connexion MySQL et de la saturation
+
+    Toutes les 'interval' secondes, le thread mesure son propre retard de
+    réveil (latence d'ordonnancement: GIL, threads saturés), lit la
+    profondeur des files d'écriture différée, l'occupation des pools et
+    l'état des connexions du serveur (add_connection). Ces connexions ne
+    peuvent pas être utilisées depuis le thread de vérification: leur état
+    est relevé par les requêtes elles-mêmes, qui les rétablissent. Le
+    serveur MySQL est en plus interrogé toutes les db_check_interval
+    secondes sur une connexion propre au thread de vérification (rétablie
+    au passage suivant si elle est perdue), ce qui couvre une connexion
+    inactive.
+
+    Args:
+        db_factory (callable): Crée la connexion du thread de vérification
+        interval (float): Période (s) des vérifications
+        db_check_interval (float): Période (s) du ping MySQL
+        max_lag_ms (float): Retard de réveil au-delà duquel le serveur n'est plus prêt
+        max_queue_ratio (float): Remplissage maximal d'une file (0.8 = 80 %)
+    """
+
+    def __init__(self, db_factory, interval=1.0, db_check_interval=5.0,
+                 max_lag_ms=250.0, max_queue_ratio=0.8):
+        self.db_factory = db_factory
+        self.db = None
+        self.interval = interval
+        self.db_check_interval = db_check_interval
+        self.max_lag_ms = max_lag_ms
+        self.max_queue_ratio = max_queue_ratio
+
+        self.queues = []
+        self.pools = []
+        self.connections = []
+        self.started = time.monotonic()
+        self.stop_event = threading.Event()
+        self.thread = None
+
+        # Dernier résultat (lu par les routes)
+        self.lock = threading.Lock()
+        self.heartbeat = None
+        self.lag_ms = 0.0
+        self.db_ok = None
+        self.db_ping_ms = None
+        self.db_checked = None
+        self.checks = {}
+        self.ready = False
+
+        # Métriques
+        self.db_failures = 0
+        self.not_ready_checks = 0
+
+    @classmethod
+    def from_config(cls, config, db_factory):
+        """Construit le moniteur depuis la section [HEALTH] de config.ini"""
+        return cls(
+            db_factory,
+            interval=config.getfloat('HEALTH', 'interval', fallback=1.0),
+            db_check_interval=config.getfloat('HEALTH', 'db_check_interval', fallback=5.0),
+            max_lag_ms=config.getfloat('HEALTH', 'max_lag_ms', fallback=250.0),
+            max_queue_ratio=config.getfloat('HEALTH', 'max_queue_ratio', fallback=0.8)
+        )
+
+    def add_queue(self, name, function):
+        """function() renvoie (éléments en attente, capacité) d'une file d'écriture différée"""
+        self.queues.append((name, function))
+
+    def add_pool(self, name, function):
+        """function() renvoie (places occupées, taille) d'un pool"""
+        self.pools.append((name, function))
+
+    def add_connection(self, name, function):
+        """function() renvoie l'état d'une connexion du serveur (dict avec 'connected')"""
+        self.connections.append((name, function))
+
+    # ========================================
+    # RÉSULTATS
+    # ========================================
+
+    def liveness(self):
+        """
+        Le processus répond et le thread de vérification tourne encore
+
+        Returns:
+            tuple: (vivant, détails)
+        """
+        with self.lock:
+            heartbeat = self.heartbeat
+        age = None if heartbeat is None else time.monotonic() - heartbeat
+        alive = age is not None and age < max(self.interval * 5, 10.0)
+        return alive, {
+            'status': 'ok' if alive else 'stalled',
+            'uptime_s': round(time.monotonic() - self.started, 1),
+            'heartbeat_age_s': None if age is None else round(age, 3)
+        }
+
+    def readiness(self):
+        """
+        Dernier verdict: MySQL joignable, pools non saturés, retard de
+        réveil et files d'écriture sous leurs seuils
+
+        Returns:
+            tuple: (prêt, détails de chaque vérification)
+        """
+        alive, _ = self.liveness()
+        with self.lock:
+            checks = {name: dict(check) for name, check in self.checks.items()}
+            ready = self.ready and alive
+        return ready, {'status': 'ready' if ready else 'not_ready', 'checks': checks}
+
+    def metrics(self):
+        with self.lock:
+            return {
+                'ready': self.ready,
+                'lag_ms': self.lag_ms,
+                'db_ok': bool(self.db_ok),
+                'db_ping_ms': self.db_ping_ms or 0.0,
+                'db_failures': self.db_failures,
+                'not_ready_checks': self.not_ready_checks
+            }
+
+    # ========================================
+    # THREAD DE VÉRIFICATION
+    # ========================================
+
+    def start(self):
+        """Démarre le thread de vérification"""
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name='health-monitor', daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout=self.interval * 2 + 1)
+
+    def check_database(self):
+        started = time.perf_counter()
+        try:
+            # Connexion propre au thread (nouvel essai au passage suivant si elle échoue)
+            if self.db is None:
+                self.db = self.db_factory()
+            ok = self.db.ping()
+        except Error as e:
+            logger.warning("Connexion de vérification impossible: %s", e)
+            ok = False
+        ping_ms = round((time.perf_counter() - started) * 1000, 3)
+        with self.lock:
+            if not ok:
+                self.db_failures += 1
+            if ok != self.db_ok:
+                log = logger.info if ok else logger.error
+                log("Connexion à la base %s", "disponible" if ok else "indisponible")
+            self.db_ok, self.db_ping_ms, self.db_checked = ok, ping_ms, time.monotonic()
+
+    def evaluate(self):
+        """Recalcule toutes les vérifications à partir des dernières mesures"""
+        checks = {}
+        with self.lock:
+            db_ok, db_ping_ms, db_checked, lag_ms = self.db_ok, self.db_ping_ms, self.db_checked, self.lag_ms
+        db_age = None if db_checked is None else time.monotonic() - db_checked
+        checks['database'] = {
+            'ok': bool(db_ok) and db_age < self.db_check_interval * 3,
+            'ping_ms': db_ping_ms,
+            'checked_s_ago': None if db_age is None else round(db_age, 1)
+        }
+        checks['lag'] = {'ok': lag_ms < self.max_lag_ms, 'lag_ms': lag_ms, 'max_ms': self.max_lag_ms}
+        for name, function in self.connections:
+            try:
+                status = function()
+                checks[f"connection:{name}"] = dict(status, ok=bool(status['connected']))
+            except Exception as e:
+                checks[f"connection:{name}"] = {'ok': False, 'error': str(e)}
+        for name, function in self.pools:
+            try:
+                in_use, size = function()
+                checks[f"pool:{name}"] = {'ok': in_use < size, 'in_use': in_use, 'size': size}
+            except Exception as e:
+                checks[f"pool:{name}"] = {'ok': False, 'error': str(e)}
+        for name, function in self.queues:
+            try:
+                depth, capacity = function()
+                ratio = depth / capacity if capacity else 0.0
+                checks[f"queue:{name}"] = {'ok': ratio < self.max_queue_ratio,
+                                           'depth': depth, 'capacity': capacity}
+            except Exception as e:
+                checks[f"queue:{name}"] = {'ok': False, 'error': str(e)}
+        ready = all(check['ok'] for check in checks.values())
+        with self.lock:
+            if self.ready and not ready:
+                logger.warning("Serveur non prêt: %s",
+                               ', '.join(name for name, check in checks.items() if not check['ok']))
+            if not ready:
+                self.not_ready_checks += 1
+            self.checks, self.ready = checks, ready
+        return ready
+
+    def _run(self):
+        next_db_check = 0.0
+        expected = time.monotonic()
+        while not self.stop_event.is_set():
+            now = time.monotonic()
+            with self.lock:
+                self.heartbeat = now
+                # Retard du réveil: le thread attendait depuis 'interval' secondes
+                self.lag_ms = round(max(0.0, now - expected) * 1000, 3)
+            try:
+                if now >= next_db_check:
+                    self.check_database()
+                    next_db_check = now + self.db_check_interval
+                self.evaluate()
+            except Exception as e:
+                logger.error("Erreur dans la vérification de santé: %s", e)
+            expected = time.monotonic() + self.interval
+            self.stop_event.wait(self.interval)
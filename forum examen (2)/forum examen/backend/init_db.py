@@ -1,103 +1,28 @@
 #!/usr/bin/env python3
 """
 Script pour initialiser la base de données du Forum Chat
+(schéma via migrations.py, puis comptes et messages de test)
 """
 
-import mysql.connector
+import configparser
+import logging
+
+from migrations import Migrator, connect
+
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+config = configparser.ConfigParser()
+config.read('config.ini')
 
-# Connexion sans mot de passe (utilise le socket Unix)
 try:
-    conn = mysql.connector.connect(
-        unix_socket='/var/run/mysqld/mysqld.sock',
-        user='root'
-    )
-    print("✓ Connexion MySQL réussie (socket)")
-    
+    # Schéma: migrations versionnées (python migrations.py au déploiement)
+    backend, conn = connect(config)
+    print(f"✓ Connexion réussie ({backend.dialect})")
+    migrator = Migrator.from_config(config, conn, backend.dialect)
+    migrator.upgrade()
+    print(f"✓ Schéma à jour (version {migrator.current_version()})")
     cursor = conn.cursor()
     
-    # Créer la base de données
-    cursor.execute("CREATE DATABASE IF NOT EXISTS forum_chat")
-    print("✓ Base de données 'forum_chat' créée")
-    
-    # Utiliser la base de données
-    cursor.execute("USE forum_chat")
-    
-    # Créer la table etudiant
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS etudiant (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            nom VARCHAR(50) NOT NULL,
-            prenom VARCHAR(50) NOT NULL,
-            pseudo VARCHAR(50) NOT NULL UNIQUE,
-            username VARCHAR(50) NOT NULL UNIQUE,
-            password VARCHAR(255) NOT NULL,
-            compte_actif BOOLEAN DEFAULT FALSE,
-            compte_approuve BOOLEAN DEFAULT FALSE,
-            date_inscription DATETIME DEFAULT CURRENT_TIMESTAMP,
-            INDEX idx_username (username),
-            INDEX idx_pseudo (pseudo)
-        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
-    """)
-    print("✓ Table 'etudiant' créée")
-    
-    # Créer la table administrateur
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS administrateur (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            username VARCHAR(50) NOT NULL UNIQUE,
-            password VARCHAR(255) NOT NULL,
-            nom VARCHAR(50) NOT NULL,
-            prenom VARCHAR(50) NOT NULL,
-            date_creation DATETIME DEFAULT CURRENT_TIMESTAMP
-        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
-    """)
-    print("✓ Table 'administrateur' créée")
-    
-    # Créer la table message
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS message (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            id_expediteur INT NOT NULL,
-            pseudo_expediteur VARCHAR(50) NOT NULL,
-            id_destinataire INT,
-            pseudo_destinataire VARCHAR(50),
-            contenu TEXT NOT NULL,
-            date_envoi DATETIME DEFAULT CURRENT_TIMESTAMP,
-            valide BOOLEAN DEFAULT FALSE,
-            date_validation DATETIME,
-            id_validateur INT,
-            est_prive BOOLEAN DEFAULT FALSE,
-            FOREIGN KEY (id_expediteur) REFERENCES etudiant(id) ON DELETE CASCADE,
-            FOREIGN KEY (id_destinataire) REFERENCES etudiant(id) ON DELETE CASCADE,
-            FOREIGN KEY (id_validateur) REFERENCES administrateur(id) ON DELETE SET NULL,
-            INDEX idx_expediteur (id_expediteur),
-            INDEX idx_destinataire (id_destinataire),
-            INDEX idx_date (date_envoi),
-            INDEX idx_valide (valide)
-        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
-    """)
-    print("✓ Table 'message' créée")
-    
-    # Créer la table historique_login
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS historique_login (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            id_etudiant INT NOT NULL,
-            username VARCHAR(50) NOT NULL,
-            pseudo VARCHAR(50) NOT NULL,
-            action VARCHAR(20) NOT NULL,
-            date_action DATETIME DEFAULT CURRENT_TIMESTAMP,
-            ip_address VARCHAR(45),
-            user_agent TEXT,
-            session_id VARCHAR(100),
-            FOREIGN KEY (id_etudiant) REFERENCES etudiant(id) ON DELETE CASCADE,
-            INDEX idx_etudiant (id_etudiant),
-            INDEX idx_date (date_action),
-            INDEX idx_action (action)
-        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
-    """)
-    print("✓ Table 'historique_login' créée")
-    
     # Insérer l'admin par défaut (password: admin123)
     import bcrypt
     hashed = bcrypt.hashpw('admin123'.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
@@ -0,0 +1,267 @@
+"""
+Journalisation structurée du serveur
+Les handlers et les sockets ne font que déposer l'entrée dans une file
+bornée; un thread dédié la formate (JSON) et l'écrit. Les niveaux
+bavards sont échantillonnés et chaque entrée porte l'identifiant de la
+requête HTTP ou de l'événement Socket.IO qui l'a produite.
+"""
+
+import atexit
+import contextvars
+import copy
+import functools
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import uuid
+from datetime import datetime
+
+# Identifiants de corrélation de la requête ou de l'événement en cours
+# (un thread par requête et par événement: chaque thread a son contexte)
+log_context = contextvars.ContextVar('log_context', default={})
+
+# Attributs standard d'un LogRecord (le reste vient de extra={...})
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {
+    'message', 'asctime', 'taskName', 'context', 'sampled'
+}
+
+_TRACEBACKS = logging.Formatter()
+
+
+def new_id():
+    return uuid.uuid4().hex[:16]
+
+
+def bind(**fields):
+    """
+    Ajoute des identifiants au contexte courant
+
+    Returns:
+        Token à passer à log_context.reset() pour revenir au contexte précédent
+    """
+    return log_context.set({**log_context.get(), **fields})
+
+
+# ========================================
+# FILTRES ET FORMAT
+# ========================================
+
+class ContextFilter(logging.Filter):
+    """Copie le contexte de corrélation dans l'entrée (thread appelant)"""
+
+    def filter(self, record):
+        record.context = log_context.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Ne garde qu'une fraction des entrées DEBUG et INFO
+    (WARNING et au-delà sont toujours gardées)
+
+    Args:
+        rates (dict): {niveau: fraction gardée}, ex. {logging.DEBUG: 0.1}
+    """
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = rates
+        self.random = random.random
+
+    def filter(self, record):
+        rate = self.rates.get(record.levelno, 1.0)
+        if rate >= 1.0:
+            return True
+        if self.random() < rate:
+            record.sampled = rate
+            return True
+        return False
+
+
+class JsonFormatter(logging.Formatter):
+    """Une ligne JSON par entrée: date, niveau, logger, message, contexte, extra"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        entry.update(getattr(record, 'context', None) or {})
+        if getattr(record, 'sampled', None):
+            entry['sample_rate'] = record.sampled
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Format lisible pour le développement (contexte en fin de ligne)"""
+
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)-7s %(name)s: %(message)s')
+
+    def format(self, record):
+        line = super().format(record)
+        context = getattr(record, 'context', None)
+        if context:
+            line += '  [' + ' '.join(f"{k}={v}" for k, v in context.items()) + ']'
+        return line
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler qui ne bloque jamais: quand la file est pleine, l'entrée
+    est abandonnée et comptée (au lieu d'attendre ou d'écrire sur stderr)
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        # Appelé par handle() sous le verrou du handler
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def prepare(self, record):
+        # Le formatage (JSON) est fait par le thread d'écriture: on ne fige
+        # ici que le message et la trace de l'exception
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _TRACEBACKS.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+# ========================================
+# CONFIGURATION
+# ========================================
+
+class LoggingRuntime:
+    """File, handler et thread d'écriture installés par setup_logging()"""
+
+    def __init__(self, handler, listener, log_queue):
+        self.handler = handler
+        self.listener = listener
+        self.queue = log_queue
+
+    def stop(self):
+        """Écrit les entrées en attente puis arrête le thread (idempotent)"""
+        if self.listener._thread is not None:
+            self.listener.stop()
+
+    def metrics(self):
+        return {
+            'queued': self.queue.qsize(),
+            'capacity': self.queue.maxsize,
+            'dropped': self.handler.dropped
+        }
+
+
+def setup_logging(config):
+    """
+    Configure le logger racine depuis la section [LOGGING] de config.ini
+
+    Returns:
+        LoggingRuntime: Métriques de la file et arrêt du thread d'écriture
+    """
+    def get(key, fallback):
+        return config.get('LOGGING', key, fallback=fallback)
+
+    level = getattr(logging, get('level', 'INFO').upper(), logging.INFO)
+    formatter = JsonFormatter() if get('format', 'json') == 'json' else TextFormatter()
+
+    outputs = [logging.StreamHandler(sys.stdout)]
+    log_file = get('file', '')
+    if log_file:
+        outputs.append(logging.handlers.WatchedFileHandler(log_file, encoding='utf-8'))
+    for output in outputs:
+        output.setFormatter(formatter)
+
+    log_queue = queue.Queue(maxsize=config.getint('LOGGING', 'queue_size', fallback=10000))
+    handler = DroppingQueueHandler(log_queue)
+    handler.addFilter(SamplingFilter({
+        logging.DEBUG: config.getfloat('LOGGING', 'debug_sample_rate', fallback=1.0),
+        logging.INFO: config.getfloat('LOGGING', 'info_sample_rate', fallback=1.0),
+    }))
+    handler.addFilter(ContextFilter())
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
+    # Bibliothèques bavardes: avertissements uniquement
+    for name in ('werkzeug', 'engineio', 'socketio'):
+        logging.getLogger(name).setLevel(max(level, logging.WARNING))
+
+    listener = logging.handlers.QueueListener(log_queue, *outputs, respect_handler_level=True)
+    listener.start()
+    runtime = LoggingRuntime(handler, listener, log_queue)
+    atexit.register(runtime.stop)
+    return runtime
+
+
+# ========================================
+# CORRÉLATION HTTP ET SOCKET.IO
+# ========================================
+
+def install_request_ids(app):
+    """Identifiant par requête HTTP (en-tête X-Request-ID repris ou généré)"""
+    from flask import g, request
+
+    @app.before_request
+    def _bind_request_id():
+        request_id = request.headers.get('X-Request-ID') or new_id()
+        g.log_token = bind(request_id=request_id, route=request.path)
+
+    @app.after_request
+    def _send_request_id(response):
+        response.headers['X-Request-ID'] = log_context.get().get('request_id', '')
+        return response
+
+    @app.teardown_request
+    def _unbind_request_id(exc=None):
+        token = g.pop('log_token', None)
+        if token is not None:
+            log_context.reset(token)
+
+
+def install_socket_ids(socketio):
+    """
+    Identifiants par événement Socket.IO: sid du socket, nom et numéro
+    de l'événement. À appeler avant l'enregistrement des handlers.
+    """
+    from flask import request
+
+    register = socketio.on
+
+    def on(message, namespace=None):
+        decorator = register(message, namespace)
+
+        def wrap(handler):
+            @functools.wraps(handler)
+            def bound(*args):
+                token = bind(sid=request.sid, event=message, event_id=new_id())
+                try:
+                    return handler(*args)
+                finally:
+                    log_context.reset(token)
+            decorator(bound)
+            return handler
+        return wrap
+
+    socketio.on = on
+    return socketio
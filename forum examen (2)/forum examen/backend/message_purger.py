@@ -0,0 +1,131 @@
+"""
+Purge des messages rejetés
+Les messages rejetés restent en base (rejete = TRUE) pendant la durée de
+rétention, puis sont supprimés par lots en heures creuses
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+class MessagePurger:
+    """
+    Thread de purge des messages rejetés
+
+    Le rejet d'un message n'est qu'un UPDATE (la requête de l'admin ne
+    paie pas la suppression et ses index); les lignes sont supprimées
+    ici par lots de batch_size, une transaction par lot avec une pause
+    entre deux lots, uniquement entre start_hour et end_hour.
+    Le thread possède sa propre connexion MySQL.
+
+    Args:
+        db_factory (callable): Crée la connexion du thread de purge
+        retention_days (float): Délai avant suppression d'un message rejeté
+        start_hour, end_hour (int): Plage horaire de purge (peut passer minuit)
+        batch_size (int): Lignes supprimées par transaction
+        pause (float): Attente (s) entre deux lots
+        check_interval (float): Période (s) de vérification hors plage horaire
+    """
+
+    def __init__(self, db_factory, retention_days=30, start_hour=2, end_hour=5,
+                 batch_size=5000, pause=0.5, check_interval=600.0):
+        self.db_factory = db_factory
+        self.retention_seconds = int(retention_days * 86400)
+        self.start_hour = start_hour
+        self.end_hour = end_hour
+        self.batch_size = batch_size
+        self.pause = pause
+        self.check_interval = check_interval
+
+        self.stop_event = threading.Event()
+        self.thread = None
+
+        # Métriques
+        self.lock = threading.Lock()
+        self.purged = 0
+        self.runs = 0
+        self.last_run = None
+
+    @classmethod
+    def from_config(cls, config, db_factory):
+        """Construit le job depuis la section [PURGE] de config.ini"""
+        return cls(
+            db_factory,
+            retention_days=config.getfloat('PURGE', 'retention_days', fallback=30),
+            start_hour=config.getint('PURGE', 'start_hour', fallback=2),
+            end_hour=config.getint('PURGE', 'end_hour', fallback=5),
+            batch_size=config.getint('PURGE', 'batch_size', fallback=5000),
+            pause=config.getfloat('PURGE', 'pause', fallback=0.5),
+            check_interval=config.getfloat('PURGE', 'check_interval', fallback=600.0)
+        )
+
+    def in_window(self, now=None):
+        """Vrai pendant la plage horaire de purge"""
+        hour = (now or datetime.now()).hour
+        if self.start_hour <= self.end_hour:
+            return self.start_hour <= hour < self.end_hour
+        return hour >= self.start_hour or hour < self.end_hour
+
+    def metrics(self):
+        with self.lock:
+            return {
+                'purged': self.purged,
+                'runs': self.runs,
+                'last_run': self.last_run.isoformat() if self.last_run else None,
+                'in_window': self.in_window()
+            }
+
+    # ========================================
+    # THREAD DE PURGE
+    # ========================================
+
+    def start(self):
+        """Démarre le thread de purge"""
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name='message-purger', daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout=self.pause * 2 + 1)
+
+    def purge(self, db):
+        """
+        Supprime les messages rejetés expirés, lot par lot, tant que la
+        plage horaire est ouverte
+
+        Returns:
+            int: Nombre de messages supprimés
+        """
+        total = 0
+        while not self.stop_event.is_set() and self.in_window():
+            started = time.perf_counter()
+            deleted = db.purge_rejected_messages(self.retention_seconds, self.batch_size)
+            total += deleted
+            with self.lock:
+                self.purged += deleted
+            if deleted < self.batch_size:
+                break
+            # Pause proportionnelle au lot: laisse passer les requêtes du forum
+            self.stop_event.wait(max(self.pause, time.perf_counter() - started))
+        with self.lock:
+            self.runs += 1
+            self.last_run = datetime.now()
+        return total
+
+    def _run(self):
+        db = self.db_factory()
+        while not self.stop_event.is_set():
+            if self.in_window():
+                try:
+                    removed = self.purge(db)
+                    if removed:
+                        logger.info("%s messages rejetés supprimés définitivement", removed)
+                except Exception as e:
+                    logger.error("Erreur dans la purge des messages rejetés: %s", e)
+            self.stop_event.wait(self.check_interval)
@@ -0,0 +1,122 @@
+"""
+Distribution des messages aux clients Socket.IO
+Les messages en attente sont gardés en mémoire dès leur insertion pour
+être diffusés à la validation sans relire la base
+"""
+
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+from tracing import tracer
+
+
+def user_room(user_id):
+    """Room rejointe par tous les sockets d'un étudiant (un par onglet)"""
+    return f"etudiant:{user_id}"
+
+
+def message_payload(message):
+    """
+    Événement 'new_message' à partir d'une ligne de la table message
+    (ou du dict transmis par le listener 'message_added')
+    """
+    date_envoi = message.get('date_envoi')
+    return {
+        'id': message['id'],
+        'from': message['pseudo_expediteur'],
+        'from_id': message['id_expediteur'],
+        'to': message.get('pseudo_destinataire'),
+        'to_id': message.get('id_destinataire'),
+        'content': message['contenu'],
+        'timestamp': date_envoi.isoformat() if isinstance(date_envoi, datetime) else date_envoi,
+        'is_private': bool(message.get('est_prive'))
+    }
+
+
+class MessageRouter:
+    """
+    Diffuse les messages validés à leur public
+
+    Un message public est envoyé à tous les clients; un message privé
+    uniquement aux sockets de l'expéditeur et du destinataire.
+
+    Args:
+        socketio: Serveur Flask-SocketIO
+        db_manager: DatabaseManager (listener + relecture en cas d'absence du cache)
+        capacity (int): Messages en attente gardés en mémoire au maximum
+    """
+
+    def __init__(self, socketio, db_manager, capacity=10000):
+        self.socketio = socketio
+        self.db_manager = db_manager
+        self.capacity = capacity
+        self.pending = OrderedDict()
+        self.lock = threading.Lock()
+
+        # Métriques
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+        db_manager.add_listener(self.handle_event)
+
+    def deliver(self, payload, origin=None):
+        """
+        Envoie un événement 'new_message' à son public
+
+        Args:
+            origin (SpanContext): Trace de l'envoi du message, liée à la
+                diffusion quand celle-ci a lieu plus tard (validation)
+        """
+        with tracer.span('deliver new_message', kind='producer', links=[origin],
+                         attributes={'message.id': payload['id'],
+                                     'message.private': payload['is_private']}):
+            if payload['is_private']:
+                rooms = [user_room(payload['from_id'])]
+                if payload['to_id'] is not None and payload['to_id'] != payload['from_id']:
+                    rooms.append(user_room(payload['to_id']))
+                self.socketio.emit('new_message', payload, to=rooms)
+            else:
+                self.socketio.emit('new_message', payload)
+
+    def metrics(self):
+        with self.lock:
+            return {
+                'pending_cached': len(self.pending),
+                'cache_hits': self.cache_hits,
+                'cache_misses': self.cache_misses
+            }
+
+    # ========================================
+    # LISTENER DU DATABASEMANAGER
+    # ========================================
+
+    def handle_event(self, event, data):
+        if event == 'message_added':
+            message = data['message']
+            if not message['valide']:
+                with self.lock:
+                    # Contexte de trace de l'envoi (send_message), repris à la diffusion
+                    self.pending[message['id']] = (message_payload(message), tracer.current_context())
+                    while len(self.pending) > self.capacity:
+                        self.pending.popitem(last=False)
+        elif event == 'message_validated':
+            self._deliver_validated(int(data['message_id']))
+        elif event == 'message_rejected':
+            with self.lock:
+                self.pending.pop(int(data['message_id']), None)
+
+    def _deliver_validated(self, message_id):
+        with self.lock:
+            payload, origin = self.pending.pop(message_id, (None, None))
+            if payload is None:
+                self.cache_misses += 1
+            else:
+                self.cache_hits += 1
+        if payload is None:
+            # Message inséré avant le démarrage du serveur (ou évincé du cache)
+            message = self.db_manager.get_message_by_id(message_id)
+            if message is None:
+                return
+            payload = message_payload(message)
+        self.deliver(payload, origin)
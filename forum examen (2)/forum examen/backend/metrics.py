@@ -0,0 +1,342 @@
+"""
+Métriques du serveur au format texte Prometheus (/metrics)
+Latence des routes Flask, durée et lignes des méthodes du DatabaseManager,
+événements Socket.IO, diffusion (fan-out) et compteurs des autres modules
+"""
+
+import functools
+import inspect
+import logging
+import re
+import threading
+import time
+
+from flask import g, request
+
+logger = logging.getLogger(__name__)
+
+# Secondes (routes, requêtes SQL, événements Socket.IO)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Sockets destinataires d'une émission
+FANOUT_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+# Lignes renvoyées par une méthode du DatabaseManager
+ROWS_BUCKETS = (0, 1, 5, 10, 50, 100, 500, 1000, 5000)
+
+NAME_RE = re.compile(r'[^a-zA-Z0-9_]')
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = 'untyped'
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Compteur croissant, par combinaison d'étiquettes"""
+    kind = 'counter'
+
+    def __init__(self, name, help, labelnames=()):
+        super().__init__(name, help, labelnames)
+        self.values = {}
+
+    def inc(self, *labels, amount=1):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self):
+        with self.lock:
+            values = sorted(self.values.items())
+        return self.header() + [f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+                                for labels, value in values]
+
+
+class Gauge(_Metric):
+    """Valeur instantanée, lue par 'function' au moment de l'export"""
+    kind = 'gauge'
+
+    def __init__(self, name, help, function):
+        super().__init__(name, help)
+        self.function = function
+
+    def render(self):
+        return self.header() + [f"{self.name} {_number(self.function())}"]
+
+
+class Histogram(_Metric):
+    """Distribution (buckets cumulés, somme et nombre d'observations)"""
+    kind = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets) + (float('inf'),)
+        self.series = {}
+
+    def observe(self, value, *labels):
+        with self.lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = [[0] * len(self.buckets), 0.0, 0]
+            counts = series[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        with self.lock:
+            series = sorted((labels, (list(c), s, n)) for labels, (c, s, n) in self.series.items())
+        lines = self.header()
+        for labels, (counts, total, count) in series:
+            cumulative = 0
+            for bound, bucket in zip(self.buckets, counts):
+                cumulative += bucket
+                lines.append(f"{self.name}_bucket"
+                             f"{_labels(self.labelnames, labels, [('le', _number(bound))])} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class Registry:
+    """
+    Ensemble des métriques exportées par /metrics
+
+    Les modules qui ont déjà une méthode metrics() (dict de compteurs)
+    sont ajoutés par add_collector(): chaque valeur numérique devient
+    une jauge '<préfixe>_<clé>'.
+    """
+
+    def __init__(self, prefix='forum'):
+        self.prefix = prefix
+        self.metrics = []
+        self.collectors = []
+        self.lock = threading.Lock()
+
+    def _register(self, metric):
+        with self.lock:
+            self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self._register(Counter(f"{self.prefix}_{name}", help, labelnames))
+
+    def gauge(self, name, help, function):
+        return self._register(Gauge(f"{self.prefix}_{name}", help, function))
+
+    def histogram(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram(f"{self.prefix}_{name}", help, labelnames, buckets))
+
+    def add_collector(self, name, function):
+        """function() renvoie un dict {clé: valeur} (ex.: flood_detector.metrics)"""
+        with self.lock:
+            self.collectors.append((NAME_RE.sub('_', f"{self.prefix}_{name}"), function))
+
+    def render(self):
+        """Texte au format d'exposition Prometheus (version 0.0.4)"""
+        with self.lock:
+            metrics = list(self.metrics)
+            collectors = list(self.collectors)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        for prefix, function in collectors:
+            try:
+                values = function()
+            except Exception as e:
+                logger.error("Erreur lors de la collecte des métriques '%s': %s", prefix, e)
+                continue
+            for key, value in values.items():
+                if isinstance(value, bool):
+                    value = int(value)
+                if not isinstance(value, (int, float)):
+                    continue
+                name = NAME_RE.sub('_', f"{prefix}_{key}")
+                lines += [f"# TYPE {name} gauge", f"{name} {_number(value)}"]
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+# ========================================
+# ROUTES FLASK
+# ========================================
+
+def instrument_app(app):
+    """Latence et statut de chaque route (gabarit de la route, pas l'URL)"""
+    latency = registry.histogram(
+        'http_request_duration_seconds', "Durée des requêtes HTTP par route",
+        ('route', 'method'))
+    responses = registry.counter(
+        'http_responses_total', "Réponses HTTP par route et statut",
+        ('route', 'method', 'status'))
+
+    @app.before_request
+    def _start_timer():
+        g.metrics_started = time.perf_counter()
+
+    @app.after_request
+    def _record_request(response):
+        started = g.pop('metrics_started', None)
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        if started is not None:
+            latency.observe(time.perf_counter() - started, route, request.method)
+        responses.inc(route, request.method, str(response.status_code))
+        return response
+
+
+# ========================================
+# DATABASEMANAGER
+# ========================================
+
+def _row_count(result):
+    if result is None:
+        return 0
+    if isinstance(result, (list, tuple)):
+        return len(result)
+    if isinstance(result, dict):
+        return 1
+    return None
+
+
+def instrument_database(cls, exclude=('add_listener',)):
+    """
+    Chronomètre toutes les méthodes publiques de la classe (toutes les
+    instances, y compris celles des threads de maintenance)
+
+    Les générateurs (iter_*) sont mesurés jusqu'à la fin du parcours,
+    leurs lignes comptées lot par lot.
+    """
+    latency = registry.histogram(
+        'db_method_duration_seconds', "Durée des méthodes du DatabaseManager", ('method',))
+    rows = registry.histogram(
+        'db_method_rows', "Lignes renvoyées par appel", ('method',), ROWS_BUCKETS)
+
+    def timed(name, method):
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                result = method(*args, **kwargs)
+            finally:
+                latency.observe(time.perf_counter() - started, name)
+            count = _row_count(result)
+            if count is not None:
+                rows.observe(count, name)
+            return result
+        return wrapper
+
+    def timed_generator(name, method):
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            total = 0
+            try:
+                for batch in method(*args, **kwargs):
+                    total += _row_count(batch) or 0
+                    yield batch
+            finally:
+                latency.observe(time.perf_counter() - started, name)
+                rows.observe(total, name)
+        return wrapper
+
+    for name, method in list(vars(cls).items()):
+        if name.startswith('_') or name in exclude or not inspect.isfunction(method):
+            continue
+        wrap = timed_generator if inspect.isgeneratorfunction(method) else timed
+        setattr(cls, name, wrap(name, method))
+    return cls
+
+
+# ========================================
+# SOCKET.IO
+# ========================================
+
+def instrument_socketio(socketio):
+    """
+    Compte les événements reçus et les émissions, et mesure le nombre de
+    sockets destinataires de chaque émission
+
+    À appeler avant l'enregistrement des handlers (@socketio.on).
+    """
+    events = registry.counter(
+        'socketio_events_total', "Événements Socket.IO reçus", ('event',))
+    handler_latency = registry.histogram(
+        'socketio_handler_duration_seconds', "Durée des handlers Socket.IO", ('event',))
+    emits = registry.counter(
+        'socketio_emits_total', "Émissions serveur Socket.IO", ('event',))
+    fanout = registry.histogram(
+        'socketio_fanout_sockets', "Sockets destinataires d'une émission",
+        ('event',), FANOUT_BUCKETS)
+
+    register = socketio.on
+    emit = socketio.emit
+
+    def on(message, namespace=None):
+        decorator = register(message, namespace)
+
+        def wrap(handler):
+            @functools.wraps(handler)
+            def timed(*args):
+                events.inc(message)
+                started = time.perf_counter()
+                try:
+                    return handler(*args)
+                finally:
+                    handler_latency.observe(time.perf_counter() - started, message)
+            decorator(timed)
+            return handler
+        return wrap
+
+    def recipients(namespace, to, skip_sid):
+        rooms = socketio.server.manager.rooms.get(namespace or '/', {})
+        if to is None:
+            count = len(rooms.get(None, ()))
+        elif isinstance(to, (list, tuple, set)):
+            count = sum(len(rooms.get(room, ())) for room in to)
+        else:
+            count = len(rooms.get(to, ()))
+        if skip_sid:
+            count -= len(skip_sid) if isinstance(skip_sid, (list, tuple, set)) else 1
+        return max(count, 0)
+
+    def counted_emit(event, *args, **kwargs):
+        emits.inc(event)
+        try:
+            to = kwargs.get('to', kwargs.get('room'))
+            fanout.observe(recipients(kwargs.get('namespace'), to, kwargs.get('skip_sid')), event)
+        except Exception:
+            pass
+        return emit(event, *args, **kwargs)
+
+    socketio.on = on
+    socketio.emit = counted_emit
+    return socketio
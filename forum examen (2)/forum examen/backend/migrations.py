@@ -0,0 +1,645 @@
+#!/usr/bin/env python3
+"""
+Migrations versionnées du schéma de la base (MySQL et SQLite)
+
+Chaque migration est numérotée; celles déjà appliquées sont enregistrées
+dans la table schema_version, et seules les migrations manquantes sont
+exécutées au déploiement, pendant que le serveur tourne:
+
+    python migrations.py             # applique les migrations en attente
+    python migrations.py --status    # version actuelle et migrations en attente
+    python migrations.py --target 3  # s'arrêter à la version 3
+
+Sur MySQL, les colonnes et les index sont ajoutés en ligne (ALGORITHM=INSTANT
+ou INPLACE, LOCK=NONE): lectures et écritures continuent pendant l'opération.
+Les remplissages de colonnes (backfill) sont faits par tranches de clés
+primaires, une courte transaction par tranche. Sur SQLite, les migrations
+sont appliquées à la première connexion du processus (storage.py).
+
+Chaque étape vérifie d'abord si elle a déjà été faite: une base créée par
+l'ancien init_db.py est reprise telle quelle, et une migration interrompue
+peut être relancée (le DDL MySQL n'est pas transactionnel).
+"""
+
+import argparse
+import configparser
+import logging
+import os
+import time
+from collections import namedtuple
+
+from storage import Error, backend_from_config
+
+logger = logging.getLogger(__name__)
+
+Migration = namedtuple('Migration', ['version', 'description', 'apply'])
+
+MIGRATIONS = []
+
+
+def migration(version, description):
+    """Enregistre une fonction apply(schema) comme migration numérotée"""
+    def register(function):
+        MIGRATIONS.append(Migration(version, description, function))
+        return function
+    return register
+
+
+class MigrationError(Exception):
+    """Migration impossible sans verrouiller une grosse table, ou déjà en cours"""
+    pass
+
+
+# Codes d'erreur MySQL
+UNKNOWN_ALGORITHM = 1800          # ALGORITHM=INSTANT avant MySQL 8.0
+ONLINE_NOT_SUPPORTED = (1845, 1846)
+LOCK_WAIT_TIMEOUT = 1205
+CANT_HANDLE_FULLTEXT = 1214
+
+# Du plus au moins disponible: (clause, verrouille la table)
+COLUMN_STRATEGIES = [
+    ('ALGORITHM=INSTANT', False),
+    ('ALGORITHM=INPLACE, LOCK=NONE', False),
+    ('ALGORITHM=INPLACE, LOCK=SHARED', True),
+    ('ALGORITHM=COPY', True),
+]
+INDEX_STRATEGIES = [
+    ('ALGORITHM=INPLACE, LOCK=NONE', False),
+    ('ALGORITHM=INPLACE, LOCK=SHARED', True),
+    ('ALGORITHM=COPY', True),
+]
+
+
+class Migrator:
+    """
+    Applique les migrations en attente sur une connexion
+
+    Args:
+        connection: Connexion mysql.connector (base sélectionnée) ou SQLiteConnection
+        dialect (str): 'mysql' ou 'sqlite'
+        lock_wait_timeout (int): Attente maximale (s) du verrou de métadonnées d'un ALTER
+        ddl_retries (int): Nouvelles tentatives d'un ALTER abandonné faute de verrou
+        backfill_chunk (int): Lignes par transaction d'un remplissage
+        backfill_pause (float): Pause (s) entre deux tranches
+        small_table_rows (int): Taille sous laquelle une table peut être verrouillée
+        allow_locking (bool): Autoriser LOCK=SHARED / COPY quelle que soit la taille
+    """
+
+    def __init__(self, connection, dialect, lock_wait_timeout=5, ddl_retries=5,
+                 backfill_chunk=5000, backfill_pause=0.05, small_table_rows=100000,
+                 allow_locking=False):
+        self.connection = connection
+        self.dialect = dialect
+        self.lock_wait_timeout = lock_wait_timeout
+        self.ddl_retries = ddl_retries
+        self.backfill_chunk = backfill_chunk
+        self.backfill_pause = backfill_pause
+        self.small_table_rows = small_table_rows
+        self.allow_locking = allow_locking
+
+    @classmethod
+    def from_config(cls, config, connection, dialect):
+        """Construit le migrateur depuis la section [MIGRATIONS] de config.ini"""
+        return cls(
+            connection, dialect,
+            lock_wait_timeout=config.getint('MIGRATIONS', 'lock_wait_timeout', fallback=5),
+            ddl_retries=config.getint('MIGRATIONS', 'ddl_retries', fallback=5),
+            backfill_chunk=config.getint('MIGRATIONS', 'backfill_chunk', fallback=5000),
+            backfill_pause=config.getfloat('MIGRATIONS', 'backfill_pause_ms', fallback=50) / 1000,
+            small_table_rows=config.getint('MIGRATIONS', 'small_table_rows', fallback=100000),
+            allow_locking=config.getboolean('MIGRATIONS', 'allow_locking', fallback=False)
+        )
+
+    @property
+    def mysql(self):
+        return self.dialect == 'mysql'
+
+    # ========================================
+    # EXÉCUTION
+    # ========================================
+
+    def query(self, sql, params=None):
+        """Requête de lecture: toutes les lignes (tuples)"""
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(sql, params or ())
+            return cursor.fetchall() if cursor.description else []
+        finally:
+            cursor.close()
+
+    def execute(self, sql, params=None):
+        """Instruction isolée, validée aussitôt (une transaction par étape)"""
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(sql, params or ())
+            count = cursor.rowcount
+            self.connection.commit()
+            return count
+        except Error:
+            self.connection.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    # ========================================
+    # ÉTAT DU SCHÉMA
+    # ========================================
+
+    def has_table(self, table):
+        if self.mysql:
+            rows = self.query("""
+                SELECT COUNT(*) FROM information_schema.tables
+                WHERE table_schema = DATABASE() AND table_name = %s
+            """, (table,))
+        else:
+            rows = self.query("SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = %s",
+                              (table,))
+        return rows[0][0] > 0
+
+    def has_column(self, table, column):
+        if self.mysql:
+            rows = self.query("""
+                SELECT COUNT(*) FROM information_schema.columns
+                WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s
+            """, (table, column))
+        else:
+            rows = self.query("SELECT COUNT(*) FROM pragma_table_info(%s) WHERE name = %s",
+                              (table, column))
+        return rows[0][0] > 0
+
+    def has_index(self, table, name):
+        if self.mysql:
+            rows = self.query("""
+                SELECT COUNT(*) FROM information_schema.statistics
+                WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+            """, (table, name))
+        else:
+            rows = self.query("""
+                SELECT COUNT(*) FROM sqlite_master
+                WHERE type = 'index' AND tbl_name = %s AND name = %s
+            """, (table, name))
+        return rows[0][0] > 0
+
+    def estimated_rows(self, table):
+        """Nombre de lignes estimé par InnoDB (sans parcourir la table)"""
+        rows = self.query("""
+            SELECT table_rows FROM information_schema.tables
+            WHERE table_schema = DATABASE() AND table_name = %s
+        """, (table,))
+        return (rows[0][0] or 0) if rows else 0
+
+    # ========================================
+    # VERSIONS
+    # ========================================
+
+    def ensure_version_table(self):
+        if self.mysql:
+            self.execute("""
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version INT PRIMARY KEY,
+                    description VARCHAR(255) NOT NULL,
+                    date_application DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    duree_ms INT NOT NULL
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+            """)
+        else:
+            self.execute("""
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version INTEGER PRIMARY KEY,
+                    description VARCHAR(255) NOT NULL,
+                    date_application DATETIME DEFAULT (datetime('now', 'localtime')),
+                    duree_ms INT NOT NULL
+                )
+            """)
+
+    def applied(self):
+        """Versions déjà appliquées"""
+        if not self.has_table('schema_version'):
+            return set()
+        return {row[0] for row in self.query("SELECT version FROM schema_version")}
+
+    def current_version(self):
+        return max(self.applied(), default=0)
+
+    def pending(self, target=None):
+        """Migrations en attente (par numéro croissant), jusqu'à target incluse"""
+        applied = self.applied()
+        return [m for m in sorted(MIGRATIONS, key=lambda m: m.version)
+                if m.version not in applied and (target is None or m.version <= target)]
+
+    def upgrade(self, target=None):
+        """
+        Applique les migrations en attente, une par une
+
+        Un verrou nommé (GET_LOCK) empêche deux déploiements simultanés de
+        migrer la même base MySQL.
+
+        Returns:
+            list: Migrations appliquées
+        """
+        self.acquire()
+        try:
+            self.ensure_version_table()
+            done = []
+            for m in self.pending(target):
+                logger.info("Migration %03d: %s", m.version, m.description)
+                started = time.perf_counter()
+                m.apply(self)
+                duration_ms = int((time.perf_counter() - started) * 1000)
+                self.execute(
+                    "INSERT INTO schema_version (version, description, duree_ms) VALUES (%s, %s, %s)",
+                    (m.version, m.description, duration_ms)
+                )
+                logger.info("✓ Migration %03d appliquée (%d ms)", m.version, duration_ms)
+                done.append(m)
+            return done
+        finally:
+            self.release()
+
+    def acquire(self):
+        if not self.mysql:
+            # SQLite: appliquées à la première connexion, sous le verrou du processus
+            return
+        # Un ALTER qui attend le verrou de métadonnées bloque toutes les
+        # requêtes arrivées après lui: on abandonne vite et on retente
+        self.query(f"SET SESSION lock_wait_timeout = {int(self.lock_wait_timeout)}")
+        rows = self.query("SELECT GET_LOCK(CONCAT(DATABASE(), '.schema_migrations'), 0)")
+        if rows[0][0] != 1:
+            raise MigrationError("Migrations déjà en cours sur cette base (autre déploiement)")
+
+    def release(self):
+        if self.mysql:
+            self.query("SELECT RELEASE_LOCK(CONCAT(DATABASE(), '.schema_migrations'))")
+
+    # ========================================
+    # OPÉRATIONS EN LIGNE
+    # ========================================
+
+    def alter(self, table, clause, strategies):
+        """
+        ALTER TABLE avec la première stratégie acceptée par le serveur
+
+        Les stratégies qui verrouillent la table ne sont tentées que sur
+        une petite table (ou si allow_locking): sinon MigrationError, à
+        relancer pendant une fenêtre de maintenance.
+        """
+        may_lock = self.allow_locking or self.estimated_rows(table) <= self.small_table_rows
+        for strategy, locking in strategies:
+            if locking and not may_lock:
+                raise MigrationError(
+                    f"ALTER TABLE {table} {clause}: impossible sans verrouiller la table "
+                    f"(~{self.estimated_rows(table)} lignes); relancer avec allow_locking = true "
+                    f"pendant une fenêtre de maintenance")
+            try:
+                self.alter_with_retry(f"ALTER TABLE {table} {clause}, {strategy}")
+                if locking:
+                    logger.warning("ALTER TABLE %s fait avec %s (table verrouillée)", table, strategy)
+                return strategy
+            except Error as e:
+                if getattr(e, 'errno', None) not in (UNKNOWN_ALGORITHM,) + ONLINE_NOT_SUPPORTED:
+                    raise
+                logger.info("%s refusé pour %s: %s", strategy, table, e)
+        raise MigrationError(f"ALTER TABLE {table} {clause}: aucune stratégie acceptée")
+
+    def alter_with_retry(self, sql):
+        for attempt in range(self.ddl_retries + 1):
+            try:
+                return self.execute(sql)
+            except Error as e:
+                if getattr(e, 'errno', None) != LOCK_WAIT_TIMEOUT or attempt == self.ddl_retries:
+                    raise
+                delay = min(2 ** attempt, 30)
+                logger.warning("Verrou de métadonnées occupé (transaction longue?), "
+                               "nouvel essai dans %d s", delay)
+                time.sleep(delay)
+
+    def add_column(self, table, name, definition):
+        """Ajoute une colonne si elle n'existe pas encore"""
+        if self.has_column(table, name):
+            return False
+        if self.mysql:
+            self.alter(table, f"ADD COLUMN {name} {definition}", COLUMN_STRATEGIES)
+        else:
+            self.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+        logger.info("✓ Colonne '%s' ajoutée à '%s'", name, table)
+        return True
+
+    def add_index(self, table, name, columns, kind=''):
+        """Crée un index s'il n'existe pas encore (kind: '', 'UNIQUE' ou 'FULLTEXT')"""
+        if self.has_index(table, name):
+            return False
+        if self.mysql:
+            self.alter(table, f"ADD {kind} INDEX {name} {columns}", INDEX_STRATEGIES)
+        else:
+            self.execute(f"CREATE {kind} INDEX IF NOT EXISTS {name} ON {table} {columns}")
+        logger.info("✓ Index '%s' créé sur '%s'", name, table)
+        return True
+
+    def backfill(self, table, assignments, where='1 = 1', params=(), key='id'):
+        """
+        UPDATE par tranches de clés primaires, une transaction par tranche
+
+        Les verrous de ligne ne sont tenus que le temps d'une tranche et la
+        réplication suit; les lignes insérées pendant le remplissage doivent
+        déjà être écrites avec la nouvelle valeur par le code du serveur.
+
+        Args:
+            assignments (str): Clause SET, ex. "nb_mots = 0"
+            where (str): Lignes à remplir, ex. "nb_mots IS NULL"
+            params (tuple): Paramètres de assignments puis de where
+
+        Returns:
+            int: Lignes modifiées
+        """
+        low, high = self.query(f"SELECT MIN({key}), MAX({key}) FROM {table}")[0]
+        if low is None:
+            return 0
+        total = 0
+        started = time.perf_counter()
+        for start in range(low, high + 1, self.backfill_chunk):
+            total += self.execute(
+                f"UPDATE {table} SET {assignments} WHERE ({where}) AND {key} >= %s AND {key} < %s",
+                tuple(params) + (start, start + self.backfill_chunk)
+            )
+            if self.backfill_pause:
+                time.sleep(self.backfill_pause)
+        logger.info("✓ %s: %d lignes remplies en %.1f s", table, total, time.perf_counter() - started)
+        return total
+
+
+# ========================================
+# MIGRATIONS
+# ========================================
+
+MYSQL_TABLES = [
+    """
+    CREATE TABLE IF NOT EXISTS etudiant (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        nom VARCHAR(50) NOT NULL,
+        prenom VARCHAR(50) NOT NULL,
+        pseudo VARCHAR(50) NOT NULL UNIQUE,
+        username VARCHAR(50) NOT NULL UNIQUE,
+        password VARCHAR(255) NOT NULL,
+        compte_actif BOOLEAN DEFAULT FALSE,
+        compte_approuve BOOLEAN DEFAULT FALSE,
+        date_inscription DATETIME DEFAULT CURRENT_TIMESTAMP,
+        INDEX idx_username (username),
+        INDEX idx_pseudo (pseudo)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS administrateur (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        username VARCHAR(50) NOT NULL UNIQUE,
+        password VARCHAR(255) NOT NULL,
+        nom VARCHAR(50) NOT NULL,
+        prenom VARCHAR(50) NOT NULL,
+        date_creation DATETIME DEFAULT CURRENT_TIMESTAMP
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS message (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        id_expediteur INT NOT NULL,
+        pseudo_expediteur VARCHAR(50) NOT NULL,
+        id_destinataire INT,
+        pseudo_destinataire VARCHAR(50),
+        contenu TEXT NOT NULL,
+        date_envoi DATETIME DEFAULT CURRENT_TIMESTAMP,
+        valide BOOLEAN DEFAULT FALSE,
+        date_validation DATETIME,
+        id_validateur INT,
+        est_prive BOOLEAN DEFAULT FALSE,
+        FOREIGN KEY (id_expediteur) REFERENCES etudiant(id) ON DELETE CASCADE,
+        FOREIGN KEY (id_destinataire) REFERENCES etudiant(id) ON DELETE CASCADE,
+        FOREIGN KEY (id_validateur) REFERENCES administrateur(id) ON DELETE SET NULL,
+        INDEX idx_expediteur (id_expediteur),
+        INDEX idx_destinataire (id_destinataire),
+        INDEX idx_date (date_envoi),
+        INDEX idx_valide (valide)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS historique_login (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        id_etudiant INT NOT NULL,
+        username VARCHAR(50) NOT NULL,
+        pseudo VARCHAR(50) NOT NULL,
+        action VARCHAR(20) NOT NULL,
+        date_action DATETIME DEFAULT CURRENT_TIMESTAMP,
+        ip_address VARCHAR(45),
+        user_agent TEXT,
+        session_id VARCHAR(100),
+        FOREIGN KEY (id_etudiant) REFERENCES etudiant(id) ON DELETE CASCADE,
+        INDEX idx_etudiant (id_etudiant),
+        INDEX idx_date (date_action),
+        INDEX idx_action (action)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS session (
+        session_id VARCHAR(100) PRIMARY KEY,
+        id_etudiant INT NOT NULL,
+        username VARCHAR(50) NOT NULL,
+        pseudo VARCHAR(50) NOT NULL,
+        ip_address VARCHAR(45),
+        user_agent TEXT,
+        date_creation DATETIME DEFAULT CURRENT_TIMESTAMP,
+        date_derniere_activite DATETIME DEFAULT CURRENT_TIMESTAMP,
+        date_expiration DATETIME NOT NULL,
+        FOREIGN KEY (id_etudiant) REFERENCES etudiant(id) ON DELETE CASCADE,
+        INDEX idx_etudiant (id_etudiant),
+        INDEX idx_expiration (date_expiration),
+        INDEX idx_activite (date_derniere_activite)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+]
+
+# SQLite: pseudos et identifiants comparés sans la casse (comme la
+# collation MySQL), dates par défaut à l'heure locale comme NOW()
+SQLITE_TABLES = [
+    """
+    CREATE TABLE IF NOT EXISTS etudiant (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        nom VARCHAR(50) NOT NULL,
+        prenom VARCHAR(50) NOT NULL,
+        pseudo VARCHAR(50) NOT NULL UNIQUE COLLATE NOCASE,
+        username VARCHAR(50) NOT NULL UNIQUE COLLATE NOCASE,
+        password VARCHAR(255) NOT NULL,
+        compte_actif BOOLEAN DEFAULT FALSE,
+        compte_approuve BOOLEAN DEFAULT FALSE,
+        date_inscription DATETIME DEFAULT (datetime('now', 'localtime'))
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS administrateur (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username VARCHAR(50) NOT NULL UNIQUE COLLATE NOCASE,
+        password VARCHAR(255) NOT NULL,
+        nom VARCHAR(50) NOT NULL,
+        prenom VARCHAR(50) NOT NULL,
+        date_creation DATETIME DEFAULT (datetime('now', 'localtime'))
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS message (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        id_expediteur INT NOT NULL REFERENCES etudiant(id) ON DELETE CASCADE,
+        pseudo_expediteur VARCHAR(50) NOT NULL,
+        id_destinataire INT REFERENCES etudiant(id) ON DELETE CASCADE,
+        pseudo_destinataire VARCHAR(50),
+        contenu TEXT NOT NULL,
+        date_envoi DATETIME DEFAULT (datetime('now', 'localtime')),
+        valide BOOLEAN DEFAULT FALSE,
+        date_validation DATETIME,
+        id_validateur INT REFERENCES administrateur(id) ON DELETE SET NULL,
+        est_prive BOOLEAN DEFAULT FALSE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS historique_login (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        id_etudiant INT NOT NULL REFERENCES etudiant(id) ON DELETE CASCADE,
+        username VARCHAR(50) NOT NULL,
+        pseudo VARCHAR(50) NOT NULL,
+        action VARCHAR(20) NOT NULL,
+        date_action DATETIME DEFAULT (datetime('now', 'localtime')),
+        ip_address VARCHAR(45),
+        user_agent TEXT,
+        session_id VARCHAR(100)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS session (
+        session_id VARCHAR(100) PRIMARY KEY,
+        id_etudiant INT NOT NULL REFERENCES etudiant(id) ON DELETE CASCADE,
+        username VARCHAR(50) NOT NULL,
+        pseudo VARCHAR(50) NOT NULL,
+        ip_address VARCHAR(45),
+        user_agent TEXT,
+        date_creation DATETIME DEFAULT (datetime('now', 'localtime')),
+        date_derniere_activite DATETIME DEFAULT (datetime('now', 'localtime')),
+        date_expiration DATETIME NOT NULL
+    )
+    """,
+]
+
+# SQLite ne crée pas d'index pour les clés étrangères (MySQL: INDEX en ligne)
+SQLITE_TABLE_INDEXES = [
+    ('message', 'idx_message_expediteur', '(id_expediteur)'),
+    ('message', 'idx_message_destinataire', '(id_destinataire)'),
+    ('historique_login', 'idx_login_etudiant', '(id_etudiant)'),
+    ('historique_login', 'idx_login_date', '(date_action)'),
+    ('session', 'idx_session_etudiant', '(id_etudiant)'),
+    ('session', 'idx_session_expiration', '(date_expiration)'),
+    ('session', 'idx_session_activite', '(date_derniere_activite)'),
+]
+
+
+@migration(1, "Tables initiales")
+def create_tables(schema):
+    for ddl in (MYSQL_TABLES if schema.mysql else SQLITE_TABLES):
+        schema.execute(ddl)
+    if not schema.mysql:
+        for table, name, columns in SQLITE_TABLE_INDEXES:
+            schema.add_index(table, name, columns)
+
+
+@migration(2, "Réservation des messages par un modérateur (bail)")
+def add_moderation_lease(schema):
+    schema.add_column('message', 'id_moderateur', 'INT NULL')
+    schema.add_column('message', 'date_fin_reservation', 'DATETIME NULL')
+    schema.add_index('message', 'idx_moderateur', '(id_moderateur)')
+
+
+@migration(3, "Rejet logique des messages (purge différée)")
+def add_soft_reject(schema):
+    schema.add_column('message', 'rejete', 'BOOLEAN NOT NULL DEFAULT FALSE')
+    schema.add_column('message', 'date_rejet', 'DATETIME NULL')
+    schema.add_column('message', 'id_rejeteur', 'INT NULL')
+    schema.add_index('message', 'idx_valide_rejete_date', '(valide, rejete, date_envoi)')
+    schema.add_index('message', 'idx_rejete_date', '(rejete, date_rejet)')
+
+
+@migration(4, "Index composites des listes admin paginées et de l'historique")
+def add_composite_indexes(schema):
+    for table, name, columns in [
+        ('etudiant', 'idx_actif_date', '(compte_actif, date_inscription)'),
+        ('etudiant', 'idx_actif_approuve_date', '(compte_actif, compte_approuve, date_inscription)'),
+        ('etudiant', 'idx_actif_pseudo', '(compte_actif, pseudo)'),
+        ('etudiant', 'idx_actif_approuve_pseudo', '(compte_actif, compte_approuve, pseudo)'),
+        ('message', 'idx_valide_date', '(valide, date_envoi)'),
+        ('historique_login', 'idx_username_date', '(username, date_action)'),
+        ('historique_login', 'idx_ip_date', '(ip_address, date_action)'),
+        ('historique_login', 'idx_action_date', '(action, date_action)'),
+        ('historique_login', 'idx_session', '(session_id)'),
+    ]:
+        schema.add_index(table, name, columns)
+
+
+@migration(5, "Recherche plein texte sur le contenu des messages")
+def add_fulltext_index(schema):
+    if not schema.mysql:
+        # Pas de FULLTEXT: le serveur utilise son index en mémoire
+        return
+    try:
+        schema.add_index('message', 'ft_contenu', '(contenu)', kind='FULLTEXT')
+    except Error as e:
+        if getattr(e, 'errno', None) != CANT_HANDLE_FULLTEXT:
+            raise
+        logger.warning("Index FULLTEXT non disponible (%s), recherche en mémoire", e)
+
+
+# ========================================
+# DÉPLOIEMENT
+# ========================================
+
+def connect(config):
+    """
+    Connexion de déploiement (la base MySQL est créée si besoin)
+
+    Returns:
+        tuple: (moteur, connexion)
+    """
+    backend = backend_from_config(config)
+    if backend.dialect != 'mysql':
+        return backend, backend.connect()
+    import mysql.connector
+    params = dict(backend.params)
+    database = params.pop('database')
+    connection = mysql.connector.connect(**params)
+    cursor = connection.cursor()
+    cursor.execute(f"CREATE DATABASE IF NOT EXISTS {database} DEFAULT CHARACTER SET utf8mb4")
+    cursor.execute(f"USE {database}")
+    cursor.close()
+    return backend, connection
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--config', default=os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                         'config.ini'))
+    parser.add_argument('--status', action='store_true', help="Afficher l'état sans rien appliquer")
+    parser.add_argument('--target', type=int, help="Dernière version à appliquer")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    config = configparser.ConfigParser()
+    config.read(args.config)
+    backend, connection = connect(config)
+    try:
+        migrator = Migrator.from_config(config, connection, backend.dialect)
+        if args.status:
+            print(f"Version du schéma ({backend.dialect}): {migrator.current_version()}")
+            for m in migrator.pending(args.target):
+                print(f"  en attente: {m.version:03d} {m.description}")
+            return
+        done = migrator.upgrade(args.target)
+        print(f"✓ Schéma à jour (version {migrator.current_version()}, "
+              f"{len(done)} migration(s) appliquée(s))")
+    finally:
+        connection.close()
+
+
+if __name__ == '__main__':
+    main()
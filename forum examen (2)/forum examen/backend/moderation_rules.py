@@ -0,0 +1,229 @@
+"""
+Pré-modération automatique des messages
+Mots-clés (automate d'Aho-Corasick), expressions régulières, longueur
+et liens: chaque message est accepté, rejeté ou mis en file de modération
+"""
+
+import re
+import threading
+import time
+import unicodedata
+from collections import deque, namedtuple
+
+ACCEPT = 'accept'
+REJECT = 'reject'
+REVIEW = 'review'
+
+LINK_RE = re.compile(r'https?://|www\.', re.IGNORECASE)
+TOKEN_RE = re.compile(r'\w+')
+COMBINING_RE = re.compile('[\u0300-\u036f]')
+
+# action: ACCEPT | REJECT | REVIEW, reasons: liste de motifs lisibles
+Verdict = namedtuple('Verdict', ('action', 'reasons'))
+
+
+def normalize(text):
+    """Minuscules sans accents, pour la recherche de mots-clés"""
+    if text.isascii():
+        return text.lower()
+    return COMBINING_RE.sub('', unicodedata.normalize('NFKD', text)).casefold()
+
+
+def tokenize(text):
+    """Mots normalisés d'un texte ('Argent  facile!' -> ['argent', 'facile'])"""
+    return TOKEN_RE.findall(normalize(text))
+
+
+def _split_list(value, separator=','):
+    return [item.strip() for item in value.split(separator) if item.strip()]
+
+
+class KeywordAutomaton:
+    """
+    Automate d'Aho-Corasick sur les mots: trouve tous les mots-clés
+    (mots isolés ou expressions de plusieurs mots) en un seul parcours
+    du texte, quel que soit le nombre de mots-clés
+
+    Travailler sur les mots plutôt que sur les caractères divise le
+    nombre de transitions par la longueur moyenne d'un mot et n'accepte
+    que des mots entiers ('con' ne correspond pas à 'conversation').
+
+    Args:
+        keywords (dict | iterable): {mot-clé: étiquette}, ou mots-clés seuls
+    """
+
+    def __init__(self, keywords=()):
+        if not isinstance(keywords, dict):
+            keywords = dict.fromkeys(keywords)
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [()]
+        for keyword, label in keywords.items():
+            self._insert(tuple(tokenize(keyword)), label)
+        self._link()
+
+    def __len__(self):
+        return sum(1 for words in self.output if words)
+
+    def _insert(self, words, label):
+        if not words:
+            return
+        state = 0
+        for word in words:
+            following = self.goto[state].get(word)
+            if following is None:
+                following = len(self.goto)
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append(())
+                self.goto[state][word] = following
+            state = following
+        keyword = ' '.join(words)
+        if all(found != keyword for found, _ in self.output[state]):
+            self.output[state] += ((keyword, label),)
+
+    def _link(self):
+        """Liens d'échec calculés en largeur (la racine n'a pas de lien)"""
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for word, following in self.goto[state].items():
+                queue.append(following)
+                fallback = self.fail[state]
+                while fallback and word not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[following] = self.goto[fallback].get(word, 0)
+                self.output[following] += self.output[self.fail[following]]
+
+    def find(self, words):
+        """
+        Mots-clés présents dans une suite de mots
+
+        Args:
+            words (list | str): Résultat de tokenize(), ou texte brut
+
+        Returns:
+            dict: {mot-clé trouvé: étiquette}
+        """
+        if isinstance(words, str):
+            words = tokenize(words)
+        goto, fail, output = self.goto, self.fail, self.output
+        root = goto[0]
+        found = {}
+        state = 0
+        for word in words:
+            if not state and word not in root:
+                continue
+            while state and word not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(word, 0)
+            if output[state]:
+                found.update(output[state])
+        return found
+
+
+class RuleEngine:
+    """
+    Règles de pré-modération, de la plus sévère à la plus permissive:
+
+        REJECT  mot interdit, motif interdit, message trop long, trop de liens
+        REVIEW  mot ou motif suspect, lien envoyé par un compte non approuvé
+        ACCEPT  aucune règle déclenchée
+
+    Les comptes approuvés ne sont soumis qu'aux règles REJECT.
+
+    Args:
+        reject_words, review_words (iterable): Mots-clés
+        reject_patterns, review_patterns (iterable): Expressions régulières
+        max_length (int): Longueur maximale d'un message (0 = illimitée)
+        max_links (int): Nombre maximum de liens (au-delà: rejet)
+    """
+
+    def __init__(self, reject_words=(), review_words=(), reject_patterns=(),
+                 review_patterns=(), max_length=2000, max_links=3):
+        # Un seul automate pour les deux listes (un seul parcours par message)
+        keywords = dict.fromkeys(review_words, REVIEW)
+        keywords.update(dict.fromkeys(reject_words, REJECT))
+        self.keywords = KeywordAutomaton(keywords)
+        self.reject_patterns = [re.compile(p, re.IGNORECASE) for p in reject_patterns]
+        self.review_patterns = [re.compile(p, re.IGNORECASE) for p in review_patterns]
+        self.max_length = max_length
+        self.max_links = max_links
+
+        # Métriques
+        self.lock = threading.Lock()
+        self.counts = {ACCEPT: 0, REJECT: 0, REVIEW: 0}
+        self.eval_seconds = 0.0
+
+    @classmethod
+    def from_config(cls, config):
+        """Construit les règles depuis la section [MODERATION] de config.ini"""
+        def get(key, fallback=''):
+            return config.get('MODERATION', key, fallback=fallback)
+
+        return cls(
+            reject_words=_split_list(get('reject_words')),
+            review_words=_split_list(get('review_words')),
+            reject_patterns=_split_list(get('reject_patterns'), '\n'),
+            review_patterns=_split_list(get('review_patterns'), '\n'),
+            max_length=config.getint('MODERATION', 'max_length', fallback=2000),
+            max_links=config.getint('MODERATION', 'max_links', fallback=3)
+        )
+
+    def evaluate(self, content, approved=False):
+        """
+        Décide du sort d'un message
+
+        Args:
+            content (str): Texte du message
+            approved (bool): Expéditeur approuvé (règles REVIEW ignorées)
+
+        Returns:
+            Verdict: (action, reasons)
+        """
+        started = time.perf_counter()
+        verdict = self._evaluate(content, approved)
+        elapsed = time.perf_counter() - started
+        with self.lock:
+            self.counts[verdict.action] += 1
+            self.eval_seconds += elapsed
+        return verdict
+
+    def _evaluate(self, content, approved):
+        if self.max_length and len(content) > self.max_length:
+            return Verdict(REJECT, [f"message de plus de {self.max_length} caractères"])
+
+        text = normalize(content)
+        found = self.keywords.find(TOKEN_RE.findall(text))
+        rejected = sorted(w for w, label in found.items() if label == REJECT)
+        if rejected:
+            return Verdict(REJECT, [f"mot interdit: {w}" for w in rejected])
+        for pattern in self.reject_patterns:
+            if pattern.search(content):
+                return Verdict(REJECT, [f"motif interdit: {pattern.pattern}"])
+
+        # Sous-chaînes testées d'abord: la plupart des messages n'ont aucun lien
+        links = len(LINK_RE.findall(text)) if ('://' in text or 'www.' in text) else 0
+        if links > self.max_links:
+            return Verdict(REJECT, [f"{links} liens (maximum {self.max_links})"])
+
+        if approved:
+            return Verdict(ACCEPT, [])
+
+        reasons = [f"mot suspect: {w}" for w in sorted(found)]
+        reasons += [f"motif suspect: {p.pattern}" for p in self.review_patterns if p.search(content)]
+        if links:
+            reasons.append("lien envoyé par un compte non approuvé")
+        if reasons:
+            return Verdict(REVIEW, reasons)
+        return Verdict(ACCEPT, [])
+
+    def metrics(self):
+        with self.lock:
+            total = sum(self.counts.values()) or 1
+            return {
+                'accepted': self.counts[ACCEPT],
+                'rejected': self.counts[REJECT],
+                'reviewed': self.counts[REVIEW],
+                'eval_avg_us': round(self.eval_seconds / total * 1e6, 3)
+            }
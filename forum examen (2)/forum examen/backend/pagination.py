@@ -0,0 +1,89 @@
+"""
+Pagination par clé (keyset) pour les listes de l'API
+Les curseurs sont opaques pour le client: JSON encodé en base64 URL-safe
+"""
+
+import base64
+import json
+from datetime import datetime
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class InvalidCursor(ValueError):
+    """Curseur de pagination illisible ou falsifié"""
+
+
+def encode_cursor(values):
+    """
+    Encode la clé de tri de la dernière ligne d'une page
+
+    Args:
+        values (tuple): Valeurs de la clé de tri (ex: (date_inscription, id))
+
+    Returns:
+        str: Curseur opaque
+    """
+    payload = [{'$dt': v.isoformat()} if isinstance(v, datetime) else v
+               for v in values]
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token, key):
+    """
+    Décode un curseur produit par encode_cursor()
+
+    Args:
+        token (str): Curseur reçu du client
+        key (tuple): Clé de tri de la liste (une valeur par colonne)
+
+    Returns:
+        tuple: Valeurs de la clé de tri, ou None si token est vide
+
+    Raises:
+        InvalidCursor: Si le curseur est invalide
+    """
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        payload = json.loads(raw)
+        if not isinstance(payload, list):
+            raise ValueError("liste attendue")
+        if len(payload) != len(key):
+            raise ValueError(f"{len(key)} valeur(s) attendue(s), {len(payload)} reçue(s)")
+        values = tuple(datetime.fromisoformat(v['$dt']) if isinstance(v, dict) else v
+                       for v in payload)
+        if any(isinstance(v, (list, dict)) for v in values):
+            raise ValueError("valeur scalaire attendue")
+        return values
+    except (ValueError, TypeError, KeyError) as e:
+        raise InvalidCursor(f"Curseur invalide: {e}")
+
+
+def build_page(rows, limit, key):
+    """
+    Construit une page à partir de limit + 1 lignes lues
+
+    Args:
+        rows (list): Lignes retournées par la requête (au plus limit + 1)
+        limit (int): Taille de page demandée
+        key (tuple): Noms des colonnes formant la clé de tri
+
+    Returns:
+        dict: {'items': [...], 'next_cursor': str ou None}
+    """
+    has_more = len(rows) > limit
+    items = rows[:limit]
+    next_cursor = None
+    if has_more and items:
+        next_cursor = encode_cursor(tuple(items[-1][k] for k in key))
+    return {'items': items, 'next_cursor': next_cursor}
+
+
+def like_prefix(text):
+    """Échappe un préfixe pour une clause LIKE 'préfixe%'"""
+    escaped = text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return escaped + '%'
@@ -0,0 +1,173 @@
+"""
+Hachage et vérification bcrypt hors des threads de requête
+Les calculs tournent dans un pool de processus dédié, avec un nombre
+d'opérations simultanées borné et un délai d'attente maximal
+"""
+
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import bcrypt
+
+DEFAULT_ROUNDS = 12
+
+
+def _hash_password(password, rounds):
+    """Exécuté dans un processus du pool"""
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+
+
+def _check_password(password, hashed):
+    """Exécuté dans un processus du pool"""
+    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+
+
+def _timed(function, *args):
+    """Exécute function dans le processus du pool et mesure son temps de calcul"""
+    started = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - started
+
+
+def _noop():
+    return None
+
+
+def hash_rounds(hashed):
+    """Coût bcrypt d'un hash ('$2b$12$...' -> 12), ou None si illisible"""
+    try:
+        return int(hashed.split('$')[2])
+    except (IndexError, ValueError, AttributeError):
+        return None
+
+
+class HasherBusy(Exception):
+    """Aucune place libre dans le pool avant l'expiration du délai d'attente"""
+
+
+class PasswordHasher:
+    """
+    Pool de processus bcrypt
+
+    Args:
+        rounds (int): Coût bcrypt des nouveaux hashs
+        workers (int): Nombre de processus du pool
+        max_concurrency (int): Opérations en cours ou en file au maximum
+        queue_timeout (float): Attente maximale (s) d'une place dans le pool
+    """
+
+    def __init__(self, rounds=DEFAULT_ROUNDS, workers=2, max_concurrency=None,
+                 queue_timeout=2.0):
+        self.rounds = rounds
+        self.workers = workers
+        self.queue_timeout = queue_timeout
+        self.max_concurrency = max_concurrency or workers * 2
+        self.slots = threading.BoundedSemaphore(self.max_concurrency)
+        # Méthode de démarrage par défaut de la plateforme (spawn sous Windows
+        # et macOS): le pool doit être créé avant le premier thread
+        self.executor = ProcessPoolExecutor(max_workers=workers)
+
+        # Métriques d'attente
+        self.stats_lock = threading.Lock()
+        self.in_flight = 0
+        self.operations = 0
+        self.rejected = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.compute_total = 0.0
+
+    @classmethod
+    def from_config(cls, config):
+        """Construit le pool depuis la section [SECURITY] de config.ini"""
+        section = config['SECURITY'] if 'SECURITY' in config else {}
+        workers = int(section.get('hash_workers', 2))
+        return cls(
+            rounds=int(section.get('bcrypt_rounds', DEFAULT_ROUNDS)),
+            workers=workers,
+            max_concurrency=int(section.get('hash_max_concurrency', workers * 2)),
+            queue_timeout=float(section.get('hash_queue_timeout', 2.0))
+        )
+
+    def warm_up(self):
+        """Démarre les processus du pool avant l'arrivée des requêtes"""
+        if getattr(multiprocessing.current_process(), '_inheriting', False):
+            # Processus du pool en cours de démarrage (spawn): le module
+            # principal y est réimporté, sans pool imbriqué
+            return
+        futures = [self.executor.submit(_noop) for _ in range(self.workers)]
+        for future in futures:
+            future.result()
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    # ========================================
+    # API
+    # ========================================
+
+    def hash(self, password):
+        """
+        Hash un mot de passe au coût configuré
+
+        Raises:
+            HasherBusy: Pool saturé au-delà de queue_timeout
+        """
+        return self._run(_hash_password, password, self.rounds)
+
+    def verify(self, password, hashed):
+        """
+        Vérifie un mot de passe contre son hash bcrypt
+
+        Raises:
+            HasherBusy: Pool saturé au-delà de queue_timeout
+        """
+        return self._run(_check_password, password, hashed)
+
+    def needs_rehash(self, hashed):
+        """True si le hash a été calculé avec un autre coût que celui configuré"""
+        return hash_rounds(hashed) != self.rounds
+
+    def metrics(self):
+        """Compteurs d'utilisation du pool et de l'attente en file"""
+        with self.stats_lock:
+            done = self.operations or 1
+            return {
+                'rounds': self.rounds,
+                'workers': self.workers,
+                'max_concurrency': self.max_concurrency,
+                'in_flight': self.in_flight,
+                'operations': self.operations,
+                'rejected': self.rejected,
+                'queue_wait_avg_ms': round(self.wait_total / done * 1000, 3),
+                'queue_wait_max_ms': round(self.wait_max * 1000, 3),
+                'compute_avg_ms': round(self.compute_total / done * 1000, 3)
+            }
+
+    def _run(self, function, *args):
+        queued_at = time.perf_counter()
+        if not self.slots.acquire(timeout=self.queue_timeout):
+            with self.stats_lock:
+                self.rejected += 1
+            raise HasherBusy("Trop de vérifications de mot de passe en cours")
+
+        with self.stats_lock:
+            self.in_flight += 1
+        try:
+            future = self.executor.submit(_timed, function, *args)
+            result, compute = future.result()
+            elapsed = time.perf_counter() - queued_at
+        finally:
+            self.slots.release()
+            with self.stats_lock:
+                self.in_flight -= 1
+
+        # Attente = temps total moins calcul (place libre + processus disponible)
+        wait = max(elapsed - compute, 0.0)
+        with self.stats_lock:
+            self.operations += 1
+            self.compute_total += compute
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+        return result
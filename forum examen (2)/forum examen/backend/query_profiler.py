@@ -0,0 +1,281 @@
+"""
+Profilage des requêtes SQL du DatabaseManager (désactivé par défaut)
+Durée, lignes et texte (paramètres exclus) de chaque requête, journal
+des requêtes lentes avec leur plan d'exécution (EXPLAIN)
+"""
+
+import json
+import logging
+import re
+import sys
+import threading
+import time
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+SPACES_RE = re.compile(r'\s+')
+
+# Instructions dont le plan peut être demandé sans les exécuter
+EXPLAINABLE = ('select', 'update', 'delete')
+
+
+def sql_template(operation):
+    """Texte de la requête sur une ligne (les valeurs restent des %s)"""
+    if isinstance(operation, bytes):
+        operation = operation.decode('utf-8', 'replace')
+    return SPACES_RE.sub(' ', operation).strip()
+
+
+class QueryProfiler:
+    """
+    Statistiques par requête, partagées par tous les DatabaseManager
+
+    Chaque curseur est enveloppé (ProfiledCursor): le temps compte
+    l'exécution et la lecture des lignes. Au-delà de slow_query_ms, la
+    requête est écrite (une ligne JSON) dans slow_query_log avec la
+    méthode du DatabaseManager qui l'a lancée; son plan EXPLAIN est
+    ajouté la première fois, obtenu sur une connexion dédiée pour ne
+    pas interférer avec le curseur en cours.
+
+    Args:
+        connect (callable): Ouvre une connexion MySQL (EXPLAIN)
+        slow_query_ms (float): Seuil (ms) du journal des requêtes lentes
+        slow_query_log (str): Fichier du journal ('' : pas de fichier)
+        explain (bool): Capturer le plan des requêtes lentes
+        max_templates (int): Requêtes distinctes suivies au maximum
+    """
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, connect, slow_query_ms=200.0, slow_query_log='slow_queries.log',
+                 explain=True, max_templates=500):
+        self.connect = connect
+        self.slow_query_s = slow_query_ms / 1000
+        self.slow_query_log = slow_query_log
+        self.explain = explain
+        self.max_templates = max_templates
+
+        self.templates = {}
+        self.explained = set()
+        self.lock = threading.Lock()
+        self.explain_lock = threading.Lock()
+        self.explain_connection = None
+
+        # Métriques
+        self.queries = 0
+        self.slow_queries = 0
+        self.dropped_templates = 0
+
+    @classmethod
+    def shared(cls, config, connect):
+        """
+        Profileur commun à toutes les connexions, construit depuis la
+        section [PROFILING] de config.ini
+
+        Returns:
+            QueryProfiler: ou None si le profilage est désactivé
+        """
+        if not config.getboolean('PROFILING', 'enabled', fallback=False):
+            return None
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls(
+                    connect,
+                    slow_query_ms=config.getfloat('PROFILING', 'slow_query_ms', fallback=200.0),
+                    slow_query_log=config.get('PROFILING', 'slow_query_log', fallback='slow_queries.log'),
+                    explain=config.getboolean('PROFILING', 'explain', fallback=True),
+                    max_templates=config.getint('PROFILING', 'max_templates', fallback=500)
+                )
+            return cls._shared
+
+    def wrap(self, connection):
+        return ProfiledConnection(connection, self)
+
+    # ========================================
+    # ENREGISTREMENT
+    # ========================================
+
+    def record(self, operation, params, method, elapsed, rows):
+        template = sql_template(operation)
+        slow = elapsed >= self.slow_query_s
+        with self.lock:
+            self.queries += 1
+            stats = self.templates.get(template)
+            if stats is None:
+                if len(self.templates) >= self.max_templates:
+                    self.dropped_templates += 1
+                    stats = None
+                else:
+                    stats = self.templates[template] = {
+                        'sql': template, 'method': method, 'calls': 0,
+                        'total_ms': 0.0, 'max_ms': 0.0, 'rows': 0, 'slow': 0
+                    }
+            if stats is not None:
+                ms = elapsed * 1000
+                stats['calls'] += 1
+                stats['total_ms'] += ms
+                stats['max_ms'] = max(stats['max_ms'], ms)
+                stats['rows'] += rows
+                stats['slow'] += slow
+            if slow:
+                self.slow_queries += 1
+                explain = self.explain and template not in self.explained
+                if explain:
+                    self.explained.add(template)
+        if slow:
+            entry = {
+                'date': datetime.now().isoformat(timespec='milliseconds'),
+                'method': method,
+                'duration_ms': round(elapsed * 1000, 3),
+                'rows': rows,
+                'sql': template
+            }
+            if explain and template.split(' ', 1)[0].lower() in EXPLAINABLE:
+                entry['explain'] = self._explain(operation, params)
+            self._write(entry)
+
+    def _explain(self, operation, params):
+        with self.explain_lock:
+            try:
+                if self.explain_connection is None or not self.explain_connection.is_connected():
+                    self.explain_connection = self.connect()
+                cursor = self.explain_connection.cursor(dictionary=True)
+                try:
+                    cursor.execute(f"EXPLAIN {sql_template(operation)}", params)
+                    return cursor.fetchall()
+                finally:
+                    cursor.close()
+            except Exception as e:
+                return [{'error': str(e)}]
+
+    def _write(self, entry):
+        if not self.slow_query_log:
+            return
+        line = json.dumps(entry, ensure_ascii=False, default=str)
+        with self.lock:
+            try:
+                with open(self.slow_query_log, 'a', encoding='utf-8') as log:
+                    log.write(line + '\n')
+            except OSError as e:
+                logger.error("Erreur d'écriture du journal des requêtes lentes: %s", e)
+
+    # ========================================
+    # CONSULTATION
+    # ========================================
+
+    def top(self, limit=20, order='total_ms'):
+        """Requêtes les plus coûteuses (order: total_ms, max_ms, calls, rows)"""
+        with self.lock:
+            rows = [dict(stats) for stats in self.templates.values()]
+        for stats in rows:
+            stats['avg_ms'] = round(stats['total_ms'] / stats['calls'], 3)
+            stats['total_ms'] = round(stats['total_ms'], 3)
+            stats['max_ms'] = round(stats['max_ms'], 3)
+        rows.sort(key=lambda stats: stats.get(order, 0), reverse=True)
+        return rows[:limit]
+
+    def reset(self):
+        with self.lock:
+            self.templates.clear()
+            self.explained.clear()
+            self.queries = self.slow_queries = self.dropped_templates = 0
+
+    def metrics(self):
+        with self.lock:
+            return {
+                'queries': self.queries,
+                'slow_queries': self.slow_queries,
+                'templates': len(self.templates),
+                'dropped_templates': self.dropped_templates,
+                'slow_query_ms': self.slow_query_s * 1000
+            }
+
+
+class ProfiledConnection:
+    """Connexion MySQL dont les curseurs sont profilés (le reste est délégué)"""
+
+    def __init__(self, connection, profiler):
+        self._connection = connection
+        self._profiler = profiler
+
+    def cursor(self, *args, **kwargs):
+        return ProfiledCursor(self._connection.cursor(*args, **kwargs), self._profiler)
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+class ProfiledCursor:
+    """
+    Curseur qui mesure chaque requête de execute() jusqu'à la lecture
+    de ses lignes (enregistrée à la requête suivante ou à close())
+    """
+
+    def __init__(self, cursor, profiler):
+        self._cursor = cursor
+        self._profiler = profiler
+        self._pending = None
+
+    def execute(self, operation, params=None, *args, **kwargs):
+        self._finish()
+        method = sys._getframe(1).f_code.co_name
+        started = time.perf_counter()
+        try:
+            return self._cursor.execute(operation, params, *args, **kwargs)
+        finally:
+            self._pending = [operation, params, method, time.perf_counter() - started, 0]
+
+    def executemany(self, operation, seq_params, *args, **kwargs):
+        self._finish()
+        method = sys._getframe(1).f_code.co_name
+        started = time.perf_counter()
+        try:
+            return self._cursor.executemany(operation, seq_params, *args, **kwargs)
+        finally:
+            # Plan EXPLAIN non capturé (une requête par jeu de paramètres)
+            self._pending = [operation, None, method, time.perf_counter() - started, 0]
+
+    def _fetch(self, fetch, *args):
+        started = time.perf_counter()
+        result = fetch(*args)
+        if self._pending is not None:
+            self._pending[3] += time.perf_counter() - started
+            if isinstance(result, list):
+                self._pending[4] += len(result)
+            elif result is not None:
+                self._pending[4] += 1
+        return result
+
+    def fetchone(self):
+        return self._fetch(self._cursor.fetchone)
+
+    def fetchall(self):
+        return self._fetch(self._cursor.fetchall)
+
+    def fetchmany(self, *args, **kwargs):
+        return self._fetch(lambda: self._cursor.fetchmany(*args, **kwargs))
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def _finish(self):
+        if self._pending is None:
+            return
+        operation, params, method, elapsed, rows = self._pending
+        self._pending = None
+        if self._cursor.description is None:
+            # INSERT/UPDATE/DELETE: lignes modifiées
+            rows = max(self._cursor.rowcount, 0)
+        try:
+            self._profiler.record(operation, params, method, elapsed, rows)
+        except Exception as e:
+            logger.error("Erreur du profileur de requêtes: %s", e)
+
+    def close(self):
+        self._finish()
+        return self._cursor.close()
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
@@ -0,0 +1,226 @@
+"""
+Limitation du nombre d'échecs de connexion
+Fenêtre glissante approchée (deux fenêtres fixes pondérées) stockée
+dans un count-min sketch: mémoire constante quel que soit le nombre
+de usernames ou d'IP vus
+"""
+
+import logging
+import math
+import threading
+import time
+import zlib
+from array import array
+
+logger = logging.getLogger(__name__)
+
+
+class CountMinWindow:
+    """
+    Compteurs approchés par clé sur une fenêtre glissante
+
+    Un count-min sketch (depth lignes de width compteurs) par fenêtre fixe;
+    la fenêtre précédente est pondérée par la part encore couverte:
+
+        estimation = précédente * (1 - écoulé / window) + courante
+
+    Les collisions ne peuvent que surestimer un compteur, jamais le sous-estimer.
+    """
+
+    def __init__(self, window, width=4096, depth=4):
+        self.window = float(window)
+        self.width = width
+        self.depth = depth
+        self.current = array('I', bytes(4 * width * depth))
+        self.previous = array('I', bytes(4 * width * depth))
+        self.window_start = self._window_start(time.time())
+        self.lock = threading.Lock()
+
+    def _window_start(self, now):
+        return now - (now % self.window)
+
+    def _slots(self, key):
+        data = key.encode('utf-8')
+        return [row * self.width + zlib.crc32(data, row * 0x9E3779B1 & 0xFFFFFFFF) % self.width
+                for row in range(self.depth)]
+
+    def _rotate(self, now):
+        start = self._window_start(now)
+        if start == self.window_start:
+            return
+        if start - self.window_start == self.window:
+            self.previous, self.current = self.current, self.previous
+        else:
+            # Plus d'une fenêtre sans activité: tout est expiré
+            self.previous = array('I', bytes(4 * self.width * self.depth))
+        self.current = array('I', bytes(4 * self.width * self.depth))
+        self.window_start = start
+
+    def _estimate(self, slots, now):
+        previous = min(self.previous[i] for i in slots)
+        current = min(self.current[i] for i in slots)
+        elapsed = now - self.window_start
+        return previous, current, elapsed
+
+    def hit(self, key, limit, dry_run=False):
+        """
+        Compte une tentative si la limite n'est pas atteinte
+
+        Args:
+            dry_run (bool): Vérifier la limite sans compter la tentative
+
+        Returns:
+            float: 0 si autorisée, sinon délai (s) avant la prochaine tentative
+        """
+        now = time.time()
+        slots = self._slots(key)
+        with self.lock:
+            self._rotate(now)
+            previous, current, elapsed = self._estimate(slots, now)
+            weighted = previous * (1 - elapsed / self.window) + current
+            if weighted + 1 > limit:
+                return retry_after(previous, current, elapsed, self.window, limit)
+            if not dry_run:
+                for i in slots:
+                    self.current[i] += 1
+            return 0.0
+
+
+def retry_after(previous, current, elapsed, window, limit):
+    """
+    Délai avant que l'estimation glissante repasse sous la limite
+
+    previous * (1 - t / window) + current + 1 <= limit
+    """
+    if current + 1 > limit:
+        # La fenêtre courante seule suffit à bloquer: attendre qu'elle devienne
+        # la précédente et décroisse assez
+        t = window - elapsed + window * (1 - (limit - 1) / max(current, 1))
+    else:
+        t = window * (1 - (limit - current - 1) / previous) - elapsed
+    return max(math.ceil(t), 1)
+
+
+class RedisWindow:
+    """
+    Même algorithme partagé entre workers via Redis
+    (un compteur exact par clé et par fenêtre, expirant après deux fenêtres)
+
+    Si Redis ne répond pas (arrêt, délai dépassé), les tentatives sont
+    comptées localement par fallback (CountMinWindow) jusqu'à son retour.
+    """
+
+    def __init__(self, client, window, prefix='ratelimit', fallback=None):
+        from redis.exceptions import RedisError
+        self.client = client
+        self.window = float(window)
+        self.prefix = prefix
+        self.fallback = fallback or CountMinWindow(window)
+        self.errors = RedisError
+        self.degraded = False
+
+    def hit(self, key, limit, dry_run=False):
+        try:
+            wait = self._hit(key, limit, dry_run)
+        except self.errors as e:
+            if not self.degraded:
+                self.degraded = True
+                logger.warning("Redis indisponible (%s): limitation des connexions en mémoire locale", e)
+            return self.fallback.hit(key, limit, dry_run)
+        if self.degraded:
+            self.degraded = False
+            logger.info("Redis de nouveau disponible pour la limitation des connexions")
+        return wait
+
+    def _hit(self, key, limit, dry_run):
+        now = time.time()
+        index = int(now // self.window)
+        elapsed = now - index * self.window
+        current_key = f"{self.prefix}:{key}:{index}"
+        previous_key = f"{self.prefix}:{key}:{index - 1}"
+
+        previous, current = self.client.mget(previous_key, current_key)
+        previous = int(previous or 0)
+        current = int(current or 0)
+        weighted = previous * (1 - elapsed / self.window) + current
+        if weighted + 1 > limit:
+            return retry_after(previous, current, elapsed, self.window, limit)
+        if dry_run:
+            return 0.0
+
+        pipeline = self.client.pipeline()
+        pipeline.incr(current_key)
+        pipeline.expire(current_key, int(self.window * 2) + 1)
+        pipeline.execute()
+        return 0.0
+
+
+class LoginThrottle:
+    """
+    Limites par username et par IP, vérifiées avant toute requête SQL
+    ou vérification bcrypt
+
+    Seuls les échecs sont comptés (failure()): les connexions réussies
+    d'une salle de TP ou d'un NAT partagé n'épuisent pas le budget de l'IP.
+
+    Args:
+        per_user (int): Échecs autorisés par username et par fenêtre
+        per_ip (int): Échecs autorisés par IP et par fenêtre
+        user_counter, ip_counter: CountMinWindow ou RedisWindow
+    """
+
+    def __init__(self, per_user, per_ip, user_counter, ip_counter):
+        self.per_user = per_user
+        self.per_ip = per_ip
+        self.user_counter = user_counter
+        self.ip_counter = ip_counter
+        self.blocked = 0
+
+    @classmethod
+    def from_config(cls, config):
+        """Construit les limites depuis la section [RATE_LIMIT] de config.ini"""
+        window = config.getfloat('RATE_LIMIT', 'window', fallback=300)
+        per_user = config.getint('RATE_LIMIT', 'login_per_user', fallback=10)
+        per_ip = config.getint('RATE_LIMIT', 'login_per_ip', fallback=50)
+        backend = config.get('RATE_LIMIT', 'backend', fallback='memory')
+
+        width = config.getint('RATE_LIMIT', 'sketch_width', fallback=4096)
+        depth = config.getint('RATE_LIMIT', 'sketch_depth', fallback=4)
+        user_counter = CountMinWindow(window, width, depth)
+        ip_counter = CountMinWindow(window, width, depth)
+
+        if backend == 'redis':
+            try:
+                import redis
+                timeout = config.getfloat('RATE_LIMIT', 'redis_timeout', fallback=0.2)
+                client = redis.Redis.from_url(
+                    config.get('RATE_LIMIT', 'redis_url', fallback='redis://localhost:6379/0'),
+                    socket_timeout=timeout, socket_connect_timeout=timeout)
+                # Compteurs locaux: secours quand Redis ne répond pas
+                return cls(per_user, per_ip,
+                           RedisWindow(client, window, 'login:user', user_counter),
+                           RedisWindow(client, window, 'login:ip', ip_counter))
+            except ImportError:
+                logger.warning("Module redis absent: limitation des connexions en mémoire locale")
+
+        return cls(per_user, per_ip, user_counter, ip_counter)
+
+    def check(self, username, ip_address, scope='etudiant'):
+        """
+        Vérifie les limites avant l'authentification, sans compter la tentative
+
+        Returns:
+            int: 0 si autorisée, sinon délai Retry-After (s)
+        """
+        wait = self.ip_counter.hit(f"{scope}:{ip_address}", self.per_ip, dry_run=True)
+        if not wait and username:
+            wait = self.user_counter.hit(f"{scope}:{username.lower()}", self.per_user, dry_run=True)
+        if wait:
+            self.blocked += 1
+        return int(wait)
+
+    def failure(self, username, ip_address, scope='etudiant'):
+        """Compte un échec d'authentification (username inconnu, mot de passe faux)"""
+        if username:
+            self.user_counter.hit(f"{scope}:{username.lower()}", self.per_user)
+        self.ip_counter.hit(f"{scope}:{ip_address}", self.per_ip)
@@ -0,0 +1,159 @@
+"""
+Index inversé en mémoire pour la recherche dans les messages
+Utilisé quand l'index FULLTEXT MySQL n'est pas disponible
+"""
+
+import math
+import re
+import threading
+import unicodedata
+
+TOKEN_RE = re.compile(r'\w+')
+MIN_TOKEN_LENGTH = 2
+
+# Paramètres du classement BM25
+K1 = 1.2
+B = 0.75
+
+
+def tokenize(text):
+    """Découpe un texte en termes normalisés (minuscules, sans accents)"""
+    normalized = unicodedata.normalize('NFKD', text.lower())
+    normalized = ''.join(c for c in normalized if not unicodedata.combining(c))
+    return [t for t in TOKEN_RE.findall(normalized) if len(t) >= MIN_TOKEN_LENGTH]
+
+
+class InvertedIndex:
+    """
+    Index inversé terme -> {message_id: fréquence}
+
+    Les messages en attente sont indexés aussi (pour pouvoir être rendus
+    visibles à la validation sans relire leur contenu) mais ne sont jamais
+    retournés tant qu'ils ne sont pas validés.
+    """
+
+    def __init__(self):
+        self.postings = {}
+        # message_id -> {'terms': {...}, 'length': n, 'valide': bool,
+        #                'est_prive': bool, 'id_expediteur': id, 'id_destinataire': id}
+        self.documents = {}
+        self.total_length = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.documents)
+
+    def build(self, messages):
+        """Indexe un lot de messages (dicts avec id, contenu, valide, est_prive...)"""
+        for message in messages:
+            self.add(message)
+
+    def add(self, message):
+        """Ajoute ou remplace un message dans l'index"""
+        terms = {}
+        for token in tokenize(message['contenu']):
+            terms[token] = terms.get(token, 0) + 1
+
+        with self.lock:
+            self._remove(message['id'])
+            document = {
+                'terms': terms,
+                'length': sum(terms.values()),
+                'valide': bool(message.get('valide')),
+                'est_prive': bool(message.get('est_prive')),
+                'id_expediteur': message.get('id_expediteur'),
+                'id_destinataire': message.get('id_destinataire')
+            }
+            self.documents[message['id']] = document
+            self.total_length += document['length']
+            for term, frequency in terms.items():
+                self.postings.setdefault(term, {})[message['id']] = frequency
+
+    def mark_valid(self, message_id):
+        """Rend un message indexé visible (validation par un admin)"""
+        with self.lock:
+            document = self.documents.get(message_id)
+            if document:
+                document['valide'] = True
+
+    def remove(self, message_id):
+        """Retire un message de l'index (rejet)"""
+        with self.lock:
+            self._remove(message_id)
+
+    def _remove(self, message_id):
+        document = self.documents.pop(message_id, None)
+        if document is None:
+            return
+        self.total_length -= document['length']
+        for term in document['terms']:
+            posting = self.postings.get(term)
+            if posting is not None:
+                posting.pop(message_id, None)
+                if not posting:
+                    del self.postings[term]
+
+    def search(self, query, viewer_id=None, limit=20, after=None):
+        """
+        Recherche classée par pertinence (BM25) puis par id décroissant
+
+        Args:
+            query (str): Texte recherché
+            viewer_id (int): Étudiant connecté (voit ses messages privés)
+            limit (int): Nombre maximum de résultats
+            after (tuple): Clé (score, id) du dernier résultat lu
+
+        Returns:
+            list: [(message_id, score), ...]
+        """
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+
+        with self.lock:
+            count = len(self.documents)
+            if count == 0:
+                return []
+            average_length = self.total_length / count
+            scores = {}
+            for term in terms:
+                posting = self.postings.get(term)
+                if not posting:
+                    continue
+                idf = math.log(1 + (count - len(posting) + 0.5) / (len(posting) + 0.5))
+                for message_id, frequency in posting.items():
+                    document = self.documents[message_id]
+                    if not self._visible(document, viewer_id):
+                        continue
+                    norm = K1 * (1 - B + B * document['length'] / average_length)
+                    scores[message_id] = scores.get(message_id, 0.0) + \
+                        idf * frequency * (K1 + 1) / (frequency + norm)
+
+        results = sorted(scores.items(), key=lambda item: (item[1], item[0]), reverse=True)
+        if after:
+            last_score, last_id = after
+            results = [(message_id, score) for message_id, score in results
+                       if score < last_score or (score == last_score and message_id < last_id)]
+        return results[:limit]
+
+    @staticmethod
+    def _visible(document, viewer_id):
+        if not document['valide']:
+            return False
+        if not document['est_prive']:
+            return True
+        return viewer_id is not None and viewer_id in (
+            document['id_expediteur'], document['id_destinataire'])
+
+    # ========================================
+    # LISTENER DU DATABASEMANAGER
+    # ========================================
+
+    def handle_event(self, event, data):
+        """Maintient l'index à jour après chaque écriture"""
+        if event == 'message_added':
+            self.add(data['message'])
+        elif event == 'message_validated':
+            self.mark_valid(int(data['message_id']))
+        elif event == 'message_rejected':
+            self.remove(int(data['message_id']))
@@ -3,31 +3,334 @@ Serveur Flask pour Forum de Discussion - EST Salé
 API REST + WebSocket (Socket.IO)
 """
 
-from flask import Flask, request, jsonify, session, send_from_directory
+from flask import Flask, Response, request, jsonify, session, send_from_directory
 from flask_cors import CORS
-from flask_socketio import SocketIO, emit, join_room, leave_room
-import bcrypt
-from db_manager import DatabaseManager
+from flask_socketio import SocketIO, emit, join_room, leave_room, ConnectionRefusedError
+from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
+from password_hasher import PasswordHasher, HasherBusy
+from db_manager import DatabaseManager, DASHBOARD_SECTIONS, LeaseConflict, MessageNotPending
+from admin_feed import AdminFeed
+from message_router import MessageRouter, user_room
+from search_index import InvertedIndex
+from user_index import AvailabilityIndex, PrefixIndex
+from moderation_rules import RuleEngine, ACCEPT, REJECT
+from flood_detector import FloodDetector, DUPLICATE, FLOOD, SPAM_WAVE
+from session_store import SessionStore
+from metrics import registry, instrument_app, instrument_database, instrument_socketio
+from logging_setup import setup_logging, install_request_ids, install_socket_ids
+from tracing import setup_tracing, trace_app, trace_socketio, trace_database
+from message_purger import MessagePurger
+from health import HealthMonitor
+from migrations import Migrator
+from rate_limiter import LoginThrottle
+from pagination import build_page, decode_cursor, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 import configparser
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
+import logging
 import uuid
 
 # Configuration
 config = configparser.ConfigParser()
 config.read('config.ini')
 
+# Pool bcrypt: démarré avant le premier thread du serveur (journalisation,
+# connexions, tâches de fond)
+password_hasher = PasswordHasher.from_config(config)
+password_hasher.warm_up()
+
+# Journalisation structurée (file bornée + thread d'écriture)
+logging_runtime = setup_logging(config)
+logger = logging.getLogger(__name__)
+
 app = Flask(__name__)
 app.config['SECRET_KEY'] = config['SERVER'].get('secret_key', 'votre_secret_key_ici')
 CORS(app, resources={r"/*": {"origins": "*"}})
 socketio = SocketIO(app, cors_allowed_origins="*")
 
+# Métriques Prometheus (/metrics): routes, méthodes SQL, événements Socket.IO
+instrument_app(app)
+instrument_socketio(socketio)
+instrument_database(DatabaseManager)
+
+# Identifiants de corrélation des journaux (requête HTTP, événement Socket.IO)
+install_request_ids(app)
+install_socket_ids(socketio)
+
+# Traces: routes, événements Socket.IO, méthodes SQL et émissions ([TRACING])
+tracer = setup_tracing(config)
+if tracer.enabled:
+    trace_app(app)
+    trace_socketio(socketio)
+    trace_database(DatabaseManager)
+
+# Limitation des tentatives de connexion (avant toute requête SQL ou bcrypt)
+login_throttle = LoginThrottle.from_config(config)
+
 # Gestionnaire de base de données
 db_manager = DatabaseManager()
 
+# Schéma: les migrations sont appliquées au déploiement (python migrations.py)
+pending_migrations = Migrator(db_manager.connection, db_manager.backend.dialect).pending()
+if pending_migrations:
+    logger.warning("Schéma en retard de %d migration(s) (%s): lancer 'python migrations.py'",
+                   len(pending_migrations), ', '.join(f"{m.version:03d}" for m in pending_migrations))
+
+# Sessions côté serveur (cache LRU + table 'session', maintenance en arrière-plan)
+session_store = SessionStore.from_config(config, db_manager, DatabaseManager)
+session_store.start()
+
+# Suppression définitive des messages rejetés (par lots, en heures creuses)
+message_purger = MessagePurger.from_config(config, DatabaseManager)
+message_purger.start()
+
+# Deltas temps réel du tableau de bord admin (room 'admin')
+admin_feed = AdminFeed(socketio, db_manager)
+
+# Diffusion des messages (publics à tous, privés à l'expéditeur et au destinataire)
+message_router = MessageRouter(
+    socketio, db_manager,
+    capacity=config.getint('MODERATION', 'pending_cache_size', fallback=10000)
+)
+
+# Recherche: index FULLTEXT MySQL, sinon index inversé en mémoire
+search_index = None
+search_mode = config.get('SEARCH', 'mode', fallback='auto')
+if search_mode == 'memory' or (search_mode == 'auto' and not db_manager.has_fulltext_index()):
+    search_index = InvertedIndex()
+    for batch in db_manager.iter_indexable_messages():
+        search_index.build(batch)
+    db_manager.add_listener(search_index.handle_event)
+    logger.info("Recherche en mémoire: %s messages indexés", len(search_index))
+
+# Usernames/pseudos déjà pris (inscription sans requête SQL)
+availability_index = AvailabilityIndex.from_config(config)
+availability_index.rebuild(db_manager.iter_user_identifiers())
+db_manager.add_listener(availability_index.handle_event)
+logger.info("Index de disponibilité: %s étudiants", len(availability_index))
+
+# Étudiants actifs par préfixe (suggestions et résolution des destinataires)
+recipient_index = PrefixIndex()
+recipient_index.rebuild(db_manager.iter_user_identifiers())
+db_manager.add_listener(recipient_index.handle_event)
+logger.info("Index des destinataires: %s étudiants actifs", len(recipient_index))
+
+# Pré-modération automatique (None: file de modération pour tout compte non approuvé)
+moderation_rules = None
+if config.getboolean('MODERATION', 'auto_moderation', fallback=True):
+    moderation_rules = RuleEngine.from_config(config)
+
+# Doublons et flood détectés avant toute écriture en base
+flood_detector = FloodDetector.from_config(config)
+
 # Dictionnaire pour stocker les utilisateurs connectés
 # Format: {username: {'sid': socket_id, 'pseudo': pseudo}}
 connected_users = {}
 
+# Identité résolue une seule fois au 'connect' de chaque socket
+# Format: {sid: {'id', 'username', 'pseudo', 'compte_approuve'}} ou {sid: {'admin_id'}}
+socket_sessions = {}
+
+# Jauges et compteurs des modules exportés par /metrics
+registry.gauge('connected_sockets', "Sockets authentifiés", lambda: len(socket_sessions))
+registry.gauge('online_users', "Étudiants présents dans le chat", lambda: len(connected_users))
+registry.add_collector('logging', logging_runtime.metrics)
+registry.add_collector('tracing', tracer.metrics)
+registry.add_collector('hasher', password_hasher.metrics)
+registry.add_collector('sessions', session_store.metrics)
+registry.add_collector('router', message_router.metrics)
+registry.add_collector('flood', flood_detector.metrics)
+registry.add_collector('purge', message_purger.metrics)
+if moderation_rules is not None:
+    registry.add_collector('moderation', moderation_rules.metrics)
+if db_manager.profiler is not None:
+    registry.add_collector('query_profiler', db_manager.profiler.metrics)
+
+# Santé (/healthz) et aptitude à servir (/readyz): connexion MySQL, retard
+# des threads, occupation des pools et files d'écriture différée
+health_monitor = HealthMonitor.from_config(config, DatabaseManager)
+health_monitor.add_connection('server', db_manager.connection_status.snapshot)
+health_monitor.add_pool('hasher', lambda: (password_hasher.in_flight, password_hasher.max_concurrency))
+health_monitor.add_queue('logging', lambda: (logging_runtime.queue.qsize(), logging_runtime.queue.maxsize))
+health_monitor.add_queue('sessions', lambda: (len(session_store.dirty), session_store.capacity))
+if tracer.writer is not None:
+    health_monitor.add_queue('tracing', lambda: (tracer.writer.queue.qsize(), tracer.writer.queue.maxsize))
+health_monitor.start()
+registry.add_collector('health', health_monitor.metrics)
+
+# Jetons signés remis par /login et /admin/login pour authentifier le socket
+token_serializer = URLSafeTimedSerializer(app.config['SECRET_KEY'], salt='socket-auth')
+SOCKET_TOKEN_MAX_AGE = config.getint('SECURITY', 'socket_token_max_age', fallback=43200)
+
+# File de modération: taille des lots réservés et durée du bail (s)
+CLAIM_BATCH_SIZE = config.getint('MODERATION', 'claim_batch_size', fallback=10)
+CLAIM_LEASE_SECONDS = config.getint('MODERATION', 'lease_seconds', fallback=120)
+
+# Réponse à l'expéditeur d'un message ignoré par le détecteur de flood
+FLOOD_MESSAGES = {
+    DUPLICATE: 'Message identique à un message récent: ignoré',
+    FLOOD: 'Trop de messages envoyés: patientez avant de réessayer',
+    SPAM_WAVE: 'Ce message a déjà été envoyé par plusieurs étudiants: ignoré'
+}
+
+# Clés de tri des listes paginées
+DATE_KEY = ('date_inscription', 'id')
+MESSAGE_KEY = ('date_envoi', 'id')
+PSEUDO_KEY = ('pseudo',)
+LOGIN_KEY = ('date_action', 'id')
+SEARCH_KEY = ('score', 'id')
+
+# ========================================
+# UTILITAIRES
+# ========================================
+
+def format_dates(rows, fields=('date_inscription', 'date_envoi', 'date_validation',
+                              'date_fin_reservation')):
+    """Convertit les dates des lignes en ISO 8601 (sur place)"""
+    for row in rows:
+        for field in fields:
+            if row.get(field):
+                row[field] = row[field].isoformat()
+    return rows
+
+def resolve_socket_identity(auth):
+    """
+    Identifie un socket à partir du jeton signé (auth.token) ou,
+    à défaut, du cookie de session Flask
+    
+    Returns:
+        dict: Identité à mettre en cache, ou None si non authentifié
+    """
+    claims = {}
+    token = auth.get('token') if isinstance(auth, dict) else None
+    if token:
+        try:
+            claims = token_serializer.loads(token, max_age=SOCKET_TOKEN_MAX_AGE)
+        except (BadSignature, SignatureExpired):
+            return None
+    else:
+        if session.get('is_admin'):
+            claims = {'admin_id': session.get('admin_id')}
+        elif session.get('user_id'):
+            claims = {'user_id': session.get('user_id'),
+                      'session_id': session.get('session_id')}
+    
+    if claims.get('admin_id'):
+        return {'admin_id': claims['admin_id']}
+    
+    if claims.get('user_id'):
+        # La session doit être active côté serveur (logout, révocation, expiration)
+        record = session_store.get(claims.get('session_id'))
+        if record is None or record['id_etudiant'] != claims['user_id']:
+            return None
+        user = db_manager.get_user_by_id(claims['user_id'])
+        if user and user['compte_actif']:
+            return {
+                'id': user['id'],
+                'username': user['username'],
+                'pseudo': user['pseudo'],
+                'compte_approuve': bool(user['compte_approuve']),
+                'session_id': record['session_id']
+            }
+    return None
+
+def refresh_socket_sessions(event, data):
+    """Listener: répercute l'approbation d'un compte sur ses sockets ouverts"""
+    if event == 'user_approved':
+        for identity in socket_sessions.values():
+            if identity.get('username') == data['username']:
+                identity['compte_approuve'] = True
+
+db_manager.add_listener(refresh_socket_sessions)
+
+def current_admin_id():
+    """
+    Admin à l'origine d'une requête HTTP: session Flask, sinon jeton
+    signé remis par /admin/login (en-tête Authorization: Bearer ...)
+    """
+    if session.get('admin_id'):
+        return session['admin_id']
+    header = request.headers.get('Authorization', '')
+    if not header.startswith('Bearer '):
+        return None
+    try:
+        claims = token_serializer.loads(header[7:], max_age=SOCKET_TOKEN_MAX_AGE)
+    except (BadSignature, SignatureExpired):
+        return None
+    return claims.get('admin_id')
+
+def current_user_id():
+    """
+    Étudiant à l'origine d'une requête HTTP: session Flask, sinon jeton
+    signé remis par /login (en-tête Authorization: Bearer ...); la
+    session doit être encore active côté serveur
+    """
+    claims = {'user_id': session.get('user_id'), 'session_id': session.get('session_id')}
+    if not claims['user_id']:
+        header = request.headers.get('Authorization', '')
+        if not header.startswith('Bearer '):
+            return None
+        try:
+            claims = token_serializer.loads(header[7:], max_age=SOCKET_TOKEN_MAX_AGE)
+        except (BadSignature, SignatureExpired):
+            return None
+    record = session_store.get(claims.get('session_id'))
+    if record is None or record['id_etudiant'] != claims.get('user_id'):
+        return None
+    return claims['user_id']
+
+def lease_conflict_response(e):
+    """Réponse 409 quand un autre modérateur a réservé le message"""
+    return jsonify({"error": "Message réservé par un autre modérateur", "detail": str(e)}), 409
+
+def hasher_busy_response():
+    """Réponse 503 quand le pool bcrypt est saturé"""
+    response = jsonify({"error": "Serveur surchargé, réessayez dans un instant"})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+def rehash_password(password, hashed, save):
+    """
+    Re-hash au coût configuré après une connexion réussie (best-effort:
+    si le pool bcrypt est saturé, la connexion continue et le re-hash
+    sera refait à la prochaine connexion)
+    """
+    if not password_hasher.needs_rehash(hashed):
+        return
+    try:
+        save(password_hasher.hash(password))
+    except (HasherBusy, BrokenProcessPool) as e:
+        logger.warning("Re-hash du mot de passe reporté: %s", e)
+
+def too_many_attempts_response(retry_after):
+    """Réponse 429 quand la limite de tentatives de connexion est atteinte"""
+    response = jsonify({"error": "Trop de tentatives de connexion, réessayez plus tard"})
+    response.headers['Retry-After'] = str(retry_after)
+    return response, 429
+
+def parse_list_args(key):
+    """
+    Lit les paramètres communs des listes paginées
+    Query: limit, cursor, q (préfixe de nom), from, to (dates ISO)
+    
+    Args:
+        key (tuple): Clé de tri de la liste (forme attendue du curseur)
+    
+    Returns:
+        tuple: (limit, after, filters)
+        
+    Raises:
+        ValueError: Paramètre invalide (curseur, date)
+    """
+    limit = request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    after = decode_cursor(request.args.get('cursor'), key)
+    filters = {'prefix': request.args.get('q') or None}
+    for arg, key in (('from', 'date_from'), ('to', 'date_to')):
+        value = request.args.get(arg)
+        filters[key] = datetime.fromisoformat(value) if value else None
+    return limit, after, filters
+
 # ========================================
 # ROUTES D'AUTHENTIFICATION
 # ========================================
@@ -50,18 +353,27 @@ def register():
         if not all([nom, prenom, pseudo, username, password]):
             return jsonify({"error": "Tous les champs sont requis"}), 400
         
-        # Vérifier si l'utilisateur existe déjà
-        if db_manager.get_user_by_username(username):
-            return jsonify({"error": "Ce username existe déjà"}), 409
-        
-        # Hash du mot de passe
-        hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+        # Vérifier l'unicité du username et du pseudo (réservés jusqu'à l'insertion)
+        conflicts = availability_index.reserve(username, pseudo)
+        if conflicts:
+            return jsonify({
+                "error": f"Ce {conflicts[0]} existe déjà",
+                "fields": conflicts
+            }), 409
         
-        # Ajouter l'utilisateur (compte INACTIF par défaut)
-        user_id = db_manager.add_user(
-            nom, prenom, pseudo, username, 
-            hashed_password.decode('utf-8')
-        )
+        user_id = None
+        try:
+            # Hash du mot de passe (pool de processus dédié)
+            hashed_password = password_hasher.hash(password)
+            
+            # Ajouter l'utilisateur (compte INACTIF par défaut)
+            user_id = db_manager.add_user(
+                nom, prenom, pseudo, username, 
+                hashed_password
+            )
+        finally:
+            if not user_id:
+                availability_index.release(username, pseudo)
         
         if user_id:
             return jsonify({
@@ -72,10 +384,27 @@ def register():
         else:
             return jsonify({"error": "Erreur lors de l'inscription"}), 500
             
+    except HasherBusy:
+        return hasher_busy_response()
     except Exception as e:
-        print(f"Erreur dans /register: {e}")
+        logger.exception("Erreur dans /register: %s", e)
         return jsonify({"error": str(e)}), 500
 
+@app.route('/register/check', methods=['GET'])
+def register_check():
+    """
+    Disponibilité d'un username et/ou d'un pseudo (validation pendant la saisie)
+    Query: ?username=...&pseudo=...
+    """
+    result = {}
+    for field in AvailabilityIndex.FIELDS:
+        value = request.args.get(field, '').strip()
+        if value:
+            result[field] = availability_index.is_available(field, value)
+    if not result:
+        return jsonify({"error": "username ou pseudo requis"}), 400
+    return jsonify(result), 200
+
 @app.route('/login', methods=['POST'])
 def login():
     """
@@ -92,15 +421,21 @@ def login():
         if not username or not password:
             return jsonify({"error": "Username et password requis"}), 400
         
+        retry_after = login_throttle.check(username, ip_address)
+        if retry_after:
+            return too_many_attempts_response(retry_after)
+        
         # Récupérer l'utilisateur
         user = db_manager.get_user_by_username(username)
         
-        if not user:
+        # Vérifier le mot de passe (seuls les échecs sont limités)
+        if not user or not password_hasher.verify(password, user['password']):
+            login_throttle.failure(username, ip_address)
             return jsonify({"error": "Identifiants incorrects"}), 401
         
-        # Vérifier le mot de passe
-        if not bcrypt.checkpw(password.encode('utf-8'), user['password'].encode('utf-8')):
-            return jsonify({"error": "Identifiants incorrects"}), 401
+        # Coût bcrypt modifié dans config.ini: re-hash transparent
+        rehash_password(password, user['password'],
+                        lambda hashed: db_manager.update_password(user['id'], hashed))
         
         # Vérifier si le compte est actif
         if not user['compte_actif']:
@@ -114,6 +449,7 @@ def login():
         session['user_id'] = user['id']
         session['username'] = username
         session['session_id'] = session_id
+        session_store.create(session_id, user, ip_address, user_agent)
         
         # Enregistrer la connexion
         db_manager.log_login(
@@ -131,33 +467,39 @@ def login():
                 "prenom": user['prenom'],
                 "compte_approuve": user['compte_approuve']
             },
-            "session_id": session_id
+            "session_id": session_id,
+            "socket_token": token_serializer.dumps({
+                'user_id': user['id'],
+                'session_id': session_id
+            })
         }), 200
         
+    except HasherBusy:
+        return hasher_busy_response()
     except Exception as e:
-        print(f"Erreur dans /login: {e}")
+        logger.exception("Erreur dans /login: %s", e)
         return jsonify({"error": str(e)}), 500
 
 @app.route('/logout', methods=['POST'])
 def logout():
     """Déconnexion d'un utilisateur"""
     try:
-        username = session.get('username')
-        if username:
-            user = db_manager.get_user_by_username(username)
-            if user:
-                db_manager.log_login(
-                    user['id'], username, user['pseudo'], 
-                    'LOGOUT', request.remote_addr, 
-                    request.headers.get('User-Agent'),
-                    session.get('session_id')
-                )
+        session_id = session.get('session_id')
+        record = session_store.get(session_id)
+        if record:
+            db_manager.log_login(
+                record['id_etudiant'], record['username'], record['pseudo'], 
+                'LOGOUT', request.remote_addr, 
+                request.headers.get('User-Agent'),
+                session_id
+            )
+            session_store.revoke(session_id)
         
         session.clear()
         return jsonify({"message": "Déconnexion réussie"}), 200
         
     except Exception as e:
-        print(f"Erreur dans /logout: {e}")
+        logger.exception("Erreur dans /logout: %s", e)
         return jsonify({"error": str(e)}), 500
 
 # ========================================
@@ -181,9 +523,65 @@ def get_messages():
         return jsonify(messages), 200
         
     except Exception as e:
-        print(f"Erreur dans /messages: {e}")
+        logger.exception("Erreur dans /messages: %s", e)
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/messages/search', methods=['GET'])
+def search_messages():
+    """
+    Recherche plein texte dans les messages validés (paginé, par pertinence)
+    Query: q, limit, cursor
+    Les messages privés ne sont visibles que par l'expéditeur et le destinataire.
+    """
+    try:
+        text = (request.args.get('q') or '').strip()
+        if not text:
+            return jsonify({"error": "Paramètre q requis"}), 400
+        limit, after, _ = parse_list_args(SEARCH_KEY)
+        # Session révoquée ou expirée: messages publics seulement
+        viewer_id = current_user_id()
+        
+        if search_index is None:
+            messages = db_manager.search_messages(text, viewer_id, limit + 1, after)
+        else:
+            hits = search_index.search(text, viewer_id, limit + 1, after)
+            rows = {m['id']: m for m in db_manager.get_messages_by_ids([h[0] for h in hits])}
+            messages = []
+            for message_id, score in hits:
+                if message_id in rows:
+                    rows[message_id]['score'] = score
+                    messages.append(rows[message_id])
+        
+        page = build_page(messages, limit, SEARCH_KEY)
+        format_dates(page['items'])
+        return jsonify(page), 200
+        
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.exception("Erreur dans /messages/search: %s", e)
         return jsonify({"error": str(e)}), 500
 
+@app.route('/users/suggest', methods=['GET'])
+def suggest_users():
+    """
+    Suggestions de destinataires (étudiants actifs) pendant la saisie
+    Query: q (début du pseudo ou du username), limit (défaut 10, max 20)
+    """
+    user_id = current_user_id()
+    if not user_id:
+        return jsonify({"error": "Non authentifié"}), 401
+    
+    prefix = (request.args.get('q') or '').strip()
+    if not prefix:
+        return jsonify([]), 200
+    try:
+        limit = min(max(int(request.args.get('limit', 10)), 1), 20)
+    except ValueError:
+        return jsonify({"error": "limit invalide"}), 400
+    users = recipient_index.suggest(prefix, limit, exclude_id=user_id)
+    return jsonify(users), 200
+
 # ========================================
 # ROUTES D'ADMINISTRATION
 # ========================================
@@ -199,13 +597,18 @@ def admin_login():
         if not username or not password:
             return jsonify({"error": "Identifiants requis"}), 400
         
+        retry_after = login_throttle.check(username, request.remote_addr, scope='admin')
+        if retry_after:
+            return too_many_attempts_response(retry_after)
+        
         admin = db_manager.get_admin_by_username(username)
         
-        if not admin:
+        if not admin or not password_hasher.verify(password, admin['password']):
+            login_throttle.failure(username, request.remote_addr, scope='admin')
             return jsonify({"error": "Identifiants incorrects"}), 401
         
-        if not bcrypt.checkpw(password.encode('utf-8'), admin['password'].encode('utf-8')):
-            return jsonify({"error": "Identifiants incorrects"}), 401
+        rehash_password(password, admin['password'],
+                        lambda hashed: db_manager.update_admin_password(admin['id'], hashed))
         
         session['admin_id'] = admin['id']
         session['admin_username'] = username
@@ -218,11 +621,14 @@ def admin_login():
                 "username": admin['username'],
                 "nom": admin['nom'],
                 "prenom": admin['prenom']
-            }
+            },
+            "socket_token": token_serializer.dumps({'admin_id': admin['id']})
         }), 200
         
+    except HasherBusy:
+        return hasher_busy_response()
     except Exception as e:
-        print(f"Erreur dans /admin/login: {e}")
+        logger.exception("Erreur dans /admin/login: %s", e)
         return jsonify({"error": str(e)}), 500
 
 @app.route('/admin/stats', methods=['GET'])
@@ -232,40 +638,216 @@ def get_admin_stats():
         stats = db_manager.get_stats()
         return jsonify(stats), 200
     except Exception as e:
-        print(f"Erreur dans /admin/stats: {e}")
+        logger.exception("Erreur dans /admin/stats: %s", e)
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/admin/dashboard', methods=['GET'])
+def get_admin_dashboard():
+    """
+    Récupère tout le tableau de bord en une requête (instantané cohérent)
+    Query: sections=stats,pending_accounts,... (optionnel, toutes par défaut),
+           limit (taille de la première page de chaque liste)
+    """
+    try:
+        if not current_admin_id():
+            return jsonify({"error": "Non authentifié"}), 401
+        
+        sections = DASHBOARD_SECTIONS
+        requested = request.args.get('sections')
+        if requested:
+            sections = [s.strip() for s in requested.split(',') if s.strip()]
+            unknown = [s for s in sections if s not in DASHBOARD_SECTIONS]
+            if unknown:
+                return jsonify({
+                    "error": f"Sections inconnues: {', '.join(unknown)}",
+                    "sections": list(DASHBOARD_SECTIONS)
+                }), 400
+        
+        limit = request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        
+        # Version lue avant l'instantané: les deltas suivants restent applicables
+        version = admin_feed.current_version()
+        dashboard = db_manager.get_dashboard(sections, limit + 1)
+        if dashboard is None:
+            return jsonify({"error": "Erreur lors de la lecture du tableau de bord"}), 500
+        
+        # Première page de chaque liste
+        keys = {
+            'pending_accounts': DATE_KEY,
+            'unapproved_accounts': DATE_KEY,
+            'pending_messages': MESSAGE_KEY,
+            'users': PSEUDO_KEY
+        }
+        for section, key in keys.items():
+            if section in dashboard:
+                page = build_page(dashboard[section], limit, key)
+                format_dates(page['items'])
+                dashboard[section] = page
+        
+        dashboard['version'] = version
+        return jsonify(dashboard), 200
+        
+    except Exception as e:
+        logger.exception("Erreur dans /admin/dashboard: %s", e)
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/admin/hasher_stats', methods=['GET'])
+def get_hasher_stats():
+    """Métriques du pool bcrypt (attente en file, rejets, temps de calcul)"""
+    if not current_admin_id():
+        return jsonify({"error": "Non authentifié"}), 401
+    return jsonify(password_hasher.metrics()), 200
+
+@app.route('/admin/moderation/stats', methods=['GET'])
+def get_moderation_stats():
+    """Verdicts de la pré-modération automatique et temps moyen d'évaluation"""
+    if not current_admin_id():
+        return jsonify({"error": "Non authentifié"}), 401
+    if moderation_rules is None:
+        return jsonify({"enabled": False}), 200
+    return jsonify(dict(moderation_rules.metrics(), enabled=True)), 200
+
+@app.route('/admin/flood_stats', methods=['GET'])
+def get_flood_stats():
+    """Doublons, flood et vagues de spam détectés sur la fenêtre glissante"""
+    if not current_admin_id():
+        return jsonify({"error": "Non authentifié"}), 401
+    return jsonify(flood_detector.metrics()), 200
+
+@app.route('/healthz', methods=['GET'])
+def healthz():
+    """Liveness: le processus répond (503 si le thread de vérification est bloqué)"""
+    alive, details = health_monitor.liveness()
+    return jsonify(details), 200 if alive else 503
+
+@app.route('/readyz', methods=['GET'])
+def readyz():
+    """Readiness: dernier verdict des vérifications (503 si le serveur est saturé ou sans MySQL)"""
+    ready, details = health_monitor.readiness()
+    return jsonify(details), 200 if ready else 503
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Métriques au format texte Prometheus"""
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+@app.route('/admin/query_stats', methods=['GET'])
+def get_query_stats():
+    """
+    Requêtes SQL les plus coûteuses (profilage activé dans config.ini)
+    Query: limit, order (total_ms | max_ms | calls | rows)
+    """
+    if not current_admin_id():
+        return jsonify({"error": "Non authentifié"}), 401
+    if db_manager.profiler is None:
+        return jsonify({"enabled": False}), 200
+    limit = max(1, min(request.args.get('limit', 20, type=int), 500))
+    order = request.args.get('order', 'total_ms')
+    if order not in ('total_ms', 'max_ms', 'calls', 'rows'):
+        return jsonify({"error": "Paramètre order invalide"}), 400
+    return jsonify({
+        'enabled': True,
+        'summary': db_manager.profiler.metrics(),
+        'queries': db_manager.profiler.top(limit, order)
+    }), 200
+
+@app.route('/admin/purge_stats', methods=['GET'])
+def get_purge_stats():
+    """Messages rejetés supprimés définitivement par le job de purge"""
+    if not current_admin_id():
+        return jsonify({"error": "Non authentifié"}), 401
+    return jsonify(message_purger.metrics()), 200
+
+@app.route('/admin/sessions', methods=['GET'])
+def get_active_sessions():
+    """
+    Liste les sessions étudiantes actives
+    Query: limit
+    """
+    try:
+        if not current_admin_id():
+            return jsonify({"error": "Non authentifié"}), 401
+        
+        limit = request.args.get('limit', 100, type=int)
+        sessions = session_store.list_active(max(1, min(limit, 1000)))
+        format_dates(sessions, ('date_creation', 'date_derniere_activite', 'date_expiration'))
+        return jsonify(sessions), 200
+    except Exception as e:
+        logger.exception("Erreur dans /admin/sessions: %s", e)
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/admin/sessions/revoke', methods=['POST'])
+def revoke_session():
+    """
+    Révoque une session et ferme les sockets qui l'utilisent
+    Body: {session_id}
+    """
+    try:
+        if not current_admin_id():
+            return jsonify({"error": "Non authentifié"}), 401
+        
+        data = request.json
+        session_id = data.get('session_id')
+        
+        if not session_id:
+            return jsonify({"error": "session_id requis"}), 400
+        
+        if not session_store.revoke(session_id):
+            return jsonify({"error": "Session non trouvée"}), 404
+        
+        for sid, identity in list(socket_sessions.items()):
+            if identity.get('session_id') == session_id:
+                socketio.server.disconnect(sid)
+        
+        return jsonify({"message": "Session révoquée"}), 200
+        
+    except Exception as e:
+        logger.exception("Erreur dans /admin/sessions/revoke: %s", e)
         return jsonify({"error": str(e)}), 500
 
 @app.route('/admin/pending_accounts', methods=['GET'])
 def get_pending_accounts():
-    """Récupère les comptes en attente d'activation"""
+    """
+    Récupère les comptes en attente d'activation (paginé)
+    Query: limit, cursor, q, from, to
+    """
     try:
-        accounts = db_manager.get_inactive_accounts()
-        
-        # Formater les dates
-        for acc in accounts:
-            if acc.get('date_inscription'):
-                acc['date_inscription'] = acc['date_inscription'].isoformat()
+        if not current_admin_id():
+            return jsonify({"error": "Non authentifié"}), 401
         
-        return jsonify(accounts), 200
+        limit, after, filters = parse_list_args(DATE_KEY)
+        accounts = db_manager.get_inactive_accounts(limit + 1, after, **filters)
+        page = build_page(accounts, limit, DATE_KEY)
+        format_dates(page['items'])
+        return jsonify(page), 200
         
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
-        print(f"Erreur dans /admin/pending_accounts: {e}")
+        logger.exception("Erreur dans /admin/pending_accounts: %s", e)
         return jsonify({"error": str(e)}), 500
 
 @app.route('/admin/unapproved_accounts', methods=['GET'])
 def get_unapproved_accounts():
-    """Récupère les comptes actifs mais non approuvés"""
+    """
+    Récupère les comptes actifs mais non approuvés (paginé)
+    Query: limit, cursor, q, from, to
+    """
     try:
-        accounts = db_manager.get_active_not_approved_accounts()
-        
-        for acc in accounts:
-            if acc.get('date_inscription'):
-                acc['date_inscription'] = acc['date_inscription'].isoformat()
+        if not current_admin_id():
+            return jsonify({"error": "Non authentifié"}), 401
         
-        return jsonify(accounts), 200
+        limit, after, filters = parse_list_args(DATE_KEY)
+        accounts = db_manager.get_active_not_approved_accounts(limit + 1, after, **filters)
+        page = build_page(accounts, limit, DATE_KEY)
+        format_dates(page['items'])
+        return jsonify(page), 200
         
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
-        print(f"Erreur: {e}")
+        logger.exception("Erreur: %s", e)
         return jsonify({"error": str(e)}), 500
 
 @app.route('/admin/activate', methods=['POST'])
@@ -289,7 +871,7 @@ def activate_account():
             return jsonify({"error": "Erreur lors de l'activation"}), 500
             
     except Exception as e:
-        print(f"Erreur dans /admin/activate: {e}")
+        logger.exception("Erreur dans /admin/activate: %s", e)
         return jsonify({"error": str(e)}), 500
 
 @app.route('/admin/approve', methods=['POST'])
@@ -321,24 +903,35 @@ def approve_account():
             return jsonify({"error": "Erreur lors de l'approbation"}), 500
             
     except Exception as e:
-        print(f"Erreur dans /admin/approve: {e}")
+        logger.exception("Erreur dans /admin/approve: %s", e)
         return jsonify({"error": str(e)}), 500
 
 @app.route('/admin/pending_messages', methods=['GET'])
 def get_pending_messages():
-    """Récupère tous les messages en attente de validation"""
+    """
+    Récupère les messages en attente de validation (paginé)
+    Query: limit, cursor, q (pseudo/nom de l'expéditeur), from, to,
+           type=public|private
+    """
     try:
-        messages = db_manager.get_pending_messages()
+        if not current_admin_id():
+            return jsonify({"error": "Non authentifié"}), 401
         
-        # Formater les dates
-        for msg in messages:
-            if msg.get('date_envoi'):
-                msg['date_envoi'] = msg['date_envoi'].isoformat()
+        limit, after, filters = parse_list_args(MESSAGE_KEY)
+        message_type = request.args.get('type')
+        if message_type not in (None, 'public', 'private'):
+            return jsonify({"error": "type doit valoir public ou private"}), 400
+        private = None if message_type is None else message_type == 'private'
         
-        return jsonify(messages), 200
+        messages = db_manager.get_pending_messages(limit + 1, after, private=private, **filters)
+        page = build_page(messages, limit, MESSAGE_KEY)
+        format_dates(page['items'])
+        return jsonify(page), 200
         
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
-        print(f"Erreur dans /admin/pending_messages: {e}")
+        logger.exception("Erreur dans /admin/pending_messages: %s", e)
         return jsonify({"error": str(e)}), 500
 
 @app.route('/admin/validate_message', methods=['POST'])
@@ -348,37 +941,29 @@ def validate_message():
     Body: {message_id}
     """
     try:
+        admin_id = current_admin_id()
+        if not admin_id:
+            return jsonify({"error": "Non authentifié"}), 401
+        
         data = request.json
         message_id = data.get('message_id')
-        admin_id = session.get('admin_id', 1)  # ID de l'admin
         
         if not message_id:
             return jsonify({"error": "message_id requis"}), 400
         
-        # Valider le message
+        # Valider le message: la diffusion est faite par message_router à partir
+        # du message gardé en mémoire depuis son envoi (aucune relecture en base)
         if db_manager.validate_message(message_id, admin_id):
-            # Récupérer le message validé
-            message = db_manager.get_message_by_id(message_id)
-            
-            if message:
-                # Diffuser le message via WebSocket
-                socketio.emit('new_message', {
-                    'id': message['id'],
-                    'from': message['pseudo_expediteur'],
-                    'from_id': message['id_expediteur'],
-                    'to': message['pseudo_destinataire'],
-                    'to_id': message['id_destinataire'],
-                    'content': message['contenu'],
-                    'timestamp': message['date_envoi'].isoformat(),
-                    'is_private': message['est_prive']
-                }, broadcast=True)
-            
             return jsonify({"message": "Message validé et distribué"}), 200
         else:
             return jsonify({"error": "Erreur lors de la validation"}), 500
             
+    except LeaseConflict as e:
+        return lease_conflict_response(e)
+    except MessageNotPending as e:
+        return jsonify({"error": "Message non trouvé ou déjà traité", "detail": str(e)}), 404
     except Exception as e:
-        print(f"Erreur dans /admin/validate_message: {e}")
+        logger.exception("Erreur dans /admin/validate_message: %s", e)
         return jsonify({"error": str(e)}), 500
 
 @app.route('/admin/reject_message', methods=['POST'])
@@ -388,35 +973,156 @@ def reject_message():
     Body: {message_id}
     """
     try:
+        admin_id = current_admin_id()
+        if not admin_id:
+            return jsonify({"error": "Non authentifié"}), 401
+        
         data = request.json
         message_id = data.get('message_id')
         
         if not message_id:
             return jsonify({"error": "message_id requis"}), 400
         
-        if db_manager.reject_message(message_id):
+        if db_manager.reject_message(message_id, admin_id):
             return jsonify({"message": "Message rejeté"}), 200
         else:
             return jsonify({"error": "Erreur lors du rejet"}), 500
             
+    except LeaseConflict as e:
+        return lease_conflict_response(e)
+    except MessageNotPending as e:
+        return jsonify({"error": "Message non trouvé ou déjà traité", "detail": str(e)}), 404
+    except Exception as e:
+        logger.exception("Erreur dans /admin/reject_message: %s", e)
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/admin/moderation/claim', methods=['POST'])
+def claim_messages():
+    """
+    Réserve un lot de messages en attente pour l'admin connecté
+    Body (optionnel): {batch_size}
+    Les messages réservés par un autre admin ne sont pas proposés tant
+    que leur bail court; réclamer à nouveau prolonge ses propres baux.
+    """
+    try:
+        admin_id = current_admin_id()
+        if not admin_id:
+            return jsonify({"error": "Non authentifié"}), 401
+        
+        data = request.get_json(silent=True) or {}
+        try:
+            batch_size = min(max(int(data.get('batch_size', CLAIM_BATCH_SIZE)), 1), MAX_PAGE_SIZE)
+        except (TypeError, ValueError):
+            return jsonify({"error": "batch_size invalide"}), 400
+        
+        messages = db_manager.claim_messages(admin_id, batch_size, CLAIM_LEASE_SECONDS)
+        if messages is None:
+            return jsonify({"error": "Erreur lors de la réservation"}), 500
+        try:
+            format_dates(messages)
+            return jsonify({
+                "items": messages,
+                "lease_seconds": CLAIM_LEASE_SECONDS
+            }), 200
+        except Exception:
+            # Réservation validée mais jamais remise à l'admin: libérer le
+            # lot plutôt que de le bloquer jusqu'à la fin du bail
+            db_manager.release_messages(admin_id, [message['id'] for message in messages])
+            raise
+        
+    except Exception as e:
+        logger.exception("Erreur dans /admin/moderation/claim: %s", e)
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/admin/moderation/release', methods=['POST'])
+def release_messages():
+    """
+    Libère les réservations de l'admin connecté
+    Body (optionnel): {message_ids} (toutes ses réservations si absent)
+    """
+    try:
+        admin_id = current_admin_id()
+        if not admin_id:
+            return jsonify({"error": "Non authentifié"}), 401
+        
+        data = request.get_json(silent=True) or {}
+        message_ids = data.get('message_ids')
+        if message_ids is not None:
+            try:
+                message_ids = [int(message_id) for message_id in message_ids]
+            except (TypeError, ValueError):
+                return jsonify({"error": "message_ids invalide"}), 400
+        
+        released = db_manager.release_messages(admin_id, message_ids)
+        if released is None:
+            return jsonify({"error": "Erreur lors de la libération"}), 500
+        return jsonify({"released": released}), 200
+        
+    except Exception as e:
+        logger.exception("Erreur dans /admin/moderation/release: %s", e)
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/admin/login_history', methods=['GET'])
+def get_login_history():
+    """
+    Recherche dans l'historique des connexions (paginé)
+    Query: limit, cursor, username, action=LOGIN|LOGOUT, ip, session_id, from, to
+    """
+    try:
+        if not current_admin_id():
+            return jsonify({"error": "Non authentifié"}), 401
+        
+        limit, after, filters = parse_list_args(LOGIN_KEY)
+        action = request.args.get('action')
+        if action:
+            action = action.upper()
+            if action not in ('LOGIN', 'LOGOUT'):
+                return jsonify({"error": "action doit valoir LOGIN ou LOGOUT"}), 400
+        
+        history = db_manager.search_login_history(
+            limit + 1, after,
+            username=request.args.get('username'),
+            action=action,
+            ip_address=request.args.get('ip'),
+            session_id=request.args.get('session_id'),
+            date_from=filters['date_from'],
+            date_to=filters['date_to']
+        )
+        page = build_page(history, limit, LOGIN_KEY)
+        format_dates(page['items'], ('date_action',))
+        return jsonify(page), 200
+        
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
-        print(f"Erreur dans /admin/reject_message: {e}")
+        logger.exception("Erreur dans /admin/login_history: %s", e)
         return jsonify({"error": str(e)}), 500
 
 @app.route('/admin/users', methods=['GET'])
 def get_all_users():
-    """Récupère tous les utilisateurs actifs"""
+    """
+    Récupère les utilisateurs actifs triés par pseudo (paginé)
+    Query: limit, cursor, q, from, to, status=approved|unapproved
+    """
     try:
-        users = db_manager.get_all_active_users()
+        if not current_admin_id():
+            return jsonify({"error": "Non authentifié"}), 401
         
-        for user in users:
-            if user.get('date_inscription'):
-                user['date_inscription'] = user['date_inscription'].isoformat()
+        limit, after, filters = parse_list_args(PSEUDO_KEY)
+        status = request.args.get('status')
+        if status not in (None, 'approved', 'unapproved'):
+            return jsonify({"error": "status doit valoir approved ou unapproved"}), 400
+        approved = None if status is None else status == 'approved'
         
-        return jsonify(users), 200
+        users = db_manager.get_all_active_users(limit + 1, after, approved=approved, **filters)
+        page = build_page(users, limit, PSEUDO_KEY)
+        format_dates(page['items'])
+        return jsonify(page), 200
         
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
-        print(f"Erreur: {e}")
+        logger.exception("Erreur: %s", e)
         return jsonify({"error": str(e)}), 500
 
 # ========================================
@@ -424,87 +1130,131 @@ def get_all_users():
 # ========================================
 
 @socketio.on('connect')
-def handle_connect():
-    """Gestion de la connexion WebSocket"""
-    print(f" Client connecté: {request.sid}")
+def handle_connect(auth=None):
+    """
+    Gestion de la connexion WebSocket
+    L'identité est vérifiée ici une seule fois puis mise en cache pour
+    tous les événements suivants du socket
+    """
+    identity = resolve_socket_identity(auth)
+    if identity is None:
+        logger.warning("Connexion refusée (non authentifié): %s", request.sid)
+        raise ConnectionRefusedError('unauthorized')
+    
+    socket_sessions[request.sid] = identity
+    if 'id' in identity:
+        # Destinataire des messages privés, quel que soit le nombre d'onglets
+        join_room(user_room(identity['id']))
+    logger.debug("Client connecté: %s", request.sid)
     emit('connected', {'message': 'Connecté au serveur'})
 
 @socketio.on('disconnect')
 def handle_disconnect():
     """Gestion de la déconnexion WebSocket"""
-    print(f" Client déconnecté: {request.sid}")
+    logger.debug("Client déconnecté: %s", request.sid)
+    identity = socket_sessions.pop(request.sid, None)
     
     # Retirer l'utilisateur de la liste des connectés
-    for username, info in list(connected_users.items()):
-        if info['sid'] == request.sid:
-            del connected_users[username]
-            # Notifier les autres utilisateurs
-            socketio.emit('user_disconnected', {
-                'username': username,
-                'pseudo': info['pseudo']
-            }, broadcast=True)
-            break
+    username = identity.get('username') if identity else None
+    info = connected_users.get(username)
+    if info and info['sid'] == request.sid:
+        del connected_users[username]
+        # Notifier les autres utilisateurs
+        socketio.emit('user_disconnected', {
+            'username': username,
+            'pseudo': info['pseudo']
+        })
 
 @socketio.on('user_connected')
-def handle_user_connected(data):
+def handle_user_connected(data=None):
     """Notification qu'un utilisateur s'est connecté au chat"""
-    username = data.get('username')
-    pseudo = data.get('pseudo')
+    identity = socket_sessions.get(request.sid)
+    if not identity or 'username' not in identity:
+        emit('error', {'message': 'Non authentifié'})
+        return
     
-    if username and pseudo:
-        connected_users[username] = {
-            'sid': request.sid,
-            'pseudo': pseudo
-        }
-        
-        # Notifier tous les clients
-        socketio.emit('user_connected', {
-            'username': username,
-            'pseudo': pseudo,
-            'connected_users': [{'username': u, 'pseudo': i['pseudo']} 
-                               for u, i in connected_users.items()]
-        }, broadcast=True)
-        
-        print(f" {pseudo} rejoint le chat")
+    username = identity['username']
+    pseudo = identity['pseudo']
+    connected_users[username] = {
+        'sid': request.sid,
+        'pseudo': pseudo
+    }
+    
+    # Notifier tous les clients
+    socketio.emit('user_connected', {
+        'username': username,
+        'pseudo': pseudo,
+        'connected_users': [{'username': u, 'pseudo': i['pseudo']} 
+                           for u, i in connected_users.items()]
+    })
+    
+    logger.debug("%s rejoint le chat", pseudo)
 
 @socketio.on('send_message')
 def handle_send_message(data):
     """
     Réception et traitement d'un message
+    L'expéditeur est l'identité authentifiée au 'connect' du socket
     Data: {
-        username, pseudo, content, 
+        content, 
         to_username (optionnel), to_pseudo (optionnel)
     }
     """
     try:
-        username = data.get('username')
-        pseudo = data.get('pseudo')
+        user = socket_sessions.get(request.sid)
+        if not user or 'username' not in user:
+            emit('error', {'message': 'Non authentifié'})
+            return
+        session_store.touch(user['session_id'])
+        
+        pseudo = user['pseudo']
         content = data.get('content')
         to_username = data.get('to_username')  # None pour message public
         to_pseudo = data.get('to_pseudo')
         
-        if not all([username, pseudo, content]):
+        if not content:
             emit('error', {'message': 'Données incomplètes'})
             return
         
-        # Récupérer l'utilisateur
-        user = db_manager.get_user_by_username(username)
-        if not user:
-            emit('error', {'message': 'Utilisateur non trouvé'})
-            return
-        
         # Déterminer si le message est privé
         est_prive = to_username is not None
         
-        # Récupérer l'ID du destinataire si privé
+        # Résoudre le destinataire si privé (index en mémoire, sans requête SQL)
         id_destinataire = None
         if est_prive and to_username:
-            dest_user = db_manager.get_user_by_username(to_username)
-            if dest_user:
-                id_destinataire = dest_user['id']
+            dest_user = recipient_index.resolve(to_username)
+            if not dest_user:
+                emit('error', {'message': 'Destinataire introuvable'})
+                return
+            id_destinataire = dest_user['id']
+            to_username = dest_user['username']
+            to_pseudo = dest_user['pseudo']
+        
+        # Doublons et flood: le message n'est ni enregistré ni mis en file
+        detection = flood_detector.check(user['id'], content)
+        if detection:
+            socketio.emit('message_rejected', {
+                'message': FLOOD_MESSAGES[detection.kind],
+                'reasons': [],
+                'kind': detection.kind
+            }, to=request.sid)
+            logger.info("Message de %s ignoré (%s, %s dans la fenêtre)",
+                        pseudo, detection.kind, detection.count, extra={'user_id': user['id']})
+            return
         
-        # Vérifier si l'utilisateur est approuvé
-        auto_validate = user['compte_approuve']
+        # Pré-modération: rejet immédiat, validation automatique ou file d'attente
+        auto_validate = bool(user['compte_approuve'])
+        if moderation_rules is not None:
+            verdict = moderation_rules.evaluate(content, approved=auto_validate)
+            if verdict.action == REJECT:
+                socketio.emit('message_rejected', {
+                    'message': 'Message refusé par la modération automatique',
+                    'reasons': verdict.reasons
+                }, to=request.sid)
+                logger.info("Message de %s rejeté automatiquement (%s)",
+                            pseudo, '; '.join(verdict.reasons), extra={'user_id': user['id']})
+                return
+            auto_validate = verdict.action == ACCEPT
         
         # Sauvegarder le message
         message_id = db_manager.add_message(
@@ -518,6 +1268,7 @@ def handle_send_message(data):
         )
         
         if message_id:
+            tracer.current_span().set_attribute('message.id', message_id)
             message_data = {
                 'id': message_id,
                 'from': pseudo,
@@ -530,48 +1281,49 @@ def handle_send_message(data):
             }
             
             if auto_validate:
-                # Distribution immédiate (utilisateur approuvé)
-                if est_prive:
-                    # Message privé - envoyer seulement à l'expéditeur et au destinataire
-                    emit('new_message', message_data, room=request.sid)
-                    if to_username in connected_users:
-                        emit('new_message', message_data, 
-                             room=connected_users[to_username]['sid'])
-                else:
-                    # Message public - broadcast à tous
-                    emit('new_message', message_data, broadcast=True)
+                # Distribution immédiate (publique, ou privée aux deux participants)
+                message_router.deliver(message_data)
                 
-                print(f" Message de {pseudo} distribué automatiquement")
+                logger.debug("Message de %s distribué automatiquement", pseudo,
+                             extra={'message_id': message_id, 'user_id': user['id']})
             else:
                 # En attente de validation (utilisateur non approuvé)
                 # Notifier l'expéditeur
-                emit('message_pending_validation', {
+                socketio.emit('message_pending_validation', {
                     'message': 'Votre message est en attente de validation par un administrateur.'
-                }, room=request.sid)
+                }, to=request.sid)
                 
-                # Notifier les admins via une room spéciale
-                emit('admin_notification', {
+                # Notifier les admins via une room spéciale (socketio.emit:
+                # émission comptée avec sa taille de diffusion)
+                socketio.emit('admin_notification', {
                     'type': 'new_pending_message',
                     'message': message_data
-                }, room='admin')
+                }, to='admin')
                 
-                print(f"⏳ Message de {pseudo} en attente de validation")
+                logger.debug("Message de %s en attente de validation", pseudo,
+                             extra={'message_id': message_id, 'user_id': user['id']})
         
     except Exception as e:
-        print(f"Erreur dans send_message: {e}")
+        logger.exception("Erreur dans send_message: %s", e)
         emit('error', {'message': str(e)})
 
 @socketio.on('join_admin_room')
 def handle_join_admin():
     """Admin rejoint la room pour recevoir les notifications"""
+    identity = socket_sessions.get(request.sid)
+    if not identity or 'admin_id' not in identity:
+        emit('error', {'message': 'Accès réservé aux administrateurs'})
+        return
     join_room('admin')
-    print(" Admin a rejoint la room admin")
+    # Version courante: le client recharge l'état puis applique les deltas suivants
+    emit('admin_sync', {'version': admin_feed.current_version()})
+    logger.debug("Admin a rejoint la room admin")
 
 @socketio.on('leave_admin_room')
 def handle_leave_admin():
     """Admin quitte la room"""
     leave_room('admin')
-    print(" Admin a quitté la room admin")
+    logger.debug("Admin a quitté la room admin")
 
 # ========================================
 # LANCEMENT DU SERVEUR
@@ -0,0 +1,219 @@
+"""
+Sessions côté serveur
+Cache LRU en mémoire devant la table MySQL 'session', avec écriture
+groupée de la dernière activité et purge périodique des sessions expirées
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+
+class SessionStore:
+    """
+    Sessions indexées par le session_id généré dans /login
+
+    La validation d'une session en cache est O(1) et sans requête SQL.
+    La dernière activité est mise à jour en mémoire et écrite par lots
+    par un thread de maintenance qui possède sa propre connexion MySQL
+    (la connexion du serveur n'est pas partagée entre threads).
+
+    Args:
+        db_manager: DatabaseManager du serveur (lectures/écritures en requête)
+        db_factory (callable): Crée la connexion du thread de maintenance
+        capacity (int): Nombre maximum de sessions en cache
+        ttl (int): Durée de vie (s) d'une session inactive
+        flush_interval (float): Période (s) d'écriture de la dernière activité
+        sweep_interval (float): Période (s) de purge des sessions expirées
+    """
+
+    def __init__(self, db_manager, db_factory, capacity=10000, ttl=86400,
+                 flush_interval=5.0, sweep_interval=300.0):
+        self.db_manager = db_manager
+        self.db_factory = db_factory
+        self.capacity = capacity
+        self.ttl = timedelta(seconds=ttl)
+        self.flush_interval = flush_interval
+        self.sweep_interval = sweep_interval
+
+        self.cache = OrderedDict()
+        self.dirty = {}
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+
+        # Métriques
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_config(cls, config, db_manager, db_factory):
+        """Construit le store depuis la section [SESSION] de config.ini"""
+        return cls(
+            db_manager, db_factory,
+            capacity=config.getint('SESSION', 'cache_size', fallback=10000),
+            ttl=config.getint('SESSION', 'ttl', fallback=86400),
+            flush_interval=config.getfloat('SESSION', 'flush_interval', fallback=5.0),
+            sweep_interval=config.getfloat('SESSION', 'sweep_interval', fallback=300.0)
+        )
+
+    # ========================================
+    # API
+    # ========================================
+
+    def create(self, session_id, user, ip_address=None, user_agent=None):
+        """
+        Enregistre une nouvelle session après un login réussi
+
+        Args:
+            session_id (str): ID généré par /login
+            user (dict): Étudiant (id, username, pseudo)
+        """
+        now = datetime.now()
+        record = {
+            'session_id': session_id,
+            'id_etudiant': user['id'],
+            'username': user['username'],
+            'pseudo': user['pseudo'],
+            'ip_address': ip_address,
+            'user_agent': user_agent,
+            'date_creation': now,
+            'date_derniere_activite': now,
+            'date_expiration': now + self.ttl
+        }
+        if not self.db_manager.create_session(record):
+            return None
+        with self.lock:
+            self._put(session_id, record)
+        return record
+
+    def get(self, session_id):
+        """
+        Valide une session
+
+        Returns:
+            dict: Session active, ou None si inconnue, révoquée ou expirée
+        """
+        if not session_id:
+            return None
+        now = datetime.now()
+        with self.lock:
+            record = self.cache.get(session_id)
+            if record is not None:
+                self.hits += 1
+                self.cache.move_to_end(session_id)
+                if record['date_expiration'] <= now:
+                    self._evict(session_id)
+                    return None
+                return record
+            self.misses += 1
+
+        record = self.db_manager.get_session(session_id)
+        if record is None or record['date_expiration'] <= now:
+            return None
+        with self.lock:
+            self._put(session_id, record)
+        return record
+
+    def touch(self, session_id):
+        """Prolonge une session active (écrit en base au prochain lot)"""
+        now = datetime.now()
+        with self.lock:
+            record = self.cache.get(session_id)
+            if record is None:
+                return
+            record['date_derniere_activite'] = now
+            record['date_expiration'] = now + self.ttl
+            self.dirty[session_id] = (now, record['date_expiration'])
+
+    def revoke(self, session_id):
+        """Supprime une session (logout ou révocation par un admin)"""
+        with self.lock:
+            self._evict(session_id)
+        return self.db_manager.delete_session(session_id)
+
+    def list_active(self, limit=100):
+        """Sessions non expirées, les plus récemment actives d'abord"""
+        self.flush()
+        return self.db_manager.get_active_sessions(limit)
+
+    def metrics(self):
+        with self.lock:
+            return {
+                'cached': len(self.cache),
+                'capacity': self.capacity,
+                'pending_updates': len(self.dirty),
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+    # ========================================
+    # MAINTENANCE
+    # ========================================
+
+    def start(self):
+        """Démarre le thread d'écriture groupée et de purge"""
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name='session-store', daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout=self.flush_interval * 2)
+
+    def flush(self, db=None):
+        """Écrit en un lot les dernières activités accumulées"""
+        with self.lock:
+            batch, self.dirty = self.dirty, {}
+        if batch:
+            (db or self.db_manager).touch_sessions(
+                [(last_seen, expires, sid) for sid, (last_seen, expires) in batch.items()]
+            )
+        return len(batch)
+
+    def sweep(self, db=None):
+        """Supprime les sessions expirées du cache et de la base"""
+        now = datetime.now()
+        with self.lock:
+            expired = [sid for sid, record in self.cache.items()
+                       if record['date_expiration'] <= now]
+            for sid in expired:
+                self._evict(sid)
+        return (db or self.db_manager).delete_expired_sessions()
+
+    def _run(self):
+        db = self.db_factory()
+        next_sweep = 0.0
+        elapsed = 0.0
+        while not self.stop_event.wait(self.flush_interval):
+            elapsed += self.flush_interval
+            try:
+                self.flush(db)
+                if elapsed >= next_sweep:
+                    removed = self.sweep(db)
+                    next_sweep = elapsed + self.sweep_interval
+                    if removed:
+                        logger.info("%s sessions expirées supprimées", removed)
+            except Exception as e:
+                logger.error("Erreur dans la maintenance des sessions: %s", e)
+        self.flush(db)
+
+    # ========================================
+    # CACHE LRU (appelé sous self.lock)
+    # ========================================
+
+    def _put(self, session_id, record):
+        self.cache[session_id] = record
+        self.cache.move_to_end(session_id)
+        # Une session évincée garde sa dernière activité dans self.dirty
+        # jusqu'au prochain lot
+        while len(self.cache) > self.capacity:
+            self.cache.popitem(last=False)
+
+    def _evict(self, session_id):
+        self.cache.pop(session_id, None)
+        self.dirty.pop(session_id, None)
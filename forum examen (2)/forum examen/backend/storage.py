@@ -0,0 +1,428 @@
+"""
+Moteurs de stockage du DatabaseManager
+MySQL (mysql.connector) ou SQLite embarqué (mode WAL, un seul écrivain à
+la fois, lectures concurrentes): aucun serveur de base de données n'est
+nécessaire pour les petits déploiements, les tests et les benchmarks
+"""
+
+import functools
+import logging
+import os
+import re
+import sqlite3
+import threading
+import weakref
+from datetime import date, datetime
+
+logger = logging.getLogger(__name__)
+
+try:
+    from mysql.connector import Error as MySQLError
+except ImportError:
+    MySQLError = None
+
+# Erreurs des deux moteurs (except Error as e dans le DatabaseManager)
+Error = (sqlite3.Error,) + ((MySQLError,) if MySQLError is not None else ())
+
+# Codes client MySQL d'une connexion perdue (2002/2003: serveur injoignable,
+# 2006: server has gone away, 2013/2055: connexion perdue pendant la requête)
+DISCONNECT_ERRNOS = frozenset({2002, 2003, 2006, 2013, 2055})
+
+
+class ConnectionClosed(sqlite3.OperationalError):
+    """Connexion SQLite fermée (équivalent d'une connexion MySQL perdue)"""
+
+
+def is_disconnect(error):
+    """L'erreur signale une connexion perdue, et non une requête refusée"""
+    if isinstance(error, sqlite3.Error):
+        return isinstance(error, ConnectionClosed)
+    return getattr(error, 'errno', None) in DISCONNECT_ERRNOS
+
+
+def backend_from_config(config):
+    """
+    Moteur choisi par la section [DATABASE] de config.ini
+    (backend = mysql par défaut, ou sqlite)
+    """
+    backend = config.get('DATABASE', 'backend', fallback='mysql')
+    if backend == 'sqlite':
+        return SQLiteBackend.from_config(config)
+    if backend != 'mysql':
+        raise ValueError(f"Moteur de base de données inconnu: {backend}")
+    params = {
+        'host': config['DATABASE']['host'],
+        'user': config['DATABASE']['user'],
+        'password': config['DATABASE']['password'],
+        'database': config['DATABASE']['database']
+    }
+    unix_socket = config.get('DATABASE', 'unix_socket', fallback='')
+    if unix_socket:
+        params['unix_socket'] = unix_socket
+    return MySQLBackend(params)
+
+
+class MySQLBackend:
+    """Connexions mysql.connector (comportement historique du serveur)"""
+
+    dialect = 'mysql'
+    supports_fulltext = True
+
+    def __init__(self, params):
+        self.params = params
+
+    def connect(self):
+        import mysql.connector
+        return mysql.connector.connect(**self.params)
+
+
+# ========================================
+# TRADUCTION DU SQL MYSQL
+# ========================================
+
+WRITE_STATEMENTS = ('insert', 'update', 'delete', 'replace', 'create', 'alter', 'drop')
+
+INTERVAL_RE = re.compile(
+    r"NOW\(\)\s*([+-])\s*INTERVAL\s+(%s|\d+)\s+(SECOND|MINUTE|HOUR|DAY)\b", re.IGNORECASE)
+NOW_RE = re.compile(r"\bNOW\(\)", re.IGNORECASE)
+NULL_SAFE_EQUAL_RE = re.compile(r"<=>")
+FOR_UPDATE_RE = re.compile(r"\s+FOR\s+UPDATE(\s+SKIP\s+LOCKED)?", re.IGNORECASE)
+DELETE_LIMIT_RE = re.compile(
+    r"^\s*DELETE\s+FROM\s+(\w+)\s+(.*?)\s*((?:ORDER\s+BY\s+.*?)?\s*LIMIT\s+(?:%s|\d+))\s*$",
+    re.IGNORECASE | re.DOTALL)
+EXPLAIN_RE = re.compile(r"^\s*EXPLAIN\s+", re.IGNORECASE)
+LIKE_RE = re.compile(r"\bLIKE\s+%s", re.IGNORECASE)
+
+LOCAL_NOW = "datetime('now', 'localtime')"
+
+
+@functools.lru_cache(maxsize=1024)
+def translate(operation):
+    """
+    Requête écrite pour MySQL -> requête SQLite
+
+    Couvre le SQL du DatabaseManager: NOW() et NOW() +/- INTERVAL, <=>,
+    FOR UPDATE [SKIP LOCKED] (l'écrivain unique en tient lieu), DELETE
+    ... LIMIT, EXPLAIN, l'échappement des LIKE et les paramètres %s.
+
+    Returns:
+        tuple: (requête SQLite, True si la requête écrit ou verrouille;
+                jamais pour un EXPLAIN)
+    """
+    sql = operation.decode('utf-8') if isinstance(operation, bytes) else operation
+    write = sql.lstrip().split(None, 1)[0].lower() in WRITE_STATEMENTS if sql.strip() else False
+    explain = EXPLAIN_RE.match(sql) is not None
+    if FOR_UPDATE_RE.search(sql):
+        # EXPLAIN d'un SELECT ... FOR UPDATE (profileur): simple lecture
+        write = not explain
+        sql = FOR_UPDATE_RE.sub('', sql)
+    sql = INTERVAL_RE.sub(
+        lambda m: f"datetime('now', 'localtime', '{m.group(1)}' || {m.group(2)} || ' {m.group(3).lower()}s')",
+        sql)
+    sql = NOW_RE.sub(LOCAL_NOW, sql)
+    sql = NULL_SAFE_EQUAL_RE.sub(' IS ', sql)
+    match = DELETE_LIMIT_RE.match(sql)
+    if match:
+        table, where, limit = match.groups()
+        sql = f"DELETE FROM {table} WHERE rowid IN (SELECT rowid FROM {table} {where} {limit})"
+    sql = EXPLAIN_RE.sub('EXPLAIN QUERY PLAN ', sql)
+    # Caractère d'échappement implicite de MySQL (pagination.like_prefix)
+    sql = LIKE_RE.sub(r"LIKE %s ESCAPE '\\'", sql)
+    return sql.replace('%s', '?').replace('%%', '%'), write
+
+
+# ========================================
+# SQLITE
+# ========================================
+
+# Dates: même format que MySQL (DATETIME, à la seconde), relues en datetime
+sqlite3.register_adapter(datetime, lambda value: value.strftime('%Y-%m-%d %H:%M:%S'))
+sqlite3.register_adapter(date, lambda value: value.isoformat())
+sqlite3.register_converter('DATETIME', lambda value: datetime.fromisoformat(value.decode()))
+
+
+def _regexp(pattern, value):
+    return value is not None and re.search(pattern, str(value)) is not None
+
+
+class SQLiteBackend:
+    """
+    Base SQLite embarquée, partagée par tous les DatabaseManager du processus
+
+    Mode WAL: les lectures ne bloquent pas l'écriture et inversement.
+    Chaque thread a sa propre connexion; les écritures passent par un
+    verrou d'écrivain unique (BEGIN IMMEDIATE sous le verrou), ce qui
+    évite les erreurs 'database is locked' entre threads du serveur.
+    Les migrations en attente (migrations.py) sont appliquées et les
+    statistiques ANALYZE calculées à la première connexion du processus.
+
+    Args:
+        path (str): Fichier de la base
+        busy_timeout (float): Attente maximale (s) du verrou d'écriture
+        cache_mb (int): Cache de pages par connexion
+        mmap_mb (int): Taille du fichier lue par mmap
+        synchronous (str): NORMAL (sûr en WAL, fsync au checkpoint) ou FULL
+    """
+
+    dialect = 'sqlite'
+    supports_fulltext = False
+
+    _writer_locks = {}
+    _schemas = set()
+    _registry_lock = threading.Lock()
+
+    def __init__(self, path='forum_chat.db', busy_timeout=5.0, cache_mb=64,
+                 mmap_mb=256, synchronous='NORMAL'):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self.cache_mb = cache_mb
+        self.mmap_mb = mmap_mb
+        self.synchronous = synchronous
+        key = os.path.abspath(path)
+        with self._registry_lock:
+            self.writer_lock = self._writer_locks.setdefault(key, threading.Lock())
+        self.key = key
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            config.get('DATABASE', 'sqlite_path', fallback='forum_chat.db'),
+            busy_timeout=config.getfloat('DATABASE', 'sqlite_busy_timeout', fallback=5.0),
+            cache_mb=config.getint('DATABASE', 'sqlite_cache_mb', fallback=64),
+            mmap_mb=config.getint('DATABASE', 'sqlite_mmap_mb', fallback=256),
+            synchronous=config.get('DATABASE', 'sqlite_synchronous', fallback='NORMAL')
+        )
+
+    def connect(self):
+        connection = SQLiteConnection(self)
+        with self._registry_lock:
+            if self.key not in self._schemas:
+                self.prepare(connection)
+                self._schemas.add(self.key)
+        return connection
+
+    def open(self):
+        """Connexion sqlite3 d'un thread, pragmas appliqués"""
+        raw = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None,
+                              detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False)
+        raw.create_function('REGEXP', 2, _regexp, deterministic=True)
+        raw.execute("PRAGMA journal_mode = WAL")
+        raw.execute(f"PRAGMA synchronous = {self.synchronous}")
+        raw.execute("PRAGMA foreign_keys = ON")
+        raw.execute("PRAGMA temp_store = MEMORY")
+        raw.execute(f"PRAGMA cache_size = {-1024 * self.cache_mb}")
+        raw.execute(f"PRAGMA mmap_size = {1024 * 1024 * self.mmap_mb}")
+        return raw
+
+    def prepare(self, connection):
+        """Première connexion du processus: migrations en attente, statistiques"""
+        from migrations import Migrator
+        Migrator(connection, self.dialect).upgrade()
+        with self.writer_lock:
+            raw = connection._raw()
+            # Statistiques du planificateur (échantillonnées: rapide même sur
+            # une grosse base), sans quoi SQLite choisit parfois un index peu
+            # sélectif (rejete) plutôt que la clé
+            raw.execute("PRAGMA analysis_limit = 1000")
+            raw.execute("ANALYZE")
+
+
+class _ThreadConnection:
+    """Connexion sqlite3 d'un thread et état de sa transaction d'écriture"""
+
+    __slots__ = ('raw', 'writing')
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.writing = False
+
+
+class _ThreadExit:
+    """Sentinelle gardée seulement par le thread-local: détruite à la fin du thread"""
+
+    __slots__ = ('__weakref__',)
+
+
+class SQLiteConnection:
+    """
+    Connexion SQLite présentée comme une connexion mysql.connector
+    (cursor(dictionary=...), commit, rollback, start_transaction,
+    in_transaction, ping), utilisable depuis plusieurs threads
+
+    Chaque thread a sa propre connexion sqlite3, fermée quand le thread
+    se termine (un thread par requête en mode threading): le nombre de
+    connexions ouvertes suit celui des threads vivants.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.local = threading.local()
+        self.connections = set()
+        self.lock = threading.Lock()
+        self.closed = False
+
+    def _thread(self):
+        state = getattr(self.local, 'state', None)
+        if state is None:
+            state = self.local.state = _ThreadConnection(self.backend.open())
+            self.local.exit = _ThreadExit()
+            weakref.finalize(self.local.exit, self._release_thread, state)
+            with self.lock:
+                self.connections.add(state)
+        return state
+
+    def _raw(self):
+        return self._thread().raw
+
+    def _release_thread(self, state):
+        """Fin du thread: ferme sa connexion (transaction en cours annulée)"""
+        with self.lock:
+            self.connections.discard(state)
+        try:
+            state.raw.close()
+        except sqlite3.Error:
+            pass
+        if state.writing:
+            state.writing = False
+            self.backend.writer_lock.release()
+
+    def cursor(self, dictionary=False, **kwargs):
+        return SQLiteCursor(self, dictionary)
+
+    # ========================================
+    # TRANSACTIONS
+    # ========================================
+
+    @property
+    def in_transaction(self):
+        return self._raw().in_transaction
+
+    def begin_write(self):
+        """Ouvre (si besoin) la transaction d'écriture du thread, sous le verrou d'écrivain"""
+        state = self._thread()
+        raw = state.raw
+        if state.writing:
+            return
+        if not self.backend.writer_lock.acquire(timeout=self.backend.busy_timeout):
+            raise sqlite3.OperationalError("database is locked (écrivain occupé)")
+        try:
+            if not raw.in_transaction:
+                raw.execute("BEGIN IMMEDIATE")
+        except BaseException:
+            self.backend.writer_lock.release()
+            raise
+        state.writing = True
+
+    def start_transaction(self, consistent_snapshot=False, isolation_level=None, readonly=False):
+        if readonly:
+            # Lecture seule: instantané WAL, sans bloquer l'écrivain
+            self._raw().execute("BEGIN")
+        else:
+            self.begin_write()
+
+    def _end(self, statement):
+        state = self._thread()
+        try:
+            if state.raw.in_transaction:
+                state.raw.execute(statement)
+        finally:
+            if state.writing:
+                state.writing = False
+                self.backend.writer_lock.release()
+
+    def commit(self):
+        self._end("COMMIT")
+
+    def rollback(self):
+        self._end("ROLLBACK")
+
+    # ========================================
+    # ÉTAT DE LA CONNEXION
+    # ========================================
+
+    def is_connected(self):
+        if self.closed:
+            return False
+        try:
+            self._raw().execute("SELECT 1")
+            return True
+        except sqlite3.Error:
+            return False
+
+    def ping(self, reconnect=False, attempts=1, delay=0):
+        if self.closed and reconnect:
+            self.closed = False
+        if self.closed:
+            raise ConnectionClosed("connexion fermée")
+        self._raw().execute("SELECT 1")
+
+    def close(self):
+        self.closed = True
+        with self.lock:
+            connections, self.connections = self.connections, set()
+        for state in connections:
+            try:
+                state.raw.execute("PRAGMA optimize")
+                state.raw.close()
+            except sqlite3.Error:
+                pass
+        self.local = threading.local()
+
+
+class SQLiteCursor:
+    """Curseur sqlite3 qui accepte le SQL MySQL du DatabaseManager"""
+
+    def __init__(self, connection, dictionary=False):
+        self.connection = connection
+        self.dictionary = dictionary
+        self._cursor = connection._raw().cursor()
+
+    def _run(self, method, operation, params):
+        sql, write = translate(operation)
+        if write:
+            self.connection.begin_write()
+        try:
+            return method(sql, params)
+        except sqlite3.Error:
+            # Comme une transaction MySQL abandonnée: libère l'écrivain
+            if self.connection._thread().writing:
+                self.connection.rollback()
+            raise
+
+    def execute(self, operation, params=None, *args, **kwargs):
+        self._run(self._cursor.execute, operation, params or ())
+
+    def executemany(self, operation, seq_params, *args, **kwargs):
+        self._run(self._cursor.executemany, operation, seq_params)
+
+    def _row(self, row):
+        if row is None or not self.dictionary:
+            return row
+        return dict(zip((column[0] for column in self._cursor.description), row))
+
+    def fetchone(self):
+        return self._row(self._cursor.fetchone())
+
+    def fetchall(self):
+        return [self._row(row) for row in self._cursor.fetchall()]
+
+    def fetchmany(self, size=1):
+        return [self._row(row) for row in self._cursor.fetchmany(size)]
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    def close(self):
+        self._cursor.close()
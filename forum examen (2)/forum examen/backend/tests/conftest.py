@@ -0,0 +1,9 @@
+"""
+Tests du backend (moteur SQLite: aucun serveur MySQL nécessaire)
+Les modules du backend sont importés depuis le dossier parent
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
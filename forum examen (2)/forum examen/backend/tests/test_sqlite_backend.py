@@ -0,0 +1,150 @@
+"""
+Moteur SQLite: migrations et traduction du SQL MySQL du DatabaseManager
+"""
+
+import pytest
+
+from db_manager import DatabaseManager, LeaseConflict
+from migrations import MIGRATIONS, Migrator
+from storage import SQLiteBackend, SQLiteConnection, translate
+
+
+@pytest.fixture
+def backend(tmp_path):
+    return SQLiteBackend(str(tmp_path / 'forum_chat.db'))
+
+
+@pytest.fixture
+def db(tmp_path):
+    """DatabaseManager sur une base SQLite neuve (migrations appliquées à la connexion)"""
+    config = tmp_path / 'config.ini'
+    config.write_text(
+        "[DATABASE]\n"
+        "backend = sqlite\n"
+        f"sqlite_path = {tmp_path / 'forum_chat.db'}\n",
+        encoding='utf-8')
+    db = DatabaseManager(str(config))
+    cursor = db.connection.cursor()
+    cursor.executemany(
+        "INSERT INTO administrateur (username, password, nom, prenom) VALUES (%s, %s, %s, %s)",
+        [('admin1', 'x', 'Admin', 'Un'), ('admin2', 'x', 'Admin', 'Deux')])
+    db.connection.commit()
+    cursor.close()
+    yield db
+    db.connection.close()
+
+
+def add_pending_messages(db, count):
+    user_id = db.add_user('Nom', 'Prenom', 'pseudo', 'etudiant', 'x')
+    return [db.add_message(user_id, 'pseudo', None, None, f"message {i}") for i in range(count)]
+
+
+# ========================================
+# MIGRATIONS
+# ========================================
+
+def test_upgrade_applies_every_migration(backend):
+    migrator = Migrator(SQLiteConnection(backend), backend.dialect)
+    assert [m.version for m in migrator.pending()] == sorted(m.version for m in MIGRATIONS)
+
+    migrator.upgrade()
+
+    assert migrator.pending() == []
+    assert migrator.current_version() == max(m.version for m in MIGRATIONS)
+    assert migrator.has_column('message', 'id_moderateur')
+    assert migrator.has_column('message', 'date_rejet')
+    assert migrator.has_index('message', 'idx_valide_rejete_date')
+    assert migrator.has_index('historique_login', 'idx_username_date')
+
+
+def test_upgrade_is_idempotent(backend):
+    connection = SQLiteConnection(backend)
+    Migrator(connection, backend.dialect).upgrade()
+    applied = Migrator(connection, backend.dialect).applied()
+
+    Migrator(connection, backend.dialect).upgrade()
+
+    assert Migrator(connection, backend.dialect).applied() == applied
+
+
+def test_upgrade_to_target(backend):
+    migrator = Migrator(SQLiteConnection(backend), backend.dialect)
+    migrator.upgrade(target=2)
+
+    assert migrator.current_version() == 2
+    assert migrator.has_column('message', 'id_moderateur')
+    assert not migrator.has_column('message', 'rejete')
+
+
+# ========================================
+# TRADUCTION DU SQL MYSQL
+# ========================================
+
+@pytest.mark.parametrize('mysql, sqlite, write', [
+    ("SELECT * FROM message WHERE date_envoi < NOW()",
+     "SELECT * FROM message WHERE date_envoi < datetime('now', 'localtime')", False),
+    ("UPDATE message SET date_fin_reservation = NOW() + INTERVAL %s SECOND",
+     "UPDATE message SET date_fin_reservation = "
+     "datetime('now', 'localtime', '+' || ? || ' seconds')", True),
+    ("SELECT id FROM message WHERE NOT (id_moderateur <=> %s)",
+     "SELECT id FROM message WHERE NOT (id_moderateur  IS  ?)", False),
+    ("SELECT id FROM message LIMIT %s FOR UPDATE SKIP LOCKED",
+     "SELECT id FROM message LIMIT ?", True),
+    ("DELETE FROM session WHERE date_expiration < NOW() LIMIT %s",
+     "DELETE FROM session WHERE rowid IN (SELECT rowid FROM session "
+     "WHERE date_expiration < datetime('now', 'localtime') LIMIT ?)", True),
+    ("EXPLAIN SELECT id FROM message WHERE id = %s FOR UPDATE",
+     "EXPLAIN QUERY PLAN SELECT id FROM message WHERE id = ?", False),
+    ("SELECT id FROM etudiant WHERE pseudo LIKE %s",
+     "SELECT id FROM etudiant WHERE pseudo LIKE ? ESCAPE '\\'", False),
+])
+def test_translate(mysql, sqlite, write):
+    assert translate(mysql) == (sqlite, write)
+
+
+# ========================================
+# REQUÊTES TRADUITES DU DATABASEMANAGER
+# ========================================
+
+def test_claim_and_release(db):
+    ids = add_pending_messages(db, 3)
+
+    claimed = db.claim_messages(1, batch_size=2, lease_seconds=60)
+    assert [m['id'] for m in claimed] == ids[:2]
+    assert all(m['id_moderateur'] == 1 for m in claimed)
+
+    # Lot distinct pour un autre modérateur, baux prolongés pour le premier
+    assert [m['id'] for m in db.claim_messages(2, batch_size=5, lease_seconds=60)] == ids[2:]
+    assert [m['id'] for m in db.claim_messages(1, batch_size=5, lease_seconds=60)] == ids[:2]
+
+    assert db.release_messages(1) == ids[:2]
+    assert db.get_message_by_id(ids[0])['id_moderateur'] is None
+
+
+def test_lease_blocks_other_moderators(db):
+    message_id = add_pending_messages(db, 1)[0]
+    db.claim_messages(1, batch_size=1, lease_seconds=60)
+
+    with pytest.raises(LeaseConflict):
+        db.validate_message(message_id, 2)
+    assert db.validate_message(message_id, 1)
+
+
+def test_purge_rejected_messages(db):
+    ids = add_pending_messages(db, 3)
+    for message_id in ids[:2]:
+        db.reject_message(message_id, 1)
+
+    # Rétention non écoulée: rien n'est supprimé
+    assert db.purge_rejected_messages(3600) == 0
+
+    cursor = db.connection.cursor()
+    cursor.execute("UPDATE message SET date_rejet = NOW() - INTERVAL %s SECOND WHERE rejete = TRUE",
+                   (7200,))
+    db.connection.commit()
+    cursor.close()
+
+    assert db.purge_rejected_messages(3600, batch_size=1) == 1
+    assert db.purge_rejected_messages(3600, batch_size=1) == 1
+    assert db.purge_rejected_messages(3600, batch_size=1) == 0
+    assert db.get_message_by_id(ids[2]) is not None
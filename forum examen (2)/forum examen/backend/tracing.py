@@ -0,0 +1,530 @@
+"""
+Traces (spans) des requêtes HTTP, des événements Socket.IO, des méthodes
+du DatabaseManager et des émissions
+Le SDK OpenTelemetry est utilisé s'il est installé; sinon un traceur
+intégré écrit les spans (une ligne JSON par span, identifiants au format
+W3C Trace Context) dans un fichier ou sur la sortie standard
+"""
+
+import atexit
+import contextlib
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+
+from logging_setup import bind, log_context
+
+logger = logging.getLogger(__name__)
+
+SPAN_KINDS = ('internal', 'server', 'client', 'producer', 'consumer')
+
+# Span en cours du thread (traceur intégré)
+_current_span = contextvars.ContextVar('current_span', default=None)
+
+
+class SpanContext(namedtuple('SpanContext', 'trace_id span_id sampled')):
+    """Identifiants d'un span, transmis d'un traitement à l'autre (liens, parents)"""
+
+    @property
+    def traceparent(self):
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    @classmethod
+    def from_traceparent(cls, header):
+        """En-tête W3C 'traceparent' -> SpanContext (None s'il est invalide)"""
+        parts = str(header or '').strip().split('-')
+        if len(parts) < 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+            return None
+        try:
+            if not int(parts[1], 16) or not int(parts[2], 16):
+                return None
+            flags = int(parts[3], 16)
+        except ValueError:
+            return None
+        return cls(parts[1], parts[2], bool(flags & 1))
+
+
+def _random_id(bits):
+    return format(random.getrandbits(bits) or 1, f'0{bits // 4}x')
+
+
+# ========================================
+# SPANS DU TRACEUR INTÉGRÉ
+# ========================================
+
+class Span:
+    """Opération chronométrée (nom, type, attributs, liens vers d'autres spans)"""
+
+    recording = True
+
+    def __init__(self, name, kind, trace_id, parent_id, attributes=None, links=()):
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id
+        self.span_id = _random_id(64)
+        self.parent_id = parent_id
+        self.attributes = dict(attributes or {})
+        self.links = [link for link in links if link is not None]
+        self.events = []
+        self.error = None
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def set_error(self, description):
+        self.error = description
+
+    def record_exception(self, exc):
+        self.error = f"{type(exc).__name__}: {exc}"
+        self.events.append({'name': 'exception', 'time_ns': time.time_ns(),
+                            'type': type(exc).__name__, 'message': str(exc)})
+
+    def context(self):
+        return SpanContext(self.trace_id, self.span_id, True)
+
+    def end(self):
+        self.end_ns = time.time_ns()
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'kind': self.kind,
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'start': datetime.fromtimestamp(self.start_ns / 1e9).isoformat(timespec='microseconds'),
+            'duration_ms': round((self.end_ns - self.start_ns) / 1e6, 3),
+            'status': 'error' if self.error else 'ok',
+            'error': self.error,
+            'attributes': self.attributes,
+            'links': [{'trace_id': link.trace_id, 'span_id': link.span_id} for link in self.links],
+            'events': self.events
+        }
+
+
+class _NonRecordingSpan:
+    """Span ignoré (traçage désactivé ou trace non échantillonnée)"""
+
+    recording = False
+
+    def set_attribute(self, key, value):
+        pass
+
+    def set_error(self, description):
+        pass
+
+    def record_exception(self, exc):
+        pass
+
+    def context(self):
+        return None
+
+
+NON_RECORDING_SPAN = _NonRecordingSpan()
+
+
+class _OtelSpan:
+    """Span OpenTelemetry présenté avec l'interface du traceur intégré"""
+
+    def __init__(self, span):
+        self.span = span
+        self.recording = span.is_recording()
+
+    def set_attribute(self, key, value):
+        self.span.set_attribute(key, value)
+
+    def set_error(self, description):
+        from opentelemetry.trace import Status, StatusCode
+        self.span.set_status(Status(StatusCode.ERROR, description))
+
+    def record_exception(self, exc):
+        self.span.record_exception(exc)
+
+    def context(self):
+        context = self.span.get_span_context()
+        if not context.is_valid:
+            return None
+        return SpanContext(format(context.trace_id, '032x'), format(context.span_id, '016x'),
+                           context.trace_flags.sampled)
+
+
+class SpanWriter:
+    """
+    Écrit les spans terminés depuis un thread dédié (file bornée: les
+    handlers n'attendent jamais l'écriture; au-delà, les spans sont
+    abandonnés et comptés)
+
+    Args:
+        path (str): Fichier JSON-lines ('' : sortie standard)
+        queue_size (int): Spans en attente d'écriture au maximum
+    """
+
+    def __init__(self, path='', queue_size=10000):
+        self.path = path
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.lock = threading.Lock()
+        self.exported = 0
+        self.dropped = 0
+        self.thread = threading.Thread(target=self._run, name='span-writer', daemon=True)
+        self.thread.start()
+
+    def export(self, span):
+        try:
+            self.queue.put_nowait(span)
+        except queue.Full:
+            with self.lock:
+                self.dropped += 1
+
+    def stop(self):
+        """Écrit les spans en attente puis arrête le thread"""
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join(timeout=5)
+
+    def _run(self):
+        output = open(self.path, 'a', encoding='utf-8') if self.path else sys.stdout
+        try:
+            while True:
+                span = self.queue.get()
+                if span is None:
+                    break
+                try:
+                    output.write(json.dumps(span.to_dict(), ensure_ascii=False, default=str) + '\n')
+                except Exception as e:
+                    logger.error("Erreur d'écriture d'un span: %s", e)
+                    continue
+                with self.lock:
+                    self.exported += 1
+                if self.queue.empty():
+                    output.flush()
+        finally:
+            output.flush()
+            if output is not sys.stdout:
+                output.close()
+
+
+# ========================================
+# TRACEUR
+# ========================================
+
+class Tracer:
+    """
+    Création des spans et propagation du contexte de trace
+
+    Désactivé par défaut (span() ne renvoie qu'un span vide): setup_tracing()
+    choisit le SDK OpenTelemetry ou le traceur intégré. L'échantillonnage
+    est décidé à la racine de la trace; les spans enfants suivent.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.backend = None
+        self.sample_rate = 1.0
+        self.writer = None
+        self.otel = None
+
+    def configure_builtin(self, writer, sample_rate=1.0):
+        self.backend = 'builtin'
+        self.writer = writer
+        self.sample_rate = sample_rate
+        self.enabled = True
+
+    def configure_otel(self, otel_tracer):
+        self.backend = 'opentelemetry'
+        self.otel = otel_tracer
+        self.enabled = True
+
+    @contextlib.contextmanager
+    def span(self, name, kind='internal', attributes=None, parent=None, links=()):
+        """
+        Span courant pendant le bloc 'with' (enfant du span en cours, ou de
+        'parent' s'il est donné)
+
+        Args:
+            kind (str): internal, server, client, producer ou consumer
+            parent (SpanContext): Contexte reçu d'un autre traitement
+            links (list): SpanContext liés (ex.: l'envoi d'un message diffusé plus tard)
+        """
+        if not self.enabled:
+            yield NON_RECORDING_SPAN
+            return
+        if self.otel is not None:
+            with self._otel_span(name, kind, attributes, parent, links) as span:
+                yield span
+            return
+
+        current = _current_span.get()
+        if parent is not None:
+            trace_id, parent_id, sampled = parent.trace_id, parent.span_id, parent.sampled
+        elif current is not None:
+            if not current.recording:
+                yield NON_RECORDING_SPAN
+                return
+            trace_id, parent_id, sampled = current.trace_id, current.span_id, True
+        else:
+            trace_id, parent_id, sampled = _random_id(128), None, random.random() < self.sample_rate
+
+        if not sampled:
+            token = _current_span.set(NON_RECORDING_SPAN)
+            try:
+                yield NON_RECORDING_SPAN
+            finally:
+                _current_span.reset(token)
+            return
+
+        span = Span(name, kind, trace_id, parent_id, attributes, links)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_exception(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end()
+            self.writer.export(span)
+
+    @contextlib.contextmanager
+    def _otel_span(self, name, kind, attributes, parent, links):
+        from opentelemetry import trace
+
+        def otel_context(context):
+            return trace.SpanContext(int(context.trace_id, 16), int(context.span_id, 16), is_remote=True,
+                                     trace_flags=trace.TraceFlags(int(context.sampled)))
+
+        context = None
+        if parent is not None:
+            context = trace.set_span_in_context(trace.NonRecordingSpan(otel_context(parent)))
+        with self.otel.start_as_current_span(
+                name, context=context, kind=trace.SpanKind[kind.upper()], attributes=attributes,
+                links=[trace.Link(otel_context(link)) for link in links if link is not None]) as span:
+            yield _OtelSpan(span)
+
+    def current_span(self):
+        """Span en cours (span vide s'il n'y en a pas)"""
+        if self.otel is not None:
+            from opentelemetry import trace
+            return _OtelSpan(trace.get_current_span())
+        return _current_span.get() or NON_RECORDING_SPAN
+
+    def current_context(self):
+        """SpanContext du span en cours (None hors trace ou trace non échantillonnée)"""
+        if not self.enabled:
+            return None
+        span = self.current_span()
+        return span.context() if span.recording else None
+
+    def active(self):
+        """Vrai dans une trace enregistrée (requête, événement...)"""
+        return self.enabled and self.current_span().recording
+
+    def stop(self):
+        if self.writer is not None:
+            self.writer.stop()
+
+    def metrics(self):
+        stats = {'enabled': self.enabled, 'sample_rate': self.sample_rate}
+        if self.writer is not None:
+            with self.writer.lock:
+                stats.update(exported=self.writer.exported, dropped=self.writer.dropped)
+            stats['queued'] = self.writer.queue.qsize()
+        return stats
+
+
+tracer = Tracer()
+
+
+def setup_tracing(config):
+    """
+    Configure le traceur global depuis la section [TRACING] de config.ini
+
+    exporter = auto: SDK OpenTelemetry s'il est installé, sinon traceur
+    intégré; otel | builtin: forcer l'un ou l'autre. Avec le SDK, un
+    TracerProvider déjà installé par l'application (exporteur OTLP...)
+    est réutilisé; sinon les spans sont écrits par son ConsoleSpanExporter.
+    """
+    if not config.getboolean('TRACING', 'enabled', fallback=False):
+        return tracer
+    exporter = config.get('TRACING', 'exporter', fallback='auto')
+    path = config.get('TRACING', 'file', fallback='traces.jsonl')
+    sample_rate = config.getfloat('TRACING', 'sample_rate', fallback=1.0)
+
+    if exporter in ('auto', 'otel'):
+        try:
+            from opentelemetry import trace
+            tracer.configure_otel(_otel_tracer(trace, path, sample_rate))
+            tracer.sample_rate = sample_rate
+            logger.info("Traçage OpenTelemetry activé")
+            return tracer
+        except ImportError:
+            if exporter == 'otel':
+                logger.warning("Module opentelemetry absent: traceur intégré")
+
+    tracer.configure_builtin(
+        SpanWriter(path, config.getint('TRACING', 'queue_size', fallback=10000)),
+        sample_rate=sample_rate
+    )
+    atexit.register(tracer.stop)
+    logger.info("Traçage activé (%s)", path or 'sortie standard')
+    return tracer
+
+
+def _otel_tracer(trace, path, sample_rate):
+    if isinstance(trace.get_tracer_provider(), trace.ProxyTracerProvider):
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+        from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+        provider = TracerProvider(resource=Resource.create({'service.name': 'forum'}),
+                                  sampler=ParentBased(TraceIdRatioBased(sample_rate)))
+        output = open(path, 'a', encoding='utf-8') if path else sys.stdout
+        provider.add_span_processor(BatchSpanProcessor(ConsoleSpanExporter(
+            out=output, formatter=lambda span: span.to_json(indent=None) + os.linesep)))
+        trace.set_tracer_provider(provider)
+        atexit.register(provider.shutdown)
+    return trace.get_tracer('forum')
+
+
+def _bind_trace(span):
+    """Ajoute trace_id au contexte des journaux (corrélation logs/traces)"""
+    context = span.context()
+    return bind(trace_id=context.trace_id) if context is not None else None
+
+
+# ========================================
+# INSTRUMENTATION
+# ========================================
+
+def trace_app(app):
+    """Un span 'server' par requête HTTP (parent: en-tête traceparent reçu)"""
+    from flask import g, request
+
+    @app.before_request
+    def _start_span():
+        name = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        scope = tracer.span(
+            f"{request.method} {name}", kind='server',
+            parent=SpanContext.from_traceparent(request.headers.get('traceparent')),
+            attributes={'http.method': request.method, 'http.route': name}
+        )
+        span = scope.__enter__()
+        g.trace_scope = scope
+        g.trace_log_token = _bind_trace(span)
+        g.trace_span = span
+
+    @app.after_request
+    def _record_status(response):
+        span = g.get('trace_span')
+        if span is not None:
+            span.set_attribute('http.status_code', response.status_code)
+            if response.status_code >= 500:
+                span.set_error(f"HTTP {response.status_code}")
+            context = span.context()
+            if context is not None:
+                response.headers['traceparent'] = context.traceparent
+        return response
+
+    @app.teardown_request
+    def _end_span(exc=None):
+        token = g.pop('trace_log_token', None)
+        if token is not None:
+            log_context.reset(token)
+        g.pop('trace_span', None)
+        scope = g.pop('trace_scope', None)
+        if scope is not None:
+            if exc is None:
+                scope.__exit__(None, None, None)
+            else:
+                scope.__exit__(type(exc), exc, exc.__traceback__)
+
+
+def trace_socketio(socketio):
+    """
+    Un span par événement Socket.IO reçu (parent: champ 'traceparent' des
+    données s'il est fourni) et un span 'producer' par émission
+
+    À appeler avant l'enregistrement des handlers (@socketio.on).
+    """
+    from flask import request
+
+    register = socketio.on
+    emit = socketio.emit
+
+    def on(message, namespace=None):
+        decorator = register(message, namespace)
+
+        def wrap(handler):
+            @functools.wraps(handler)
+            def traced(*args):
+                parent = None
+                if args and isinstance(args[0], dict):
+                    parent = SpanContext.from_traceparent(args[0].get('traceparent'))
+                with tracer.span(f"socketio {message}", kind='server', parent=parent,
+                                 attributes={'socketio.event': message, 'socketio.sid': request.sid}) as span:
+                    token = _bind_trace(span)
+                    try:
+                        return handler(*args)
+                    finally:
+                        if token is not None:
+                            log_context.reset(token)
+            decorator(traced)
+            return handler
+        return wrap
+
+    def traced_emit(event, *args, **kwargs):
+        to = kwargs.get('to', kwargs.get('room'))
+        if to is None:
+            to = 'broadcast'
+        elif isinstance(to, (list, tuple, set)):
+            to = [str(room) for room in to]
+        else:
+            to = str(to)
+        with tracer.span(f"emit {event}", kind='producer',
+                         attributes={'socketio.event': event, 'socketio.to': to}):
+            return emit(event, *args, **kwargs)
+
+    socketio.on = on
+    socketio.emit = traced_emit
+    return socketio
+
+
+def trace_database(cls, exclude=('add_listener',)):
+    """
+    Un span 'client' par appel d'une méthode publique de la classe, dans
+    une trace en cours uniquement (les threads de maintenance ne créent
+    pas de traces). Les générateurs (iter_*, chargement au démarrage)
+    ne sont pas tracés.
+    """
+    def traced(name, method):
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            if not tracer.active():
+                return method(*args, **kwargs)
+            with tracer.span(f"db {name}", kind='client',
+                             attributes={'db.system': args[0].backend.dialect,
+                                         'db.operation': name}) as span:
+                result = method(*args, **kwargs)
+                if isinstance(result, (list, tuple)):
+                    span.set_attribute('db.rows', len(result))
+                return result
+        return wrapper
+
+    for name, method in list(vars(cls).items()):
+        if (name.startswith('_') or name in exclude or not inspect.isfunction(method)
+                or inspect.isgeneratorfunction(method)):
+            continue
+        setattr(cls, name, traced(name, method))
+    return cls
@@ -0,0 +1,239 @@
+"""
+Index en mémoire des étudiants
+Disponibilité des usernames/pseudos pour l'inscription et recherche
+par préfixe des destinataires de messages privés
+"""
+
+import bisect
+import hashlib
+import math
+import threading
+import unicodedata
+
+
+def normalize(value):
+    """
+    Forme canonique d'un identifiant, alignée sur les collations MySQL
+    *_ci / *_ai_ci: insensible à la casse et aux accents
+    """
+    value = unicodedata.normalize('NFKD', value.strip())
+    value = ''.join(c for c in value if not unicodedata.combining(c))
+    return value.casefold()
+
+
+class BloomFilter:
+    """
+    Filtre de Bloom: "absent" est certain, "présent" est probable
+
+    Args:
+        capacity (int): Nombre d'éléments prévus
+        error_rate (float): Taux de faux positifs visé à pleine capacité
+    """
+
+    def __init__(self, capacity=100000, error_rate=0.01):
+        self.size = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, value):
+        digest = hashlib.blake2b(value.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value):
+        return all(self.bits[position >> 3] & (1 << (position & 7))
+                   for position in self._positions(value))
+
+
+class AvailabilityIndex:
+    """
+    Usernames et pseudos déjà pris
+
+    Le filtre de Bloom répond seul pour la grande majorité des valeurs
+    libres; l'ensemble exact ne sert qu'à confirmer ses réponses positives.
+    Les réservations faites pendant une inscription évitent que deux
+    requêtes simultanées obtiennent le même identifiant.
+    """
+
+    FIELDS = ('username', 'pseudo')
+
+    def __init__(self, capacity=100000, error_rate=0.01):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.lock = threading.Lock()
+        self._reset()
+
+    @classmethod
+    def from_config(cls, config):
+        """Dimensionne les filtres depuis la section [REGISTRATION] de config.ini"""
+        return cls(
+            capacity=config.getint('REGISTRATION', 'expected_users', fallback=100000),
+            error_rate=config.getfloat('REGISTRATION', 'bloom_error_rate', fallback=0.01)
+        )
+
+    def _reset(self):
+        self.blooms = {f: BloomFilter(self.capacity, self.error_rate) for f in self.FIELDS}
+        self.taken = {f: set() for f in self.FIELDS}
+
+    def rebuild(self, rows):
+        """
+        Reconstruit l'index (démarrage)
+
+        Args:
+            rows (iterable): Lots de dicts avec 'username' et 'pseudo'
+        """
+        with self.lock:
+            self._reset()
+            for batch in rows:
+                for row in batch:
+                    self._add(row['username'], row['pseudo'])
+
+    def __len__(self):
+        return len(self.taken['username'])
+
+    def is_available(self, field, value):
+        """True si la valeur n'est utilisée par aucun étudiant"""
+        key = normalize(value)
+        if key not in self.blooms[field]:
+            return True
+        with self.lock:
+            return key not in self.taken[field]
+
+    def reserve(self, username, pseudo):
+        """
+        Réserve un couple username/pseudo de façon atomique
+
+        Returns:
+            list: Champs déjà pris (vide si la réservation a réussi)
+        """
+        with self.lock:
+            conflicts = [field for field, value in (('username', username), ('pseudo', pseudo))
+                         if normalize(value) in self.taken[field]]
+            if not conflicts:
+                self._add(username, pseudo)
+            return conflicts
+
+    def release(self, username, pseudo):
+        """Annule une réservation (échec de l'insertion en base)"""
+        with self.lock:
+            self.taken['username'].discard(normalize(username))
+            self.taken['pseudo'].discard(normalize(pseudo))
+
+    def _add(self, username, pseudo):
+        for field, value in (('username', username), ('pseudo', pseudo)):
+            key = normalize(value)
+            if key not in self.taken[field]:
+                self.taken[field].add(key)
+                self.blooms[field].add(key)
+
+    # ========================================
+    # LISTENER DU DATABASEMANAGER
+    # ========================================
+
+    def handle_event(self, event, data):
+        if event == 'user_added':
+            with self.lock:
+                self._add(data['user']['username'], data['user']['pseudo'])
+
+
+class PrefixIndex:
+    """
+    Étudiants actifs triés par pseudo et par username normalisés
+
+    Une recherche par préfixe est une bisection suivie d'un parcours
+    des seules entrées qui commencent par ce préfixe.
+    """
+
+    def __init__(self):
+        # Liste triée de (clé normalisée, id): deux entrées par étudiant
+        self.keys = []
+        # id -> {'id', 'username', 'pseudo'}
+        self.users = {}
+        # username normalisé -> id
+        self.usernames = {}
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.users)
+
+    def rebuild(self, rows):
+        """
+        Reconstruit l'index (démarrage)
+
+        Args:
+            rows (iterable): Lots de dicts avec id, username, pseudo, compte_actif
+        """
+        keys, users, usernames = [], {}, {}
+        for batch in rows:
+            for row in batch:
+                if not row['compte_actif']:
+                    continue
+                user = {'id': row['id'], 'username': row['username'], 'pseudo': row['pseudo']}
+                users[user['id']] = user
+                usernames[normalize(user['username'])] = user['id']
+                keys.append((normalize(user['pseudo']), user['id']))
+                keys.append((normalize(user['username']), user['id']))
+        keys.sort()
+        with self.lock:
+            self.keys, self.users, self.usernames = keys, users, usernames
+
+    def add(self, user):
+        """Ajoute un étudiant activé"""
+        with self.lock:
+            if user['id'] in self.users:
+                return
+            self.users[user['id']] = {
+                'id': user['id'], 'username': user['username'], 'pseudo': user['pseudo']
+            }
+            self.usernames[normalize(user['username'])] = user['id']
+            bisect.insort(self.keys, (normalize(user['pseudo']), user['id']))
+            bisect.insort(self.keys, (normalize(user['username']), user['id']))
+
+    def resolve(self, username):
+        """
+        Étudiant actif correspondant exactement à un username
+
+        Returns:
+            dict: {'id', 'username', 'pseudo'} ou None
+        """
+        with self.lock:
+            user_id = self.usernames.get(normalize(username))
+            return self.users.get(user_id) if user_id is not None else None
+
+    def suggest(self, prefix, limit=10, exclude_id=None):
+        """
+        Étudiants dont le pseudo ou le username commence par prefix
+
+        Returns:
+            list: [{'id', 'username', 'pseudo'}, ...] par ordre alphabétique
+        """
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        results, seen = [], set()
+        with self.lock:
+            position = bisect.bisect_left(self.keys, (prefix,))
+            while position < len(self.keys) and len(results) < limit:
+                key, user_id = self.keys[position]
+                if not key.startswith(prefix):
+                    break
+                if user_id not in seen and user_id != exclude_id:
+                    seen.add(user_id)
+                    results.append(self.users[user_id])
+                position += 1
+        return results
+
+    # ========================================
+    # LISTENER DU DATABASEMANAGER
+    # ========================================
+
+    def handle_event(self, event, data):
+        if event == 'user_activated' and data['user']:
+            self.add(data['user'])
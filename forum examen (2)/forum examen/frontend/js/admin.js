@@ -9,6 +9,20 @@ const API_URL = 'http://127.0.0.1:5000';
 // Connexion Socket.IO
 let socket;
 
+// Admin connecté (réservations de la file de modération)
+const adminId = Number(localStorage.getItem('admin_id'));
+
+// État local du tableau de bord, maintenu par les deltas 'admin_update'
+const dashboard = {
+    version: null,          // Version du dernier delta appliqué
+    syncing: false,         // Rechargement complet en cours
+    buffered: [],           // Deltas reçus pendant un rechargement
+    stats: {},
+    pending_accounts: [],
+    unapproved_accounts: [],
+    pending_messages: []
+};
+
 // ========================================
 // INITIALISATION
 // ========================================
@@ -24,24 +38,9 @@ document.addEventListener('DOMContentLoaded', async () => {
     // Afficher le nom de l'admin
     document.getElementById('admin-name').textContent = adminUsername;
     
-    // Initialiser Socket.IO
+    // Initialiser Socket.IO (les données sont chargées à la réception de 'admin_sync')
     initializeSocket();
     
-    // Charger les données initiales
-    await loadStats();
-    await loadPendingAccounts();
-    await loadUnapprovedAccounts();
-    await loadPendingMessages();
-    await loadAllUsers();
-    
-    // Rafraîchir automatiquement toutes les 30 secondes
-    setInterval(async () => {
-        await loadStats();
-        await loadPendingAccounts();
-        await loadUnapprovedAccounts();
-        await loadPendingMessages();
-    }, 30000);
-    
     // Gérer la déconnexion
     document.getElementById('logout-btn')?.addEventListener('click', logout);
 });
@@ -51,7 +50,9 @@ document.addEventListener('DOMContentLoaded', async () => {
 // ========================================
 
 function initializeSocket() {
-    socket = io(API_URL);
+    socket = io(API_URL, {
+        auth: { token: localStorage.getItem('admin_socket_token') }
+    });
     
     socket.on('connect', () => {
         console.log('✓ Connecté au serveur WebSocket');
@@ -59,14 +60,26 @@ function initializeSocket() {
         socket.emit('join_admin_room');
     });
     
-    socket.on('admin_notification', async (data) => {
+    // Room admin rejointe: charger tout le tableau de bord en une requête
+    socket.on('admin_sync', async () => {
+        await resyncDashboard(true);
+    });
+    
+    // Delta poussé après chaque écriture côté serveur
+    socket.on('admin_update', (update) => {
+        if (dashboard.syncing) {
+            dashboard.buffered.push(update);
+            return;
+        }
+        applyUpdate(update);
+    });
+    
+    socket.on('admin_notification', (data) => {
         console.log('🔔 Notification admin:', data);
         
         if (data.type === 'new_pending_message') {
-            // Nouveau message en attente
+            // La liste et les compteurs sont mis à jour par 'admin_update'
             showNotification('Nouveau message en attente de validation');
-            await loadPendingMessages();
-            await loadStats();
         }
     });
     
@@ -75,45 +88,137 @@ function initializeSocket() {
     });
 }
 
-// ========================================
-// STATISTIQUES
-// ========================================
-
-async function loadStats() {
+async function resyncDashboard(includeUsers = false) {
+    dashboard.syncing = true;
+    dashboard.buffered = [];
+    
+    // La liste complète des utilisateurs n'est pas poussée par le serveur
+    const sections = ['stats', 'pending_accounts', 'unapproved_accounts', 'pending_messages'];
+    if (includeUsers) {
+        sections.push('users');
+    }
+    
+    let version = dashboard.version;
     try {
-        const response = await fetch(`${API_URL}/admin/stats`);
-        const stats = await response.json();
-        
-        // Mettre à jour les cartes de statistiques
-        document.getElementById('stat-total-users').textContent = stats.total_users || 0;
-        document.getElementById('stat-active-users').textContent = stats.active_users || 0;
-        document.getElementById('stat-approved-users').textContent = stats.approved_users || 0;
-        document.getElementById('stat-total-messages').textContent = stats.total_messages || 0;
-        document.getElementById('stat-validated-messages').textContent = stats.validated_messages || 0;
-        document.getElementById('stat-pending-messages').textContent = stats.pending_messages || 0;
+        const response = await fetch(`${API_URL}/admin/dashboard?sections=${sections.join(',')}`, {
+            headers: adminHeaders()
+        });
+        const data = await response.json();
         
+        if (response.ok) {
+            version = data.version;
+            renderStats(data.stats);
+            // Listes paginées: première page seulement
+            dashboard.pending_accounts = data.pending_accounts.items;
+            dashboard.unapproved_accounts = data.unapproved_accounts.items;
+            dashboard.pending_messages = data.pending_messages.items;
+            renderPendingAccounts();
+            renderUnapprovedAccounts();
+            renderPendingMessages();
+            if (includeUsers) {
+                renderAllUsers(data.users.items, data.users.next_cursor);
+            }
+        } else {
+            console.error('Erreur lors du chargement du tableau de bord:', data.error);
+        }
     } catch (error) {
-        console.error('Erreur lors du chargement des stats:', error);
+        console.error('Erreur lors du chargement du tableau de bord:', error);
     }
+    
+    dashboard.version = version;
+    dashboard.syncing = false;
+    
+    // Rejouer les deltas arrivés pendant le chargement (opérations idempotentes)
+    const buffered = dashboard.buffered;
+    dashboard.buffered = [];
+    buffered
+        .filter(update => update.version > version)
+        .sort((a, b) => a.version - b.version)
+        .forEach(applyUpdate);
 }
 
-// ========================================
-// GESTION DES COMPTES
-// ========================================
-
-async function loadPendingAccounts() {
-    try {
-        const response = await fetch(`${API_URL}/admin/pending_accounts`);
-        const accounts = await response.json();
+function applyUpdate(update) {
+    if (dashboard.version !== null && update.version <= dashboard.version) {
+        return;
+    }
+    if (dashboard.version !== null && update.version !== dashboard.version + 1) {
+        // Delta manquant: recharger l'état complet
+        resyncDashboard(update.version);
+        return;
+    }
+    dashboard.version = update.version;
+    
+    renderStats(update.stats);
+    
+    const touched = new Set();
+    update.changes.forEach(change => {
+        const list = dashboard[change.list];
+        if (!list) return;
         
-        const container = document.getElementById('pending-accounts-list');
+        const matches = item => change.username !== undefined
+            ? item.username === change.username
+            : String(item.id) === String(change.op === 'add' ? change.item.id : change.id);
+        const index = list.findIndex(matches);
         
-        if (accounts.length === 0) {
-            container.innerHTML = '<p class="no-data">Aucun compte en attente d\'activation</p>';
+        if (change.op === 'claim') {
+            // Réservation ou libération d'un lot par un modérateur
+            list.forEach(item => {
+                if (change.ids.includes(item.id)) {
+                    item.id_moderateur = change.admin_id;
+                    item.date_fin_reservation = change.until;
+                }
+            });
+            touched.add(change.list);
             return;
         }
         
-        container.innerHTML = accounts.map(account => `
+        if (change.op === 'add') {
+            if (index >= 0) {
+                list[index] = change.item;
+            } else {
+                list.unshift(change.item);
+            }
+        } else if (change.op === 'remove' && index >= 0) {
+            list.splice(index, 1);
+        }
+        touched.add(change.list);
+    });
+    
+    if (touched.has('pending_accounts')) renderPendingAccounts();
+    if (touched.has('unapproved_accounts')) renderUnapprovedAccounts();
+    if (touched.has('pending_messages')) renderPendingMessages();
+}
+
+// ========================================
+// STATISTIQUES
+// ========================================
+
+function renderStats(stats) {
+    dashboard.stats = stats;
+    
+    // Mettre à jour les cartes de statistiques
+    document.getElementById('stat-total-users').textContent = stats.total_users || 0;
+    document.getElementById('stat-active-users').textContent = stats.active_users || 0;
+    document.getElementById('stat-approved-users').textContent = stats.approved_users || 0;
+    document.getElementById('stat-total-messages').textContent = stats.total_messages || 0;
+    document.getElementById('stat-validated-messages').textContent = stats.validated_messages || 0;
+    document.getElementById('stat-pending-messages').textContent = stats.pending_messages || 0;
+}
+
+// ========================================
+// GESTION DES COMPTES
+// ========================================
+
+function renderPendingAccounts() {
+    const accounts = dashboard.pending_accounts;
+    const container = document.getElementById('pending-accounts-list');
+    
+    if (accounts.length === 0) {
+        container.innerHTML = '<p class="no-data">Aucun compte en attente d\'activation</p>';
+        return;
+    }
+    
+    container.innerHTML = accounts.map(account => `
             <div class="account-card">
                 <div class="account-info">
                     <h4>${account.nom} ${account.prenom}</h4>
@@ -128,25 +233,18 @@ async function loadPendingAccounts() {
                 </div>
             </div>
         `).join('');
-        
-    } catch (error) {
-        console.error('Erreur lors du chargement des comptes en attente:', error);
-    }
 }
 
-async function loadUnapprovedAccounts() {
-    try {
-        const response = await fetch(`${API_URL}/admin/unapproved_accounts`);
-        const accounts = await response.json();
-        
-        const container = document.getElementById('unapproved-accounts-list');
-        
-        if (accounts.length === 0) {
-            container.innerHTML = '<p class="no-data">Aucun compte à approuver</p>';
-            return;
-        }
-        
-        container.innerHTML = accounts.map(account => `
+function renderUnapprovedAccounts() {
+    const accounts = dashboard.unapproved_accounts;
+    const container = document.getElementById('unapproved-accounts-list');
+    
+    if (accounts.length === 0) {
+        container.innerHTML = '<p class="no-data">Aucun compte à approuver</p>';
+        return;
+    }
+    
+    container.innerHTML = accounts.map(account => `
             <div class="account-card">
                 <div class="account-info">
                     <h4>${account.nom} ${account.prenom}</h4>
@@ -161,60 +259,69 @@ async function loadUnapprovedAccounts() {
                 </div>
             </div>
         `).join('');
-        
-    } catch (error) {
-        console.error('Erreur lors du chargement des comptes non approuvés:', error);
-    }
 }
 
-async function loadAllUsers() {
+// Utilisateurs déjà affichés (pagination "Charger plus")
+let allUsers = [];
+
+async function loadAllUsers(cursor = null) {
     try {
-        const response = await fetch(`${API_URL}/admin/users`);
-        const users = await response.json();
-        
-        const container = document.getElementById('all-users-list');
-        
-        if (users.length === 0) {
-            container.innerHTML = '<p class="no-data">Aucun utilisateur actif</p>';
-            return;
-        }
-        
-        container.innerHTML = `
-            <table class="users-table">
-                <thead>
-                    <tr>
-                        <th>Nom</th>
-                        <th>Prénom</th>
-                        <th>Pseudo</th>
-                        <th>Username</th>
-                        <th>Statut</th>
-                        <th>Inscription</th>
-                    </tr>
-                </thead>
-                <tbody>
-                    ${users.map(user => `
-                        <tr>
-                            <td>${user.nom}</td>
-                            <td>${user.prenom}</td>
-                            <td>${user.pseudo}</td>
-                            <td>${user.username}</td>
-                            <td>
-                                ${user.compte_approuve 
-                                    ? '<span class="badge badge-success">✓ Approuvé</span>' 
-                                    : '<span class="badge badge-warning">⏳ Non approuvé</span>'}
-                            </td>
-                            <td>${formatDate(user.date_inscription)}</td>
-                        </tr>
-                    `).join('')}
-                </tbody>
-            </table>
-        `;
+        const url = cursor
+            ? `${API_URL}/admin/users?cursor=${encodeURIComponent(cursor)}`
+            : `${API_URL}/admin/users`;
+        const response = await fetch(url, { headers: adminHeaders() });
+        const page = await response.json();
+        renderAllUsers(cursor ? allUsers.concat(page.items) : page.items, page.next_cursor);
         
     } catch (error) {
         console.error('Erreur lors du chargement des utilisateurs:', error);
     }
 }
 
+function renderAllUsers(users, nextCursor = null) {
+    allUsers = users;
+    const container = document.getElementById('all-users-list');
+    
+    if (users.length === 0) {
+        container.innerHTML = '<p class="no-data">Aucun utilisateur actif</p>';
+        return;
+    }
+    
+    container.innerHTML = `
+        <table class="users-table">
+            <thead>
+                <tr>
+                    <th>Nom</th>
+                    <th>Prénom</th>
+                    <th>Pseudo</th>
+                    <th>Username</th>
+                    <th>Statut</th>
+                    <th>Inscription</th>
+                </tr>
+            </thead>
+            <tbody>
+                ${users.map(user => `
+                    <tr>
+                        <td>${user.nom}</td>
+                        <td>${user.prenom}</td>
+                        <td>${user.pseudo}</td>
+                        <td>${user.username}</td>
+                        <td>
+                            ${user.compte_approuve 
+                                ? '<span class="badge badge-success">✓ Approuvé</span>' 
+                                : '<span class="badge badge-warning">⏳ Non approuvé</span>'}
+                        </td>
+                        <td>${formatDate(user.date_inscription)}</td>
+                    </tr>
+                `).join('')}
+            </tbody>
+        </table>
+        ${nextCursor 
+            ? `<button class="btn btn-secondary" onclick="loadAllUsers('${nextCursor}')">Charger plus</button>` 
+            : ''}
+    `;
+}
+
 async function activateAccount(username, pseudo) {
     if (!confirm(`Voulez-vous activer le compte de ${pseudo} (${username}) ?\n\nL'étudiant pourra se connecter mais ses messages nécessiteront une validation.`)) {
         return;
@@ -233,9 +340,7 @@ async function activateAccount(username, pseudo) {
         
         if (response.ok) {
             showNotification(`✓ Compte ${pseudo} activé avec succès`, 'success');
-            await loadPendingAccounts();
-            await loadUnapprovedAccounts();
-            await loadStats();
+            await loadAllUsers();
         } else {
             showNotification(`✗ Erreur: ${data.error}`, 'error');
         }
@@ -264,9 +369,7 @@ async function approveAccount(username, pseudo) {
         
         if (response.ok) {
             showNotification(`✓ Compte ${pseudo} approuvé définitivement`, 'success');
-            await loadUnapprovedAccounts();
             await loadAllUsers();
-            await loadStats();
         } else {
             showNotification(`✗ Erreur: ${data.error}`, 'error');
         }
@@ -281,23 +384,23 @@ async function approveAccount(username, pseudo) {
 // GESTION DES MESSAGES
 // ========================================
 
-async function loadPendingMessages() {
-    try {
-        const response = await fetch(`${API_URL}/admin/pending_messages`);
-        const messages = await response.json();
-        
-        const container = document.getElementById('pending-messages-list');
-        
-        if (messages.length === 0) {
-            container.innerHTML = '<p class="no-data">Aucun message en attente de validation</p>';
-            return;
-        }
-        
-        container.innerHTML = messages.map(message => `
-            <div class="message-card">
+function renderPendingMessages() {
+    const messages = dashboard.pending_messages;
+    const container = document.getElementById('pending-messages-list');
+    
+    if (messages.length === 0) {
+        container.innerHTML = '<p class="no-data">Aucun message en attente de validation</p>';
+        return;
+    }
+    
+    container.innerHTML = messages.map(message => {
+        const lease = leaseOwner(message);
+        const locked = lease === 'other';
+        return `
+            <div class="message-card${lease ? ` claimed-by-${lease === 'me' ? 'me' : 'other'}` : ''}">
                 <div class="message-header">
                     <div class="message-author">
-                        <strong>${message.nom} ${message.prenom}</strong> (${message.expediteur_pseudo})
+                        <strong>${message.nom || ''} ${message.prenom || ''}</strong> (${message.expediteur_pseudo})
                     </div>
                     <div class="message-time">
                         ${formatDate(message.date_envoi)}
@@ -312,20 +415,89 @@ async function loadPendingMessages() {
                             ? `📧 Privé → ${message.pseudo_destinataire || 'N/A'}` 
                             : '📢 Public'}
                     </span>
+                    ${lease === 'me' ? '<span class="message-lease">📌 Réservé par vous</span>' : ''}
+                    ${locked ? '<span class="message-lease">🔒 Réservé par un autre modérateur</span>' : ''}
                 </div>
                 <div class="message-actions">
-                    <button class="btn btn-success" onclick="validateMessage(${message.id}, '${message.expediteur_pseudo}')">
+                    <button class="btn btn-success" ${locked ? 'disabled' : ''} onclick="validateMessage(${message.id}, '${message.expediteur_pseudo}')">
                         ✓ Valider
                     </button>
-                    <button class="btn btn-danger" onclick="rejectMessage(${message.id}, '${message.expediteur_pseudo}')">
+                    <button class="btn btn-danger" ${locked ? 'disabled' : ''} onclick="rejectMessage(${message.id}, '${message.expediteur_pseudo}')">
                         ✗ Rejeter
                     </button>
                 </div>
             </div>
-        `).join('');
+        `;
+    }).join('');
+}
+
+// 'me', 'other', ou null si le message n'est pas réservé (ou bail expiré)
+function leaseOwner(message) {
+    if (!message.id_moderateur || !message.date_fin_reservation) return null;
+    if (new Date(message.date_fin_reservation) <= new Date()) return null;
+    return Number(message.id_moderateur) === adminId ? 'me' : 'other';
+}
+
+function adminHeaders() {
+    return {
+        'Content-Type': 'application/json',
+        'Authorization': `Bearer ${localStorage.getItem('admin_socket_token')}`
+    };
+}
+
+async function claimMessages() {
+    try {
+        const response = await fetch(`${API_URL}/admin/moderation/claim`, {
+            method: 'POST',
+            headers: adminHeaders(),
+            body: JSON.stringify({})
+        });
+        
+        const data = await response.json();
+        
+        if (!response.ok) {
+            showNotification(`✗ Erreur: ${data.error}`, 'error');
+            return;
+        }
+        if (data.items.length === 0) {
+            showNotification('Aucun message disponible à réserver', 'info');
+            return;
+        }
+        
+        // Placer le lot réservé en tête de la liste
+        const claimed = new Set(data.items.map(message => message.id));
+        dashboard.pending_messages = data.items.concat(
+            dashboard.pending_messages.filter(message => !claimed.has(message.id))
+        );
+        renderPendingMessages();
+        showNotification(`✓ ${data.items.length} message(s) réservé(s) pour ${Math.round(data.lease_seconds / 60)} min`, 'success');
+        
+    } catch (error) {
+        console.error('Erreur lors de la réservation:', error);
+        showNotification('✗ Erreur lors de la réservation', 'error');
+    }
+}
+
+async function releaseMessages() {
+    try {
+        const response = await fetch(`${API_URL}/admin/moderation/release`, {
+            method: 'POST',
+            headers: adminHeaders(),
+            body: JSON.stringify({})
+        });
+        
+        const data = await response.json();
+        
+        if (response.ok) {
+            // La liste est mise à jour par 'admin_update'
+            showNotification(`✓ ${data.released.length} réservation(s) libérée(s)`, 'success');
+        } else {
+            showNotification(`✗ Erreur: ${data.error}`, 'error');
+        }
         
     } catch (error) {
-        console.error('Erreur lors du chargement des messages en attente:', error);
+        console.error('Erreur lors de la libération:', error);
+        showNotification('✗ Erreur lors de la libération', 'error');
     }
 }
 
@@ -333,9 +505,7 @@ async function validateMessage(messageId, pseudo) {
     try {
         const response = await fetch(`${API_URL}/admin/validate_message`, {
             method: 'POST',
-            headers: {
-                'Content-Type': 'application/json'
-            },
+            headers: adminHeaders(),
             body: JSON.stringify({ message_id: messageId })
         });
         
@@ -343,8 +513,6 @@ async function validateMessage(messageId, pseudo) {
         
         if (response.ok) {
             showNotification(`✓ Message de ${pseudo} validé et distribué`, 'success');
-            await loadPendingMessages();
-            await loadStats();
         } else {
             showNotification(`✗ Erreur: ${data.error}`, 'error');
         }
@@ -363,9 +531,7 @@ async function rejectMessage(messageId, pseudo) {
     try {
         const response = await fetch(`${API_URL}/admin/reject_message`, {
             method: 'POST',
-            headers: {
-                'Content-Type': 'application/json'
-            },
+            headers: adminHeaders(),
             body: JSON.stringify({ message_id: messageId })
         });
         
@@ -373,8 +539,6 @@ async function rejectMessage(messageId, pseudo) {
         
         if (response.ok) {
             showNotification(`✓ Message de ${pseudo} rejeté`, 'success');
-            await loadPendingMessages();
-            await loadStats();
         } else {
             showNotification(`✗ Erreur: ${data.error}`, 'error');
         }
@@ -446,6 +610,7 @@ function logout() {
     if (confirm('Voulez-vous vraiment vous déconnecter ?')) {
         localStorage.removeItem('admin_username');
         localStorage.removeItem('admin_id');
+        localStorage.removeItem('admin_socket_token');
         window.location.href = 'admin_login.html';
     }
 }
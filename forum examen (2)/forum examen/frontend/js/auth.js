@@ -43,6 +43,7 @@ async function handleLogin(e) {
         if (response.ok) {
             // Stocker les informations utilisateur
             localStorage.setItem('user', JSON.stringify(data.user));
+            localStorage.setItem('socket_token', data.socket_token);
             
             // Rediriger vers le chat
             window.location.href = 'chat.html';
@@ -111,6 +112,59 @@ async function handleRegister(e) {
     }
 }
 
+// ========================================
+// DISPONIBILITÉ USERNAME / PSEUDO
+// ========================================
+
+const AVAILABILITY_DELAY = 300;
+
+function setupAvailabilityCheck(field) {
+    const input = document.getElementById(field);
+    const status = document.getElementById(`${field}-status`);
+    if (!input || !status) return;
+    
+    let timer = null;
+    let lastValue = '';
+    
+    input.addEventListener('input', () => {
+        clearTimeout(timer);
+        const value = input.value.trim();
+        if (!value) {
+            status.textContent = '';
+            status.className = 'field-status';
+            lastValue = '';
+            return;
+        }
+        // Attendre la fin de la frappe avant d'interroger le serveur
+        timer = setTimeout(() => checkAvailability(field, value), AVAILABILITY_DELAY);
+    });
+    
+    async function checkAvailability(field, value) {
+        if (value === lastValue) return;
+        lastValue = value;
+        try {
+            const response = await fetch(
+                `${API_URL}/register/check?${field}=${encodeURIComponent(value)}`
+            );
+            const data = await response.json();
+            // Ignorer une réponse arrivée après une nouvelle saisie
+            if (!response.ok || input.value.trim() !== value) return;
+            
+            if (data[field]) {
+                status.textContent = '✓ Disponible';
+                status.className = 'field-status available';
+            } else {
+                status.textContent = '✗ Déjà utilisé';
+                status.className = 'field-status taken';
+            }
+        } catch (error) {
+            status.textContent = '';
+            status.className = 'field-status';
+            lastValue = '';
+        }
+    }
+}
+
 // Alias pour compatibilité
 function login() {
     // Cette fonction est appelée par le HTML
@@ -9,6 +9,10 @@ const API_URL = 'http://127.0.0.1:5000';
 let socket;
 let currentUser = null;
 
+// Destinataires proposés par /users/suggest: {username: pseudo}
+let recipientSuggestions = {};
+const SUGGEST_DELAY = 200;
+
 // ========================================
 // INITIALISATION
 // ========================================
@@ -43,6 +47,9 @@ document.addEventListener('DOMContentLoaded', () => {
     // Initialiser Socket.IO
     initializeSocket();
     
+    // Suggestions de destinataires pour les messages privés
+    setupRecipientSuggest();
+    
     // Charger les messages existants
     loadMessages();
 });
@@ -52,17 +59,27 @@ document.addEventListener('DOMContentLoaded', () => {
 // ========================================
 
 function initializeSocket() {
-    socket = io(API_URL);
+    // Le jeton remis par /login authentifie le socket une fois pour toutes
+    socket = io(API_URL, {
+        auth: { token: localStorage.getItem('socket_token') }
+    });
     
     socket.on('connect', () => {
         console.log('✓ Connecté au serveur');
         updateConnectionStatus(true);
         
-        // Envoyer l'événement de connexion utilisateur
-        socket.emit('user_connected', {
-            username: currentUser.username,
-            pseudo: currentUser.pseudo
-        });
+        // L'identité est celle du jeton: aucune donnée à envoyer
+        socket.emit('user_connected');
+    });
+    
+    // Jeton absent, expiré ou compte désactivé: retour à la connexion
+    socket.on('connect_error', (error) => {
+        if (error.message !== 'unauthorized') {
+            return;  // Erreur réseau: le client réessaie automatiquement
+        }
+        localStorage.removeItem('user');
+        localStorage.removeItem('socket_token');
+        window.location.href = 'index.html';
     });
     
     socket.on('disconnect', () => {
@@ -81,6 +98,12 @@ function initializeSocket() {
         alert(data.message);
     });
     
+    // Message refusé par la modération automatique
+    socket.on('message_rejected', (data) => {
+        const reasons = data.reasons && data.reasons.length ? `\n- ${data.reasons.join('\n- ')}` : '';
+        alert(data.message + reasons);
+    });
+    
     // Notification d'erreur
     socket.on('error', (data) => {
         alert(data.message);
@@ -155,18 +178,66 @@ function sendMessage() {
         return;
     }
     
+    // Destinataire choisi: message privé, sinon public
+    const payload = { content: content };
+    const recipient = document.getElementById('recipient-input').value.trim();
+    if (recipient) {
+        payload.to_username = recipient;
+        payload.to_pseudo = recipientSuggestions[recipient] || recipient;
+    }
+    
     // Envoyer via WebSocket
-    socket.emit('send_message', {
-        username: currentUser.username,
-        pseudo: currentUser.pseudo,
-        content: content
-    });
+    socket.emit('send_message', payload);
     
     // Vider l'input
     input.value = '';
     input.focus();
 }
 
+// ========================================
+// DESTINATAIRES
+// ========================================
+
+function setupRecipientSuggest() {
+    const input = document.getElementById('recipient-input');
+    const list = document.getElementById('recipient-suggestions');
+    let timer = null;
+    
+    input.addEventListener('input', () => {
+        clearTimeout(timer);
+        const prefix = input.value.trim();
+        if (!prefix || prefix in recipientSuggestions) {
+            return;
+        }
+        // Attendre la fin de la frappe avant d'interroger le serveur
+        timer = setTimeout(async () => {
+            try {
+                const response = await fetch(
+                    `${API_URL}/users/suggest?q=${encodeURIComponent(prefix)}`,
+                    {
+                        credentials: 'include',
+                        headers: { 'Authorization': `Bearer ${localStorage.getItem('socket_token')}` }
+                    }
+                );
+                if (!response.ok || input.value.trim() !== prefix) return;
+                const users = await response.json();
+                
+                recipientSuggestions = {};
+                list.innerHTML = '';
+                users.forEach(user => {
+                    recipientSuggestions[user.username] = user.pseudo;
+                    const option = document.createElement('option');
+                    option.value = user.username;
+                    option.label = user.pseudo;
+                    list.appendChild(option);
+                });
+            } catch (error) {
+                console.error('Erreur lors de la recherche de destinataires:', error);
+            }
+        }, SUGGEST_DELAY);
+    });
+}
+
 function handleKeyPress(event) {
     if (event.key === 'Enter') {
         sendMessage();
@@ -193,9 +264,16 @@ function escapeHtml(text) {
 // DÉCONNEXION
 // ========================================
 
-function logout() {
+async function logout() {
     if (confirm('Voulez-vous vraiment vous déconnecter ?')) {
+        // Fermer la session côté serveur
+        try {
+            await fetch(`${API_URL}/logout`, { method: 'POST', credentials: 'include' });
+        } catch (error) {
+            console.error('Erreur lors de la déconnexion:', error);
+        }
         localStorage.removeItem('user');
+        localStorage.removeItem('socket_token');
         window.location.href = 'index.html';
     }
 }